@@ -26,6 +26,9 @@ from routes.auth import router as auth_router
 from routes.complex_compute import router as compute_router
 from routes.total_source_object import router as total_source_object_router
 from routes.embedded_sql import router as embedded_sql_router
+from routes.migration_plan import router as migration_plan_router
+from routes.migration_history import router as migration_history_router
+from routes.migration_metrics import router as migration_metrics_router
 
 # ✅ Newly added routes
 from routes import migration_status     # /migration-status/{transaction_id}
@@ -86,3 +89,6 @@ app.include_router(total_source_object_router)
 app.include_router(current_migration.router)   # Now /current-migration works
 app.include_router(migration_status.router)    # For migration status by transaction ID
 app.include_router(embedded_sql_router)
+app.include_router(migration_plan_router)
+app.include_router(migration_history_router)
+app.include_router(migration_metrics_router)
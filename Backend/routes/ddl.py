@@ -1,74 +1,96 @@
 # routes/ddl.py
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Request, Response
+from typing import Optional
+import asyncio
 import os
+from utils.ddl_index import get_ddl_index, make_etag
 router = APIRouter()
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 @router.get("/ddl/targets")
 async def list_targets():
     """Returns available migration targets."""
     return ["source", "target"]
+
+FOLDER_TYPE_MAP = {
+    "table": "tables",
+    "tables": "tables",
+    "sequence": "sequences",
+    "sequences": "sequences",
+    "trigger": "triggers",
+    "triggers": "triggers",
+    "index": "index",
+    "indexes": "index",
+    "view": "views",
+    "views": "views"
+}
+
+
+def _cached(request: Request, response: Response, etag: str) -> bool:
+    """Set the ETag and report whether the client already has this version."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return request.headers.get("if-none-match") == etag
+
+
 @router.get("/ddl/schemas")
-async def list_schemas(target: str = Query(..., description="Target database")):
-    target_dir = os.path.join(BASE_DIR, f"generated_ddls/{target}")
-    if not os.path.exists(target_dir):
+async def list_schemas(request: Request, response: Response, target: str = Query(..., description="Target database")):
+    index = get_ddl_index()
+    version, count = index.targets_version(target)
+    if not count and not os.path.exists(os.path.join(BASE_DIR, f"generated_ddls/{target}")):
         raise HTTPException(status_code=404, detail=f"Target '{target}' not found")
-    schemas = [name for name in os.listdir(target_dir) if os.path.isdir(os.path.join(target_dir, name))]
-    return {"schemas": schemas}
+    if _cached(request, response, make_etag("schemas", target, version, count)):
+        return Response(status_code=304, headers=dict(response.headers))
+    return {"schemas": index.list_schemas(target)}
 @router.get("/ddl/objects")
 async def list_objects(
+    request: Request,
+    response: Response,
     target: str = Query(...),
     schema: str = Query(...),
     object_type: str = Query(...),
+    prefix: Optional[str] = Query(None, description="Only names starting with this (case-insensitive)"),
+    q: Optional[str] = Query(None, description="Full-text search over object names and DDL"),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=5000, description="Page size; all objects when omitted"),
 ):
-    folder_type_map = {
-        "table": "tables",
-        "tables": "tables",
-        "sequence": "sequences",   # FIXED
-        "sequences": "sequences",  # FIXED
-        "trigger": "triggers",
-        "triggers": "triggers",
-        "index": "index",
-        "indexes": "index",
-        "view": "views",
-        "views": "views"
-    }
-    folder = folder_type_map.get(object_type.lower())
+    folder = FOLDER_TYPE_MAP.get(object_type.lower())
     if not folder:
         raise HTTPException(status_code=400, detail="Invalid or missing object_type")
-    base_path = os.path.join(BASE_DIR, f"generated_ddls/{target}/{schema}")
-    if not os.path.exists(base_path):
-        raise HTTPException(status_code=404, detail=f"Schema '{schema}' not found under target '{target}'")
-    search_path = os.path.join(base_path, folder)
-    if not os.path.exists(search_path):
-        return {"objects": []}
-    files = [f for f in os.listdir(search_path) if f.lower().endswith(".sql")]
-    objects = [os.path.splitext(f)[0] for f in files]
-    return {"objects": objects}
+    index = get_ddl_index()
+    page = index.list_objects(target, schema, folder, prefix=prefix, q=q, offset=offset, limit=limit)
+    if not page["total"] and not prefix and not q:
+        if not os.path.exists(os.path.join(BASE_DIR, f"generated_ddls/{target}/{schema}")):
+            raise HTTPException(status_code=404, detail=f"Schema '{schema}' not found under target '{target}'")
+    etag = make_etag("objects", target, schema, folder, prefix, q, offset, limit, page["version"], page["total"])
+    if _cached(request, response, etag):
+        return Response(status_code=304, headers=dict(response.headers))
+    return {"objects": page["objects"], "total": page["total"], "offset": offset, "limit": limit}
+
+
 @router.get("/ddl/object_ddl")
 async def get_object_ddl(
+    request: Request,
+    response: Response,
     target: str = Query(...),
     schema: str = Query(...),
     object_type: str = Query(...),
     object_name: str = Query(...),
 ):
-    folder_type_map = {
-        "table": "tables",
-        "tables": "tables",
-        "sequence": "sequences",   # FIXED
-        "sequences": "sequences",  # FIXED
-        "trigger": "triggers",
-        "triggers": "triggers",
-        "index": "index",
-        "indexes": "index",
-        "view": "views",
-        "views": "views"
-    }
-    folder = folder_type_map.get(object_type.lower())
+    folder = FOLDER_TYPE_MAP.get(object_type.lower())
     if not folder:
         raise HTTPException(status_code=400, detail="Invalid object_type")
-    ddl_path = os.path.join(BASE_DIR, f"generated_ddls/{target}/{schema}/{folder}/{object_name}.sql")
-    if not os.path.isfile(ddl_path):
+    found = get_ddl_index().get_ddl(target, schema, folder, object_name)
+    if not found:
         raise HTTPException(status_code=404, detail="DDL file not found for the specified object")
-    with open(ddl_path, "r", encoding="utf-8") as f:
-        ddl_content = f.read()
-    return {"ddl": ddl_content}
\ No newline at end of file
+    ddl_content, version = found
+    if _cached(request, response, make_etag("ddl", target, schema, folder, object_name, version)):
+        return Response(status_code=304, headers=dict(response.headers))
+    return {"ddl": ddl_content}
+
+
+@router.post("/ddl/reindex")
+async def reindex_ddls():
+    """Rebuild the DDL index from the files on disk (e.g. after editing them by hand)."""
+    index = get_ddl_index()
+    await asyncio.get_running_loop().run_in_executor(None, index.rebuild)
+    return {"status": "ok"}
@@ -6,7 +6,9 @@ from utils.ddl_writer import save_ddl
 
 from services.index_oracle_service import fetch_indexes as fetch_oracle_indexes, get_index_ddl as oracle_ddl
 from services.index_sql_service import fetch_indexes as fetch_sql_indexes, get_index_ddl as sql_ddl
-from services.index_converter import convert_index_ddl_to_db2, execute_index_ddl
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from services.index_converter import convert_index_cached, build_table_indexes, INDEX_BUILD_CONCURRENCY
+from services.db2_service import check_table_exists, prune_dead_thread_connections
 from utils.couchdb_helpers import save_migration_status_to_couchdb
 
 router = APIRouter(prefix="/indexes", tags=["Indexes"])
@@ -42,6 +44,8 @@ def migrate_indexes(
 
         migrated = []
         skipped = []
+        build_times = {}
+        by_table = {}
 
         for index in index_ddls:
             name = index["name"]
@@ -51,27 +55,43 @@ def migrate_indexes(
                 continue
 
             try:
-                target_ddl = convert_index_ddl_to_db2(source_ddl)
+                target_ddl = convert_index_cached(source_ddl)
                 # Save DDL files 
                 save_ddl("source", schema, name, source_ddl, object_type="index")
                 save_ddl("target", schema, name, target_ddl, object_type="index")
-
-                if execute_index_ddl(target_ddl, schema):
-                    migrated.append(name)
-                    save_migration_status_to_couchdb(transaction_id, {"indexes": {"success": [name], "error": []}}, schema)
-                else:
-                    skipped.append({"index": name, "reason": "Execution failed"})
-                    save_migration_status_to_couchdb(transaction_id, {"indexes": {"success": [], "error": [name]}}, schema)
+                by_table.setdefault((index.get("table") or "").upper(), []).append((name, target_ddl))
             except Exception as e:
                 logging.exception(f"Failed to migrate index: {name}")
                 skipped.append({"index": name, "reason": str(e)})
-                save_migration_status_to_couchdb(transaction_id, {"indexes": {"success": [], "error": [name]}}, schema)
+
+        missing = [t for t in by_table if t and not check_table_exists(schema, t)]
+        for table in missing:
+            skipped.extend({"index": name, "reason": f"Table {table} not found"} for name, _ in by_table.pop(table))
+
+        # Tables build in parallel; a table's own indexes are built one after the other.
+        with ThreadPoolExecutor(max_workers=INDEX_BUILD_CONCURRENCY) as executor:
+            futures = [executor.submit(build_table_indexes, schema, table, ddls) for table, ddls in by_table.items()]
+            for future in as_completed(futures):
+                for build in future.result():
+                    build_times[build["name"]] = build["duration"]
+                    if build["status"] == "success":
+                        migrated.append(build["name"])
+                    else:
+                        skipped.append({"index": build["name"], "reason": build["error"] or "Execution failed"})
+        prune_dead_thread_connections()
+
+        save_migration_status_to_couchdb(
+            transaction_id,
+            {"indexes": {"success": migrated, "error": [s["index"] for s in skipped]}},
+            schema,
+        )
 
         return {
             "migrated": migrated,
             "skipped": skipped,
             "total_requested": len(index_names or index_ddls),
-            "total_migrated": len(migrated)
+            "total_migrated": len(migrated),
+            "build_times": build_times,
         }
 
     except Exception as e:
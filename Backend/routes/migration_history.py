@@ -0,0 +1,41 @@
+# routes/migration_history.py
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from services.throughput_history import get_throughput_history
+
+router = APIRouter(prefix="/migration-history", tags=["MigrationHistory"])
+logger = logging.getLogger(__name__)
+
+
+@router.get("/runs")
+def list_table_runs(
+    source_type: Optional[str] = Query(None, description="oracle or sql"),
+    schema: Optional[str] = Query(None, description="Source schema name"),
+    table: Optional[str] = Query(None, description="Table name"),
+    limit: int = Query(100, ge=1, le=5000),
+):
+    """Per-table load metrics recorded by past migrations, newest first."""
+    try:
+        return {"runs": get_throughput_history().recent_runs(source_type, schema, table, limit)}
+    except Exception as e:
+        logger.exception("Failed to read migration history")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/throughput/{source_type}/{schema}")
+def get_schema_throughput(source_type: str, schema: str):
+    """Average rows/s and bytes/s per table, as used by the migration planner."""
+    try:
+        history = get_throughput_history()
+        return {
+            "source_type": source_type,
+            "schema": schema.upper(),
+            "schema_average": history.schema_throughput(source_type, schema),
+            "tables": history.table_throughput(source_type, schema),
+        }
+    except Exception as e:
+        logger.exception("Failed to read migration history")
+        raise HTTPException(status_code=500, detail=str(e))
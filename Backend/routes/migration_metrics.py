@@ -0,0 +1,12 @@
+# routes/migration_metrics.py
+from fastapi import APIRouter
+
+from services.memory_governor import get_memory_governor
+
+router = APIRouter(prefix="/migration-metrics", tags=["MigrationMetrics"])
+
+
+@router.get("/memory")
+def get_loader_memory():
+    """Estimated bytes of row batches currently queued for DB2 inserts, against the configured budget."""
+    return get_memory_governor().snapshot()
@@ -0,0 +1,30 @@
+# routes/migration_plan.py
+import logging
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from services.migration_planner import build_migration_plan
+
+router = APIRouter(prefix="/migration-plan", tags=["MigrationPlan"])
+logger = logging.getLogger(__name__)
+
+
+@router.get("/{source_type}/{schema}")
+def get_migration_plan(
+    source_type: str,
+    schema: str,
+    tables: Optional[List[str]] = Query(None, description="Restrict the plan to these tables"),
+    exact_counts: bool = Query(False, description="Use COUNT(*) instead of optimizer statistics"),
+):
+    """
+    Dry run: per-table row counts, estimated bytes, loader strategy and predicted duration.
+    No data is moved and nothing is created in DB2.
+    """
+    if source_type.lower() not in ("oracle", "sql", "sqlserver"):
+        raise HTTPException(status_code=400, detail="Unsupported source_type. Use 'oracle' or 'sqlserver'.")
+    try:
+        return build_migration_plan(source_type, schema, table_filter=tables, exact_counts=exact_counts)
+    except Exception as e:
+        logger.exception("Failed to build migration plan")
+        raise HTTPException(status_code=500, detail=str(e))
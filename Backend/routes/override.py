@@ -1,6 +1,7 @@
 # routes/override.py
 from fastapi import APIRouter
 from services.db2_service import check_table_exists, get_db2_connection
+from services.db2_catalog import get_target_catalog
 import ibm_db
 
 router = APIRouter()
@@ -10,8 +11,10 @@ def override_table(source_type: str, schema: str, table: str):
     try:
         if check_table_exists(schema, table):
             conn = get_db2_connection()
-            ibm_db.exec_immediate(conn, f'DROP TABLE "{schema}"."{table}"')
+            ddl = f'DROP TABLE "{schema}"."{table}"'
+            ibm_db.exec_immediate(conn, ddl)
             ibm_db.close(conn)
+            get_target_catalog().apply_ddl(ddl)
             return {"status": "dropped", "message": f"{schema}.{table} dropped."}
         return {"status": "not_found", "message": f"{schema}.{table} not found in DB2."}
     except Exception as e:
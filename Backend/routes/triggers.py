@@ -12,16 +12,20 @@ from services.trigger_converter import (
     convert_sql_to_db2,
     execute_db2_trigger_ddl,
     migrate_single_trigger,
+    migrate_trigger_batch,
+    TRIGGER_BATCH_SIZE,
 )
 from services.trigger_oracle_service import (
     fetch_triggers as fetch_oracle_triggers,
     fetch_trigger_definition as oracle_trigger_ddl,
+    fetch_trigger_definitions as oracle_trigger_ddls,
 )
 from services.trigger_sql_service import (
     fetch_triggers as fetch_sql_triggers,
     fetch_trigger_definition as sql_trigger_ddl,
+    fetch_trigger_definitions as sql_trigger_ddls,
 )
-from services.db2_service import check_table_exists
+from services.db2_service import check_table_exists, prune_dead_thread_connections
 from sse_starlette.sse import EventSourceResponse
 
 router = APIRouter(prefix="/triggers", tags=["Triggers"])
@@ -60,14 +64,17 @@ def migrate_triggers_parallel(
     trigger_names: Optional[List[str]] = Query(None),
     max_workers: int = Query(32),
     transaction_id: str = Query(...),
+    batch_size: int = Query(TRIGGER_BATCH_SIZE, ge=0, description="Triggers created per batch/connection; 0 = one task per trigger"),
 ) -> Dict:
     if source_type.lower() == "oracle":
         fetch_func = fetch_oracle_triggers
         ddl_func = oracle_trigger_ddl
+        bulk_ddl_func = oracle_trigger_ddls
         convert_func = convert_oracle_to_db2
     elif source_type.lower() == "sqlserver":
         fetch_func = fetch_sql_triggers
         ddl_func = sql_trigger_ddl
+        bulk_ddl_func = sql_trigger_ddls
         convert_func = convert_sql_to_db2
     else:
         raise HTTPException(status_code=400, detail="Unsupported source_type")
@@ -89,10 +96,48 @@ def migrate_triggers_parallel(
         elif isinstance(t, dict):
             canonical_names.append(t.get("trigger_name") or t.get("trigger"))
 
+    # One set-based extraction instead of a DDL query per trigger.
+    definitions = bulk_ddl_func(schema, canonical_names if trigger_names else None)
+
     cached_check = cache_table_check()
     migrated = []
     skipped = []
 
+    if batch_size > 0:
+        batches = [canonical_names[i:i + batch_size] for i in range(0, len(canonical_names), batch_size)]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    migrate_trigger_batch,
+                    schema,
+                    batch,
+                    definitions,
+                    convert_func,
+                    cached_check,
+                    save_ddl,
+                    transaction_id,
+                    3,
+                    ddl_func,
+                )
+                for batch in batches
+            ]
+            for f in as_completed(futures):
+                try:
+                    for result in f.result():
+                        if result["status"] == "success":
+                            migrated.append(result["trigger"])
+                        else:
+                            skipped.append(result)
+                except Exception as e:
+                    logger.error(f"Trigger batch future error: {e}")
+        prune_dead_thread_connections()
+        return {
+            "total_requested": len(canonical_names),
+            "total_migrated": len(migrated),
+            "migrated": migrated,
+            "skipped": skipped,
+        }
+
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         futures = [
             executor.submit(
@@ -107,6 +152,7 @@ def migrate_triggers_parallel(
                 execute_db2_trigger_ddl,
                 transaction_id,
                 3,
+                definitions,
             )
             for trig in canonical_names
         ]
@@ -119,6 +165,7 @@ def migrate_triggers_parallel(
                     skipped.append(result)
             except Exception as e:
                 logger.error(f"Trigger migration future error: {e}")
+    prune_dead_thread_connections()
 
     return {
         "total_requested": len(canonical_names),
@@ -135,6 +182,7 @@ async def migrate_triggers_stream_parallel(
     trigger_names: Optional[List[str]] = Query(None),
     max_workers: int = Query(32),
     transaction_id: Optional[str] = Query(None),
+    batch_size: int = Query(TRIGGER_BATCH_SIZE, ge=0, description="Triggers created per batch/connection; 0 = one task per trigger"),
 ):
     async def stream():
         yield _msg("Starting trigger migration in parallel...")
@@ -142,10 +190,12 @@ async def migrate_triggers_stream_parallel(
         if source_type.lower() == "oracle":
             fetch_func = fetch_oracle_triggers
             ddl_func = oracle_trigger_ddl
+            bulk_ddl_func = oracle_trigger_ddls
             convert_func = convert_oracle_to_db2
         elif source_type.lower() == "sqlserver":
             fetch_func = fetch_sql_triggers
             ddl_func = sql_trigger_ddl
+            bulk_ddl_func = sql_trigger_ddls
             convert_func = convert_sql_to_db2
         else:
             yield _msg("Unsupported source_type")
@@ -173,6 +223,50 @@ async def migrate_triggers_stream_parallel(
         cached_check = cache_table_check()
         loop = asyncio.get_event_loop()
 
+        yield _msg(f"Fetching definitions of {total} triggers...")
+        definitions = await loop.run_in_executor(
+            None, bulk_ddl_func, schema, canonical_names if trigger_names else None
+        )
+
+        def report(result):
+            name = result.get("trigger", "<unknown>")
+            if result.get("status") in ("success", "migrated"):
+                return True, _msg(f"✅ Migrated: {name}")
+            reason = result.get("reason") or result.get("message") or "Unknown"
+            return False, _msg(f"⛔ Skipped {name}: {reason}")
+
+        if batch_size > 0:
+            batches = [canonical_names[i:i + batch_size] for i in range(0, len(canonical_names), batch_size)]
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                tasks = [
+                    loop.run_in_executor(
+                        pool,
+                        migrate_trigger_batch,
+                        schema,
+                        batch,
+                        definitions,
+                        convert_func,
+                        cached_check,
+                        save_ddl,
+                        transaction_id,
+                        3,
+                        ddl_func,
+                    )
+                    for batch in batches
+                ]
+                for coro in asyncio.as_completed(tasks):
+                    try:
+                        for result in await coro:
+                            ok, message = report(result)
+                            succeeded += ok
+                            yield message
+                    except Exception as ex:
+                        logger.error(f"Async trigger batch exception: {ex}")
+                        yield _msg(f"❌ Unexpected error: {ex}")
+            prune_dead_thread_connections()
+            yield _msg(f"Migration completed. Success: {succeeded}/{total}")
+            return
+
         with ThreadPoolExecutor(max_workers=max_workers) as pool:
             tasks = [
                 loop.run_in_executor(
@@ -188,23 +282,20 @@ async def migrate_triggers_stream_parallel(
                     execute_db2_trigger_ddl,
                     transaction_id,
                     3,
+                    definitions,
                 )
                 for trig in canonical_names
             ]
 
             for coro in asyncio.as_completed(tasks):
                 try:
-                    result = await coro
-                    name = result.get("trigger", "<unknown>")
-                    if result.get("status") in ("success", "migrated"):
-                        succeeded += 1
-                        yield _msg(f"✅ Migrated: {name}")
-                    else:
-                        reason = result.get("reason") or result.get("message") or "Unknown"
-                        yield _msg(f"⛔ Skipped {name}: {reason}")
+                    ok, message = report(await coro)
+                    succeeded += ok
+                    yield message
                 except Exception as ex:
                     logger.error(f"Async trigger migration exception: {ex}")
                     yield _msg(f"❌ Unexpected error: {ex}")
+        prune_dead_thread_connections()
 
         yield _msg(f"Migration completed. Success: {succeeded}/{total}")
 
@@ -1,9 +1,26 @@
 #routes/validate_data.py
 
-from fastapi import APIRouter, HTTPException, Request
+import asyncio
+import json
+import time
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sse_starlette.sse import EventSourceResponse
 from services import validation_service
 
 router = APIRouter()
+_MODE_PATTERN = "^(" + "|".join(validation_service.VALIDATION_MODES) + ")$"
+
+
+def _mode(data) -> str:
+    mode = data.get("mode") or "digest"
+    if mode not in validation_service.VALIDATION_MODES:
+        raise HTTPException(
+            status_code=400, detail=f"mode must be one of {', '.join(validation_service.VALIDATION_MODES)}"
+        )
+    return mode
 
 @router.post("/validate/schema")
 async def validate_entire_schema(request: Request):
@@ -14,7 +31,7 @@ async def validate_entire_schema(request: Request):
     if not source_type or not schema:
         raise HTTPException(status_code=400, detail="source_type and schema are required")
 
-    return validation_service.validate_schema(source_type, schema)
+    return validation_service.validate_schema(source_type, schema, mode=_mode(data))
 
 @router.post("/validate/tables")
 async def validate_selected_tables(request: Request):
@@ -23,7 +40,7 @@ async def validate_selected_tables(request: Request):
     source_type = data.get("source_type")
     if not tables or not source_type:
         raise HTTPException(status_code=400, detail="tables and source_type are required")
-    return validation_service.validate_multiple_tables(tables, source_type)
+    return validation_service.validate_multiple_tables(tables, source_type, mode=_mode(data))
 
 @router.post("/validate/table")
 async def validate_single_table(request: Request):
@@ -32,4 +49,66 @@ async def validate_single_table(request: Request):
     source_type = data.get("source_type")
     if not table_name or not source_type:
         raise HTTPException(status_code=400, detail="table and source_type are required")
-    return validation_service.validate_table(table_name, source_type)
+    return validation_service.validate_table(table_name, source_type, _mode(data))
+
+@router.get("/validate/stream")
+async def validate_stream(
+    source_type: str = Query(...),
+    schema: Optional[str] = Query(None, description="Validate every MAXOBJECT table of this schema"),
+    tables: Optional[List[str]] = Query(None, description="Or just these schema.table names"),
+    max_workers: int = Query(validation_service.VALIDATION_CONCURRENCY, ge=1, le=64),
+    format: str = Query("sse", pattern="^(sse|ndjson)$"),
+    mode: str = Query("digest", pattern=_MODE_PATTERN, description="digest: stream all rows; ranges: database-side range checksums; sample: random rows by key; profile: per-column aggregates; loaded: DB2 against its load digest"),
+):
+    """Validate tables in parallel and stream each result as it completes (SSE events or NDJSON lines)."""
+    if not schema and not tables:
+        raise HTTPException(status_code=400, detail="schema or tables is required")
+
+    async def results():
+        started = time.time()
+        names = tables or await asyncio.to_thread(validation_service.schema_tables, source_type, schema)
+        yield {"event": "start", "tables": len(names)}
+        matched = mismatched = failed = 0
+        run = validation_service.TableValidationRun(names, source_type, max_workers, mode)
+        it = iter(run)
+        in_next = False
+        try:
+            while True:
+                in_next = True
+                result = await asyncio.to_thread(next, it, None)
+                in_next = False
+                if result is None:
+                    break
+                if result.get("error"):
+                    failed += 1
+                elif result["match"]:
+                    matched += 1
+                else:
+                    mismatched += 1
+                yield {"event": "table", **result}
+        finally:
+            # Client gone early: drop the tables not started yet. If a worker thread is still
+            # inside next() the generator can't be closed from here; it ends and closes its
+            # pools by itself once the running tables finish.
+            run.cancel()
+            if not in_next:
+                await asyncio.to_thread(it.close)
+        yield {
+            "event": "summary",
+            "tables": len(names),
+            "matched": matched,
+            "mismatched": mismatched,
+            "errors": failed,
+            "duration": round(time.time() - started, 3),
+        }
+
+    if format == "ndjson":
+        async def lines():
+            async for item in results():
+                yield json.dumps(item, default=str) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    async def events():
+        async for item in results():
+            yield {"event": item.pop("event"), "data": json.dumps(item, default=str)}
+    return EventSourceResponse(events())
@@ -5,16 +5,21 @@ import logging
 import re
 from sse_starlette.sse import EventSourceResponse
 
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+
 from services.view_oracle_service import (
     fetch_views as fetch_oracle_views,
-    get_view_ddl as oracle_ddl
+    get_view_ddl as oracle_ddl,
+    fetch_view_dependencies as oracle_view_deps,
 )
 from services.view_sql_service import (
     fetch_views as fetch_sql_views,
-    get_view_ddl as sql_ddl
+    get_view_ddl as sql_ddl,
+    fetch_view_dependencies as sql_view_deps,
 )
-from services.view_converter import convert_view_ddl_to_db2, execute_view_ddl
-from services.db2_service import check_table_exists
+from services.view_converter import convert_view_cached, execute_view_ddl, view_creation_waves
+from services.db2_service import check_table_exists, prune_dead_thread_connections
 from utils.ddl_writer import save_ddl
 from utils.couchdb_helpers import save_migration_status_to_couchdb
 
@@ -50,13 +55,60 @@ def _msg(text: str) -> str:
     return f"data: {text}\n\n"
 
 
+def _migrate_view(schema: str, view: dict, transaction_id: str) -> dict:
+    """Convert and create one view; returns {"view", "status", "reason"}."""
+    name = view["name"]
+    source_ddl = view["source_ddl"]
+    result = {"view": name, "status": "failed", "reason": None}
+    try:
+        if not source_ddl:
+            result["reason"] = "No source DDL"
+            return result
+
+        # Check referenced tables exist in DB2
+        missing_tables = [t for t in extract_referenced_tables(source_ddl) if not check_table_exists(schema, t)]
+        if missing_tables:
+            result["reason"] = f"Missing tables: {', '.join(missing_tables)}"
+            return result
+
+        target_ddl = convert_view_cached(source_ddl)
+        save_ddl("source", schema, name, source_ddl, object_type="view")
+        save_ddl("target", schema, name, target_ddl, object_type="view")
+
+        if execute_view_ddl(target_ddl, schema, view_name=name):
+            result["status"] = "success"
+        else:
+            result["reason"] = "Execution failed"
+    except Exception as e:
+        logging.exception(f"Failed to migrate view: {name}")
+        result["reason"] = str(e)
+    finally:
+        # Update CouchDB status incrementally
+        ok = result["status"] == "success"
+        save_migration_status_to_couchdb(
+            transaction_id, {"views": {"success": [name] if ok else [], "error": [] if ok else [name]}}, schema
+        )
+    return result
+
+
+def _view_waves(source_type: str, schema: str, view_ddls: list):
+    """Topological waves of views (each only selects from earlier waves) plus views in cycles."""
+    try:
+        deps = (oracle_view_deps if source_type.lower() == "oracle" else sql_view_deps)(schema)
+    except Exception as e:
+        logging.warning(f"View dependency catalog unavailable, using parsed DDL only: {e}")
+        deps = {}
+    return view_creation_waves(view_ddls, deps)
+
+
 @router.post("/migrate")
 def migrate_views(
     source_type: str = Query(...),
     target: str = Query(...),
     schema: str = Query(...),
     transaction_id: str = Query(...),   # transaction_id required
-    view_names: Optional[List[str]] = Query(None)
+    view_names: Optional[List[str]] = Query(None),
+    max_workers: int = Query(8, description="Views created in parallel within a dependency wave"),
 ):
     try:
         if source_type.lower() == "oracle":
@@ -69,42 +121,18 @@ def migrate_views(
         migrated = []
         skipped = []
 
-        for view in view_ddls:
-            name = view["name"]
-            source_ddl = view["source_ddl"]
-            if not source_ddl:
-                skipped.append({"view": name, "reason": "No source DDL"})
-                continue
-
-            # Check referenced tables exist in DB2
-            missing_tables = []
-            referenced_tables = extract_referenced_tables(source_ddl)
-            for table in referenced_tables:
-                if not check_table_exists(schema, table, skip_cache=True):
-                    missing_tables.append(table)
-
-            if missing_tables:
-                skipped.append({"view": name, "reason": f"Missing tables: {', '.join(missing_tables)}"})
-                # Update CouchDB skipped status incrementally
-                save_migration_status_to_couchdb(transaction_id, {"views": {"success": [], "error": [name]}}, schema)
-                continue
-
-            try:
-                target_ddl = convert_view_ddl_to_db2(source_ddl)
-                save_ddl("source", schema, name, source_ddl, object_type="view")
-                save_ddl("target", schema, name, target_ddl, object_type="view")
-
-                if execute_view_ddl(target_ddl, schema):
-                    migrated.append(name)
-                    # Update CouchDB success status incrementally
-                    save_migration_status_to_couchdb(transaction_id, {"views": {"success": [name], "error": []}}, schema)
-                else:
-                    skipped.append({"view": name, "reason": "Execution failed"})
-                    save_migration_status_to_couchdb(transaction_id, {"views": {"success": [], "error": [name]}}, schema)
-            except Exception as e:
-                logging.exception(f"Failed to migrate view: {name}")
-                skipped.append({"view": name, "reason": str(e)})
-                save_migration_status_to_couchdb(transaction_id, {"views": {"success": [], "error": [name]}}, schema)
+        waves, cyclic = _view_waves(source_type, schema, view_ddls)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for wave in waves:
+                for result in executor.map(lambda v: _migrate_view(schema, v, transaction_id), wave):
+                    if result["status"] == "success":
+                        migrated.append(result["view"])
+                    else:
+                        skipped.append({"view": result["view"], "reason": result["reason"]})
+        prune_dead_thread_connections()
+        for view in cyclic:
+            skipped.append({"view": view["name"], "reason": "Circular view dependency"})
+            save_migration_status_to_couchdb(transaction_id, {"views": {"success": [], "error": [view["name"]]}}, schema)
 
         return {
             "migrated": migrated,
@@ -123,13 +151,17 @@ async def migrate_views_stream(
     schema: str = Query(...),
     target: str = Query("db2"),
     transaction_id: str = Query(...),
-    view_names: Optional[List[str]] = Query(None)
+    view_names: Optional[List[str]] = Query(None),
+    max_workers: int = Query(8, description="Views created in parallel within a dependency wave"),
 ):
     async def event_generator():
         yield _msg("🪟 Starting view migration...")
 
+        loop = asyncio.get_running_loop()
         try:
-            view_ddls = oracle_ddl(schema, view_names) if source_type.lower() == "oracle" else sql_ddl(schema, view_names)
+            view_ddls = await loop.run_in_executor(
+                None, oracle_ddl if source_type.lower() == "oracle" else sql_ddl, schema, view_names
+            )
         except Exception as e:
             yield _msg(f"❌ Failed to fetch views: {e}")
             return
@@ -138,40 +170,26 @@ async def migrate_views_stream(
             yield _msg("❌ No views found to migrate.")
             return
 
+        waves, cyclic = await loop.run_in_executor(None, _view_waves, source_type, schema, view_ddls)
+        yield _msg(f"🧭 {len(view_ddls)} views in {len(waves)} dependency waves")
+
         count = 0
-        for view in view_ddls:
-            name = view["name"]
-            ddl = view["source_ddl"]
-            if not ddl:
-                yield _msg(f"⚠️ View '{name}' skipped: No DDL")
-                save_migration_status_to_couchdb(transaction_id, {"views": {"success": [], "error": [name]}}, schema)
-                continue
-
-            missing_tables = []
-            for table in extract_referenced_tables(ddl):
-                if not check_table_exists(schema, table, skip_cache=True):
-                    missing_tables.append(table)
-
-            if missing_tables:
-                yield _msg(f"⚠️ View '{name}' skipped: Missing tables {missing_tables}")
-                save_migration_status_to_couchdb(transaction_id, {"views": {"success": [], "error": [name]}}, schema)
-                continue
-
-            try:
-                converted = convert_view_ddl_to_db2(ddl)
-                save_ddl("source", schema, name, ddl, object_type="view")
-                save_ddl("target", schema, name, converted, object_type="view")
-
-                if execute_view_ddl(converted, schema):
-                    yield _msg(f"✅ View '{name}' migrated.")
-                    count += 1
-                    save_migration_status_to_couchdb(transaction_id, {"views": {"success": [name], "error": []}}, schema)
-                else:
-                    yield _msg(f"❌ Failed to execute view '{name}'")
-                    save_migration_status_to_couchdb(transaction_id, {"views": {"success": [], "error": [name]}}, schema)
-            except Exception as e:
-                yield _msg(f"❌ View '{name}' error: {e}")
-                save_migration_status_to_couchdb(transaction_id, {"views": {"success": [], "error": [name]}}, schema)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for n, wave in enumerate(waves, 1):
+                tasks = [loop.run_in_executor(pool, _migrate_view, schema, v, transaction_id) for v in wave]
+                for coro in asyncio.as_completed(tasks):
+                    result = await coro
+                    if result["status"] == "success":
+                        count += 1
+                        yield _msg(f"✅ View '{result['view']}' migrated.")
+                    else:
+                        yield _msg(f"⚠️ View '{result['view']}' skipped: {result['reason']}")
+                yield _msg(f"🌊 Wave {n}/{len(waves)} done ({len(wave)} views)")
+        prune_dead_thread_connections()
+
+        for view in cyclic:
+            yield _msg(f"⚠️ View '{view['name']}' skipped: Circular view dependency")
+            save_migration_status_to_couchdb(transaction_id, {"views": {"success": [], "error": [view["name"]]}}, schema)
 
         yield _msg(f"🎉 Views migration completed. Success: {count}/{len(view_ddls)}")
 
@@ -0,0 +1,179 @@
+# services/column_profile.py
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple
+
+from services.range_checksum import Dialect, column_type
+from services.row_digest import canonical_value
+
+logger = logging.getLogger(__name__)
+
+# Distinct counts are the most expensive aggregate (and only an estimate on Oracle).
+VALIDATION_PROFILE_DISTINCT = os.getenv("VALIDATION_PROFILE_DISTINCT", "1") == "1"
+# Relative difference allowed between distinct counts, for APPROX_COUNT_DISTINCT's error.
+VALIDATION_PROFILE_DISTINCT_TOLERANCE = float(os.getenv("VALIDATION_PROFILE_DISTINCT_TOLERANCE", "0.02"))
+
+# Columns per aggregate query: up to five aggregates each stays under Oracle's
+# 1000-expression select list.
+_COLUMNS_PER_QUERY = 150
+_RELATIVE_TOLERANCE = {"int": Decimal("1e-12"), "decimal": Decimal("1e-12"), "float": Decimal("1e-9")}
+
+
+class ProfileColumn(NamedTuple):
+    name: str
+    kind: str   # text, int, decimal, float, datetime, lob, other
+    scale: int
+
+
+def profile_columns(metadata: Sequence[Dict[str, Any]]) -> List[ProfileColumn]:
+    return [ProfileColumn(col["column_name"], *column_type(col)) for col in metadata]
+
+
+def _aggregates(dialect: Dialect, col: ProfileColumn, distinct: bool) -> List[Tuple[str, str]]:
+    """(statistic, SQL aggregate) pairs for one column."""
+    quoted = dialect.quote(col.name)
+    if col.kind == "text":
+        # Trailing blanks and '' vs NULL differ between engines, not between the data.
+        value = f"NULLIF(RTRIM({quoted}), '')"
+        stats = [
+            ("non_null", f"COUNT({value})"),
+            ("length_sum", f"SUM({dialect.length(value)})"),
+            ("max_length", f"MAX({dialect.length(value)})"),
+        ]
+    elif col.kind in ("int", "decimal", "float"):
+        value = dialect.numeric(quoted, col.kind, col.scale)
+        stats = [
+            ("non_null", f"COUNT({value})"),
+            ("min", f"MIN({value})"),
+            ("max", f"MAX({value})"),
+            ("sum", f"SUM({value})"),
+        ]
+    elif col.kind == "datetime":
+        value = quoted
+        stats = [
+            ("non_null", f"COUNT({value})"),
+            ("min", dialect.datetime(f"MIN({value})")),
+            ("max", dialect.datetime(f"MAX({value})")),
+        ]
+    else:
+        return [("non_null", f"COUNT({quoted})")]
+    if distinct:
+        stats.append(("distinct", dialect.count_distinct(value, col.kind)))
+    return stats
+
+
+def profile_table(
+    conn,
+    dialect: Dialect,
+    table: str,
+    columns: Sequence[ProfileColumn],
+    distinct: bool = VALIDATION_PROFILE_DISTINCT,
+) -> Tuple[int, Dict[str, Dict[str, Any]]]:
+    """
+    (row count, {column: {statistic: value}}) from one aggregate query per
+    _COLUMNS_PER_QUERY columns; only the aggregates leave the database.
+    """
+    rows = 0
+    profiles: Dict[str, Dict[str, Any]] = {}
+    cursor = conn.cursor()
+    try:
+        for start in range(0, max(1, len(columns)), _COLUMNS_PER_QUERY):
+            chunk = columns[start:start + _COLUMNS_PER_QUERY]
+            labels, select = [], ["COUNT(*)"]
+            for col in chunk:
+                for stat, sql in _aggregates(dialect, col, distinct):
+                    labels.append((col.name, stat))
+                    select.append(sql)
+            cursor.execute(f"SELECT {', '.join(select)} FROM {table}")
+            values = cursor.fetchone()
+            rows = int(values[0])
+            for (name, stat), value in zip(labels, values[1:]):
+                profiles.setdefault(name, {})[stat] = value
+    finally:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+    for profile in profiles.values():
+        profile["nulls"] = rows - int(profile.get("non_null") or 0)
+    return rows, profiles
+
+
+def _number(value) -> Decimal:
+    return Decimal(repr(value)) if isinstance(value, float) else Decimal(value)
+
+
+def _same(stat: str, a, b, col: ProfileColumn, distinct_tolerance: float) -> bool:
+    if a is None or b is None:
+        return a is None and b is None
+    if stat == "distinct":
+        a, b = int(a), int(b)
+        return abs(a - b) <= distinct_tolerance * max(a, b)
+    if stat in ("min", "max", "sum") and col.kind in _RELATIVE_TOLERANCE:
+        try:
+            a, b = _number(a), _number(b)
+        except (InvalidOperation, ValueError, TypeError):
+            return str(a) == str(b)
+        tolerance = max(abs(a), abs(b)) * _RELATIVE_TOLERANCE[col.kind]
+        if col.kind == "decimal":
+            tolerance = max(tolerance, Decimal(1).scaleb(-col.scale) / 2)
+        return abs(a - b) <= tolerance
+    if isinstance(a, str) or isinstance(b, str):
+        return str(a) == str(b)
+    return int(a) == int(b)
+
+
+def _plain(value):
+    """JSON-friendly statistic: exact numbers as text, everything else as is."""
+    if value is None or isinstance(value, (int, str)):
+        return value
+    return canonical_value(value)
+
+
+def compare_profiles(
+    source_conn,
+    source_dialect: Dialect,
+    source_table: str,
+    target_conn,
+    target_dialect: Dialect,
+    target_table: str,
+    columns: Sequence[ProfileColumn],
+    distinct: bool = VALIDATION_PROFILE_DISTINCT,
+    distinct_tolerance: float = VALIDATION_PROFILE_DISTINCT_TOLERANCE,
+) -> Dict[str, Any]:
+    """
+    Profile the table on both sides at once and compare column by column: counts exactly,
+    numbers within rounding of their type, text by trimmed length, timestamps to the
+    second, distinct counts within `distinct_tolerance`. Target columns are upper case.
+    """
+    target_columns = [c._replace(name=c.name.upper()) for c in columns]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        source_future = pool.submit(profile_table, source_conn, source_dialect, source_table, columns, distinct)
+        target_future = pool.submit(profile_table, target_conn, target_dialect, target_table, target_columns, distinct)
+        source_rows, source = source_future.result()
+        target_rows, target = target_future.result()
+
+    results = []
+    for col in columns:
+        s, t = source.get(col.name, {}), target.get(col.name.upper(), {})
+        differences = [stat for stat in s if not _same(stat, s.get(stat), t.get(stat), col, distinct_tolerance)]
+        results.append({
+            "column": col.name,
+            "kind": col.kind,
+            "match": not differences,
+            "differences": differences,
+            "source": {k: _plain(v) for k, v in s.items()},
+            "target": {k: _plain(v) for k, v in t.items()},
+        })
+    mismatched = [r["column"] for r in results if not r["match"]]
+    if mismatched:
+        logger.info(f"🔎 {source_table}: {len(mismatched)} column(s) differ: {', '.join(mismatched[:10])}")
+    return {
+        "row_count_source": source_rows,
+        "row_count_target": target_rows,
+        "match": source_rows == target_rows and not mismatched,
+        "mismatched_columns": mismatched,
+        "columns": results,
+    }
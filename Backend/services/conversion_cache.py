@@ -0,0 +1,130 @@
+# services/conversion_cache.py
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONVERSION_CACHE_PATH = os.getenv(
+    "CONVERSION_CACHE_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "conversion_cache.sqlite3"),
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversions (
+    kind        TEXT NOT NULL,
+    source_hash TEXT NOT NULL,
+    target_ddl  TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    PRIMARY KEY (kind, source_hash)
+);
+CREATE TABLE IF NOT EXISTS executions (
+    kind        TEXT NOT NULL,
+    schema_name TEXT NOT NULL,
+    object_name TEXT NOT NULL,
+    target_hash TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    error       TEXT,
+    executed_at REAL NOT NULL,
+    PRIMARY KEY (kind, schema_name, object_name)
+);
+"""
+
+
+def ddl_hash(*parts: Any) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part if part is not None else "").encode("utf-8", "replace"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class ConversionCache:
+    """
+    Content-addressed store of converted object DDL plus the outcome of the last CREATE.
+
+    A conversion is keyed by kind, converter version and a hash of the source DDL (and any
+    context the converter uses, e.g. the target schema), so bumping a converter's version
+    or changing the source DDL is a cache miss. Executions are keyed by object and store a
+    hash of the DDL that was run: when the object still exists and was last created
+    successfully from the same DDL, the caller can skip running it again.
+    """
+
+    def __init__(self, path: str = CONVERSION_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def convert(self, kind: str, version: str, source_ddl: str, convert: Callable[[], str], *context: Any) -> str:
+        """Converted DDL for `source_ddl`, from the cache or by calling `convert()` (whose result is then stored)."""
+        key = ddl_hash(version, source_ddl, *context)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT target_ddl FROM conversions WHERE kind = ? AND source_hash = ?", (kind, key)
+            ).fetchone()
+            if row:
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+        converted = convert()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO conversions (kind, source_hash, target_ddl, created_at) VALUES (?, ?, ?, ?)",
+                (kind, key, converted, time.time()),
+            )
+            self._conn.commit()
+        return converted
+
+    def unchanged(self, kind: str, schema: str, name: str, target_ddl: str) -> bool:
+        """True when the last CREATE of this object succeeded with exactly `target_ddl`."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT target_hash, status FROM executions WHERE kind = ? AND schema_name = ? AND object_name = ?",
+                (kind, schema.upper(), name.upper()),
+            ).fetchone()
+        return bool(row) and row[1] == "success" and row[0] == ddl_hash(target_ddl)
+
+    def record(self, kind: str, schema: str, name: str, target_ddl: str, ok: bool, error: Optional[str] = None):
+        self.record_many(kind, schema, [(name, target_ddl, ok, error)])
+
+    def record_many(self, kind: str, schema: str, outcomes: Iterable[Tuple[str, str, bool, Optional[str]]]):
+        """outcomes: (object name, executed DDL, ok, error)."""
+        now = time.time()
+        rows = [
+            (kind, schema.upper(), name.upper(), ddl_hash(ddl), "success" if ok else "failed", error, now)
+            for name, ddl, ok, error in outcomes
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO executions "
+                "(kind, schema_name, object_name, target_hash, status, error, executed_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+_cache: Optional[ConversionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_conversion_cache() -> ConversionCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ConversionCache()
+        return _cache
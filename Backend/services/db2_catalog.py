@@ -0,0 +1,259 @@
+# services/db2_catalog.py
+import logging
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+import ibm_db
+
+logger = logging.getLogger(__name__)
+
+_IDENT = r'(?:"[^"]+"|[\w$#@]+)'
+_QUALIFIED = rf'({_IDENT}(?:\s*\.\s*{_IDENT})?)'
+_DDL_RE = re.compile(
+    rf'^\s*(CREATE|DROP)\s+(?:OR\s+REPLACE\s+)?(?:UNIQUE\s+)?(TABLE|VIEW|INDEX|SEQUENCE|TRIGGER)\s+'
+    rf'(?:IF\s+(?:NOT\s+)?EXISTS\s+)?{_QUALIFIED}',
+    re.IGNORECASE,
+)
+_ALTER_RE = re.compile(rf'^\s*ALTER\s+TABLE\s+{_QUALIFIED}', re.IGNORECASE)
+_ON_RE = re.compile(rf'\bON\s+{_QUALIFIED}', re.IGNORECASE)
+_LEADING_COMMENTS_RE = re.compile(r'^(?:\s*--[^\n]*\n)+')
+
+
+def _ident(name: str) -> str:
+    # The migration always creates upper-case identifiers, quoted or not.
+    return name.strip().strip('"').upper()
+
+
+def _split_name(qualified: str, default_schema: Optional[str]):
+    parts = re.findall(_IDENT, qualified)
+    if len(parts) == 2:
+        return _ident(parts[0]), _ident(parts[1])
+    return (default_schema.upper() if default_schema else None), _ident(parts[0])
+
+
+@dataclass
+class SchemaCatalog:
+    schema: str
+    tables: Dict[str, str] = field(default_factory=dict)               # TABNAME -> TYPE ('T', 'V', ...)
+    columns: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    sequences: Set[str] = field(default_factory=set)
+    indexes: Dict[str, str] = field(default_factory=dict)              # INDNAME -> TABNAME
+    views: Set[str] = field(default_factory=set)
+    triggers: Dict[str, str] = field(default_factory=dict)             # TRIGNAME -> TABNAME
+    stale_columns: Set[str] = field(default_factory=set)
+
+
+def _rows(conn, sql: str):
+    stmt = ibm_db.exec_immediate(conn, sql)
+    while stmt and (row := ibm_db.fetch_assoc(stmt)):
+        yield row
+
+
+def _load_schema(conn, schema: str) -> SchemaCatalog:
+    cat = SchemaCatalog(schema=schema)
+    for row in _rows(conn, f"SELECT TABNAME, TYPE FROM SYSCAT.TABLES WHERE TABSCHEMA = '{schema}'"):
+        cat.tables[row['TABNAME']] = row['TYPE']
+    for row in _rows(conn, f"""
+        SELECT TABNAME, COLNAME, TYPENAME, LENGTH, SCALE, NULLS, CODEPAGE
+        FROM SYSCAT.COLUMNS WHERE TABSCHEMA = '{schema}' ORDER BY TABNAME, COLNO
+    """):
+        cat.columns.setdefault(row['TABNAME'], []).append(_column(row))
+    for row in _rows(conn, f"SELECT SEQNAME FROM SYSCAT.SEQUENCES WHERE SEQSCHEMA = '{schema}' AND SEQTYPE = 'S'"):
+        cat.sequences.add(row['SEQNAME'])
+    for row in _rows(conn, f"SELECT INDNAME, TABNAME FROM SYSCAT.INDEXES WHERE INDSCHEMA = '{schema}'"):
+        cat.indexes[row['INDNAME']] = row['TABNAME']
+    for row in _rows(conn, f"SELECT VIEWNAME FROM SYSCAT.VIEWS WHERE VIEWSCHEMA = '{schema}'"):
+        cat.views.add(row['VIEWNAME'])
+    for row in _rows(conn, f"SELECT TRIGNAME, TABNAME FROM SYSCAT.TRIGGERS WHERE TRIGSCHEMA = '{schema}'"):
+        cat.triggers[row['TRIGNAME']] = row['TABNAME']
+    return cat
+
+
+def _column(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'column_name': row['COLNAME'],
+        'data_type': row['TYPENAME'],
+        'length': row['LENGTH'],
+        'scale': row['SCALE'],
+        'nullable': row['NULLS'],
+        # Character columns with code page 0 are FOR BIT DATA: DB2 returns them as bytes.
+        'for_bit_data': row.get('CODEPAGE') == 0 and row['TYPENAME'] in ('CHARACTER', 'VARCHAR', 'LONG VARCHAR'),
+    }
+
+
+class TargetCatalog:
+    """
+    In-memory snapshot of the DB2 catalog (tables, columns, sequences, indexes, views,
+    triggers), loaded once per schema with one query per SYSCAT view. DDL we execute is
+    applied to the snapshot in place, so existence and column checks never hit DB2.
+    Changes made outside this process are only seen after `refresh`.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._schemas: Dict[str, SchemaCatalog] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    def _connection(self):
+        from services.db2_service import get_db2_connection_fast
+        return get_db2_connection_fast()
+
+    def schema(self, schema: str) -> SchemaCatalog:
+        schema = schema.upper()
+        with self._lock:
+            cat = self._schemas.get(schema)
+            if cat is not None:
+                return cat
+            load_lock = self._load_locks.setdefault(schema, threading.Lock())
+        # One loader per schema; concurrent callers wait for it instead of querying too.
+        with load_lock:
+            with self._lock:
+                if schema in self._schemas:
+                    return self._schemas[schema]
+            cat = _load_schema(self._connection(), schema)
+            with self._lock:
+                self._schemas[schema] = cat
+            logger.info(
+                f"📚 DB2 catalog snapshot {schema}: {len(cat.tables)} tables, {len(cat.sequences)} sequences, "
+                f"{len(cat.indexes)} indexes, {len(cat.views)} views, {len(cat.triggers)} triggers"
+            )
+            return cat
+
+    def refresh(self, schema: Optional[str] = None):
+        with self._lock:
+            if schema:
+                self._schemas.pop(schema.upper(), None)
+            else:
+                self._schemas.clear()
+
+    # ── lookups ──
+    def has_table(self, schema: str, table: str) -> bool:
+        return table.upper() in self.schema(schema).tables
+
+    def has_sequence(self, schema: str, sequence: str) -> bool:
+        return sequence.upper() in self.schema(schema).sequences
+
+    def has_index(self, schema: str, index: str) -> bool:
+        return index.upper() in self.schema(schema).indexes
+
+    def has_view(self, schema: str, view: str) -> bool:
+        return view.upper() in self.schema(schema).views
+
+    def has_trigger(self, schema: str, trigger: str) -> bool:
+        return trigger.upper() in self.schema(schema).triggers
+
+    def columns(self, schema: str, table: str) -> List[Dict[str, Any]]:
+        cat = self.schema(schema)
+        table = table.upper()
+        with self._lock:
+            stale = table in cat.stale_columns
+        if stale:
+            # Created by us since the snapshot; read the types DB2 actually assigned.
+            cols = [_column(row) for row in _rows(self._connection(), f"""
+                SELECT COLNAME, TYPENAME, LENGTH, SCALE, NULLS, CODEPAGE
+                FROM SYSCAT.COLUMNS WHERE TABSCHEMA = '{cat.schema}' AND TABNAME = '{table}' ORDER BY COLNO
+            """)]
+            with self._lock:
+                cat.columns[table] = cols
+                cat.stale_columns.discard(table)
+        return cat.columns.get(table, [])
+
+    def probe_table(self, schema: str, table: str) -> bool:
+        """Ask DB2 directly about one table and bring the snapshot in line with the answer."""
+        cat = self.schema(schema)
+        table = table.upper()
+        exists = any(_rows(self._connection(), f"""
+            SELECT 1 FROM SYSCAT.TABLES WHERE TABSCHEMA = '{cat.schema}' AND TABNAME = '{table}'
+        """))
+        with self._lock:
+            if exists and table not in cat.tables:
+                cat.tables[table] = "T"
+                cat.stale_columns.add(table)
+            elif not exists:
+                cat.tables.pop(table, None)
+                cat.columns.pop(table, None)
+        return exists
+
+    def reload_sequences(self, schema: str) -> Set[str]:
+        """Re-read the schema's sequences with one SYSCAT query (other objects keep their snapshot)."""
+        schema = schema.upper()
+        names = {row['SEQNAME'] for row in _rows(self._connection(), f"""
+            SELECT SEQNAME FROM SYSCAT.SEQUENCES WHERE SEQSCHEMA = '{schema}' AND SEQTYPE = 'S'
+        """)}
+        with self._lock:
+            cat = self._schemas.get(schema)
+            if cat is not None:
+                cat.sequences = set(names)
+        return names
+
+    # ── updates ──
+    def apply_ddl(self, ddl: str, default_schema: Optional[str] = None) -> bool:
+        """Reflect a successfully executed CREATE/DROP/ALTER TABLE statement. Returns False if it wasn't recognised."""
+        text = _LEADING_COMMENTS_RE.sub("", ddl or "")
+        altered = _ALTER_RE.match(text)
+        if altered:
+            schema, name = _split_name(altered.group(1), default_schema)
+            with self._lock:
+                cat = self._schemas.get(schema) if schema else None
+                if cat is not None and name in cat.tables:
+                    cat.stale_columns.add(name)
+            return True
+        match = _DDL_RE.match(text)
+        if not match:
+            return False
+        action, kind = match.group(1).upper(), match.group(2).upper()
+        schema, name = _split_name(match.group(3), default_schema)
+        if not schema:
+            logger.debug(f"Catalog: no schema for {kind} {name}, refreshing all snapshots")
+            self.refresh()
+            return False
+
+        on_table = None
+        if kind in ("INDEX", "TRIGGER"):
+            on = _ON_RE.search(text, match.end())
+            if on:
+                on_table = _split_name(on.group(1), schema)[1]
+
+        with self._lock:
+            cat = self._schemas.get(schema)
+            if cat is None:
+                return True  # loaded fresh on first use
+            if action == "CREATE":
+                if kind == "TABLE":
+                    cat.tables[name] = "T"
+                    cat.stale_columns.add(name)
+                elif kind == "VIEW":
+                    cat.tables[name] = "V"
+                    cat.views.add(name)
+                    cat.stale_columns.add(name)
+                elif kind == "SEQUENCE":
+                    cat.sequences.add(name)
+                elif kind == "INDEX":
+                    cat.indexes[name] = on_table
+                elif kind == "TRIGGER":
+                    cat.triggers[name] = on_table
+            else:
+                if kind in ("TABLE", "VIEW"):
+                    cat.tables.pop(name, None)
+                    cat.columns.pop(name, None)
+                    cat.stale_columns.discard(name)
+                    cat.views.discard(name)
+                    for objects in (cat.indexes, cat.triggers):
+                        for obj in [o for o, t in objects.items() if t == name]:
+                            del objects[obj]
+                elif kind == "SEQUENCE":
+                    cat.sequences.discard(name)
+                elif kind == "INDEX":
+                    cat.indexes.pop(name, None)
+                elif kind == "TRIGGER":
+                    cat.triggers.pop(name, None)
+        return True
+
+
+_catalog = TargetCatalog()
+
+
+def get_target_catalog() -> TargetCatalog:
+    return _catalog
@@ -2,11 +2,12 @@
 import datetime
 import json
 import logging
+import re
 import ibm_db
 import threading
 
 from decimal import Decimal
-from typing import List, Dict, Optional, Any, Tuple
+from typing import List, Dict, Iterable, Optional, Any, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 import queue
@@ -17,13 +18,16 @@ from ibm_db_dbi import Connection as DBI_Connection
 from utils.credentials_store import load_credentials
 from utils.oracle_type_mapper import oracle_to_db2_type
 from utils.sql_type_mapper import sql_to_db2_type
+from services.memory_governor import get_memory_governor
+from services.db2_catalog import get_target_catalog
+from services.conversion_cache import get_conversion_cache
+from services.row_digest import TableDigest
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # ─────────────────────── GLOBAL OPTIMIZATION CACHE ───────────────────────
 _connection_cache = {}
-_metadata_cache = {}
 _ddl_cache = {}
 _type_cache = {}
 _cache_lock = threading.Lock()
@@ -69,6 +73,19 @@ def close_all_connections():
                 pass
         _connection_cache.clear()
 
+def prune_dead_thread_connections() -> int:
+    """Close cached connections of threads that have exited (e.g. a finished worker pool)."""
+    alive = {t.ident for t in threading.enumerate()}
+    with _cache_lock:
+        dead = [tid for tid in _connection_cache if tid not in alive]
+        conns = [_connection_cache.pop(tid) for tid in dead]
+    for conn in conns:
+        try:
+            ibm_db.close(conn)
+        except:
+            pass
+    return len(conns)
+
 # ─────────────────────── CACHED SCHEMA OPERATIONS ───────────────────────
 def create_schema_if_not_exists(schema_name: str) -> bool:
     """Create schema if it doesn't exist - with caching"""
@@ -110,84 +127,45 @@ def create_schema_if_not_exists(schema_name: str) -> bool:
 _ddl_cache = {}
 _cache_lock = threading.Lock()
 
-def clear_table_cache():
-    """Clear the in-memory table existence cache"""
+def clear_table_cache(schema: Optional[str] = None):
+    """
+    Clear the in-memory table existence cache and the DB2 catalog snapshot, for one
+    schema or all of them. Migration runs call this first so objects created or dropped
+    outside this process since the snapshot was read are seen.
+    """
     with _cache_lock:
-        _ddl_cache.clear()
-        print("🧹 Table existence cache cleared")
+        if schema:
+            _ddl_cache.pop(schema.upper(), None)
+        else:
+            _ddl_cache.clear()
+    get_target_catalog().refresh(schema)
+    logger.info(f"🧹 Table existence cache cleared{f' for {schema.upper()}' if schema else ''}")
 
 def check_table_exists(schema: str, table: str, skip_cache: bool = False) -> bool:
     """
-    Checks if a table exists in DB2 under the given schema using SYSCAT.TABLES.
-    Uses in-memory cache for faster subsequent lookups unless skip_cache is True.
+    Checks if a table exists in DB2 under the given schema.
+    Answered from the target catalog snapshot, which is kept current by every DDL executed
+    through this service; `skip_cache` asks DB2 for this one table instead.
     """
-    schema_upper = schema.upper()
-    table_upper = table.upper()
-    cache_key = f"{schema_upper}.{table_upper}"
-
-    # Check in-memory cache first (unless skipping cache)
-    if not skip_cache:
-        with _cache_lock:
-            if cache_key in _ddl_cache:
-                return _ddl_cache[cache_key]
-
     try:
-        conn = get_db2_connection_fast()
-        query = f"""
-            SELECT 1 
-            FROM SYSCAT.TABLES 
-            WHERE TABSCHEMA = '{schema_upper}' AND TABNAME = '{table_upper}'
-        """
-        result = ibm_db.exec_immediate(conn, query)
-        exists = bool(result and ibm_db.fetch_assoc(result))
-
-        # Save to cache
-        with _cache_lock:
-            _ddl_cache[cache_key] = exists
-
+        catalog = get_target_catalog()
+        exists = catalog.probe_table(schema, table) if skip_cache else catalog.has_table(schema, table)
         if not exists:
-            print(f"❌ Missing in DB2: {schema_upper}.{table_upper}")
-        else:
-            print(f"✅ Found in DB2: {schema_upper}.{table_upper}")
-
+            logger.debug(f"❌ Missing in DB2: {schema.upper()}.{table.upper()}")
         return exists
-
     except Exception as e:
-        print(f"[❌ Error checking table]: {schema}.{table} — {e}")
+        logger.error(f"[❌ Error checking table]: {schema}.{table} — {e}")
         return False
 
 
+def check_sequence_exists(schema: str, sequence: str) -> bool:
+    """Sequence existence from the target catalog snapshot."""
+    return get_target_catalog().has_sequence(schema, sequence)
+
+
 def get_table_column_info_cached(schema: str, table: str) -> List[Dict[str, Any]]:
-    """Get column info with caching"""
-    cache_key = f"cols_{schema.upper()}.{table.upper()}"
-    
-    with _cache_lock:
-        if cache_key in _metadata_cache:
-            return _metadata_cache[cache_key]
-    
-    conn = get_db2_connection_fast()
-    query = f"""
-        SELECT COLNAME, TYPENAME, LENGTH, SCALE, NULLS
-        FROM SYSCAT.COLUMNS
-        WHERE TABSCHEMA = '{schema.upper()}' AND TABNAME = '{table.upper()}'
-        ORDER BY COLNO
-    """
-    result = ibm_db.exec_immediate(conn, query)
-    columns = []
-    
-    while row := ibm_db.fetch_assoc(result):
-        columns.append({
-            'column_name': row['COLNAME'],
-            'data_type': row['TYPENAME'],
-            'length': row['LENGTH'],
-            'scale': row['SCALE'],
-            'nullable': row['NULLS']
-        })
-    
-    with _cache_lock:
-        _metadata_cache[cache_key] = columns
-    
-    return columns
+    """Get column info from the target catalog snapshot"""
+    return get_target_catalog().columns(schema, table)
 
 # ─────────────────────── ENHANCED VALUE SANITIZER WITH LOB SUPPORT ───────────────────────
 def safe_lob_read(lob_obj, max_size=1048576):  # 1MB limit
@@ -306,6 +284,85 @@ def improved_sanitize_value(val: Any, target_type: str, max_length: int = None)
         logger.warning(f"Sanitize error for type {target_type}: {type(e).__name__}: {e}")
         return None
 
+# Digest of the rows each load commits (see services.row_digest), so validation can
+# check the target against it without reading the source again.
+LOAD_DIGEST_ENABLED = os.getenv("LOAD_DIGEST", "1") == "1"
+
+def _as_bound_bytes(val: str) -> bytes:
+    # Binary columns get the sanitized text; DB2 stores (and returns) its UTF-8 bytes.
+    return val.encode("utf-8")
+
+
+_READ_BACK_PARSERS = (
+    ("BLOB", _as_bound_bytes),
+    ("BINARY", _as_bound_bytes),
+    ("TIMESTAMP", datetime.datetime.fromisoformat),
+    ("DATE", datetime.date.fromisoformat),
+    ("TIME", datetime.time.fromisoformat),
+)
+
+
+def read_back_parsers(
+    column_names: List[str], col_types: Dict[str, str], bit_data: Iterable[str] = ()
+) -> List[Tuple[int, Any]]:
+    """
+    (position, parser) for columns whose sanitized value is text DB2 converts on insert
+    (dates and times, binary and FOR BIT DATA columns named in `bit_data`), so digested
+    rows hold what a SELECT returns later.
+    """
+    bit_data = set(bit_data)
+    parsers = []
+    for i, col in enumerate(column_names):
+        if col in bit_data:
+            parsers.append((i, _as_bound_bytes))
+            continue
+        target_upper = (col_types.get(col) or "").upper()
+        for type_name, parser in _READ_BACK_PARSERS:
+            if type_name in target_upper:
+                parsers.append((i, parser))
+                break
+    return parsers
+
+
+def as_read_back(row: Tuple, parsers: List[Tuple[int, Any]]) -> Tuple:
+    if not parsers:
+        return row
+    values = list(row)
+    for i, parser in parsers:
+        if isinstance(values[i], str):
+            try:
+                values[i] = parser(values[i])
+            except ValueError:
+                pass
+    return tuple(values)
+
+
+# Memory charged for an unread LOB locator in a fetched row.
+LOB_ESTIMATE_BYTES = int(os.getenv("LOB_ESTIMATE_BYTES", str(64 * 1024)))
+
+
+def estimate_value_bytes(val: Any) -> int:
+    """Rough in-memory payload size of a single column value."""
+    if val is None:
+        return 1
+    if isinstance(val, (str, bytes, bytearray)):
+        return len(val)
+    if isinstance(val, (int, float)):
+        return 8
+    if isinstance(val, Decimal):
+        return 16
+    if hasattr(val, 'read'):
+        # Oracle LOB locator: str() would measure its repr, and size() costs a round trip
+        # per value, so charge a flat estimate until the worker reads it.
+        return LOB_ESTIMATE_BYTES
+    return len(str(val))
+
+
+def estimate_row_bytes(row) -> int:
+    values = row.values() if isinstance(row, dict) else row
+    return sum(estimate_value_bytes(v) for v in values)
+
+
 # ─────────────────────── ENHANCED FAST WORKER WITH BETTER ERROR HANDLING ───────────────────────
 def fast_insert_worker(data_queue, schema, table, column_info, stats, stop_event):
     thread_name = threading.current_thread().name
@@ -313,6 +370,10 @@ def fast_insert_worker(data_queue, schema, table, column_info, stats, stop_event
     dbi_conn = None
     cursor = None
     inserted = 0
+    inserted_bytes = 0
+    timings = {"sanitize_time": 0.0, "insert_time": 0.0, "commit_time": 0.0, "digest_time": 0.0}
+    row_fallbacks = 0
+    digest = TableDigest()
 
     try:
         conn_raw = get_db2_connection_fast()
@@ -326,13 +387,22 @@ def fast_insert_worker(data_queue, schema, table, column_info, stats, stop_event
         placeholders = ', '.join(['?' for _ in column_names])
         col_names_str = ', '.join([f'"{c}"' for c in column_names])
         insert_sql = f'INSERT INTO "{schema.upper()}"."{table.upper()}" ({col_names_str}) VALUES ({placeholders})'
+        parsers = read_back_parsers(
+            column_names, col_types, (col['column_name'].upper() for col in column_info if col.get('for_bit_data'))
+        )
 
+        governor = get_memory_governor()
         while not stop_event.is_set():
             try:
-                batch = data_queue.get(timeout=5.0)
-                if batch is None:
-                    break
+                item = data_queue.get(timeout=5.0)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
 
+            batch, batch_bytes = item
+            try:
+                phase_start = time.perf_counter()
                 sanitized_batch = []
                 for row_idx, row in enumerate(batch):
                     sanitized_row = []
@@ -345,24 +415,39 @@ def fast_insert_worker(data_queue, schema, table, column_info, stats, stop_event
                             logger.warning(f"{thread_name} sanitization of column {col} failed: {e}")
                             sanitized_row.append(None)
                     sanitized_batch.append(tuple(sanitized_row))
+                timings["sanitize_time"] += time.perf_counter() - phase_start
 
                 if not sanitized_batch:
-                    data_queue.task_done()
                     continue
 
                 try:
+                    phase_start = time.perf_counter()
                     cursor.executemany(insert_sql, sanitized_batch)
+                    timings["insert_time"] += time.perf_counter() - phase_start
+                    phase_start = time.perf_counter()
                     dbi_conn.commit()
+                    timings["commit_time"] += time.perf_counter() - phase_start
                     inserted += len(sanitized_batch)
+                    inserted_bytes += sum(estimate_row_bytes(r) for r in sanitized_batch)
+                    if LOAD_DIGEST_ENABLED:
+                        phase_start = time.perf_counter()
+                        digest.update(as_read_back(r, parsers) for r in sanitized_batch)
+                        timings["digest_time"] += time.perf_counter() - phase_start
                     logger.debug(f"{thread_name} batch inserted {len(sanitized_batch)} rows into {schema}.{table}")
                 except Exception as e:
                     dbi_conn.rollback()
+                    row_fallbacks += 1
                     logger.warning(f"{thread_name} batch insert failed: {e}, falling back to individual inserts")
                     for idx, row in enumerate(sanitized_batch):
                         try:
+                            phase_start = time.perf_counter()
                             cursor.execute(insert_sql, row)
                             dbi_conn.commit()
+                            timings["insert_time"] += time.perf_counter() - phase_start
                             inserted += 1
+                            inserted_bytes += estimate_row_bytes(row)
+                            if LOAD_DIGEST_ENABLED:
+                                digest.add(as_read_back(row, parsers))
                         except Exception as ex:
                             dbi_conn.rollback()
                             logger.error(f"{thread_name} insert failed for row {idx} in {schema}.{table}: {ex}")
@@ -371,13 +456,11 @@ def fast_insert_worker(data_queue, schema, table, column_info, stats, stop_event
                             except:
                                 logger.debug("Could not log failed row data")
 
-                data_queue.task_done()
-
-            except queue.Empty:
-                continue
             except Exception as e:
                 logger.error(f"{thread_name} worker error: {e}")
-                continue
+            finally:
+                governor.release(batch_bytes)
+                data_queue.task_done()
 
     except Exception as e:
         logger.error(f"{thread_name} worker failed to initialize: {e}")
@@ -385,6 +468,11 @@ def fast_insert_worker(data_queue, schema, table, column_info, stats, stop_event
     finally:
         with stats['lock']:
             stats['total_inserted'] += inserted
+            stats['total_bytes'] += inserted_bytes
+            stats['row_fallbacks'] += row_fallbacks
+            stats['digest'].merge(digest)
+            for key, value in timings.items():
+                stats[key] += value
         try:
             if cursor:
                 cursor.close()
@@ -397,7 +485,15 @@ def fast_insert_worker(data_queue, schema, table, column_info, stats, stop_event
             pass
 
 # ─────────────────────── OPTIMIZED BATCH INSERT ───────────────────────
-def optimized_batch_insert(schema, table, data_generator, batch_size=1000, num_workers=None):
+def optimized_batch_insert(schema, table, data_generator, batch_size=1000, num_workers=None, metrics: Optional[Dict[str, Any]] = None):
+    """
+    Insert rows from `data_generator` using `num_workers` parallel DB2 writers.
+    Queued batches are charged against the process-wide memory governor, so fetching
+    blocks while the loads in flight hold the whole budget.
+    If `metrics` is given it is filled with the byte count and the fetch/sanitize/insert/commit
+    time split (worker times are summed across threads), plus the digest of the committed
+    rows (`load_digest`, `digest_rows`) when LOAD_DIGEST is on.
+    """
     if num_workers is None:
         num_workers = min(5, multiprocessing.cpu_count())
     logger.info(f"🚀 INSERT: {schema}.{table} ({num_workers} workers)")
@@ -405,7 +501,11 @@ def optimized_batch_insert(schema, table, data_generator, batch_size=1000, num_w
     if not column_info:
         logger.error(f"No column info for {schema}.{table}")
         return 0
-    stats = {"total_inserted": 0, "lock": threading.Lock()}
+    stats = {
+        "total_inserted": 0, "total_bytes": 0, "row_fallbacks": 0,
+        "fetch_time": 0.0, "sanitize_time": 0.0, "insert_time": 0.0, "commit_time": 0.0, "digest_time": 0.0,
+        "digest": TableDigest(), "lock": threading.Lock(),
+    }
     data_queue = queue.Queue(maxsize=num_workers * 2)
     stop_event = threading.Event()
     workers = []
@@ -414,27 +514,150 @@ def optimized_batch_insert(schema, table, data_generator, batch_size=1000, num_w
         t.daemon = True
         t.start()
         workers.append(t)
+    governor = get_memory_governor()
+
+    def enqueue(rows):
+        nbytes = governor.acquire(sum(estimate_row_bytes(r) for r in rows))
+        try:
+            data_queue.put((rows, nbytes), timeout=30)
+        except Exception:
+            governor.release(nbytes)
+            raise
+
     batch_buf = []
+    started = time.perf_counter()
     try:
+        fetch_start = time.perf_counter()
         for batch in data_generator:
+            stats["fetch_time"] += time.perf_counter() - fetch_start
             for row in batch:
                 if isinstance(row, dict) and 'error' not in row:
                     batch_buf.append(row)
                 if len(batch_buf) >= batch_size:
-                    data_queue.put(batch_buf.copy(), timeout=30)
-                    batch_buf.clear()
+                    # Hand the list itself to the workers instead of copying it.
+                    enqueue(batch_buf)
+                    batch_buf = []
+            fetch_start = time.perf_counter()
+        stats["fetch_time"] += time.perf_counter() - fetch_start
         if batch_buf:
-            data_queue.put(batch_buf.copy(), timeout=30)
+            enqueue(batch_buf)
         data_queue.join()
     finally:
         stop_event.set()
+        # Return the budget held by batches no worker will pick up any more.
+        while True:
+            try:
+                leftover = data_queue.get_nowait()
+            except queue.Empty:
+                break
+            if leftover is not None:
+                governor.release(leftover[1])
+            data_queue.task_done()
         for _ in workers:
             data_queue.put(None)
         for t in workers:
             t.join()
     logger.info(f"✅ INSERTED: {stats['total_inserted']:,} rows")
+    if metrics is not None:
+        metrics.update({
+            "rows": stats["total_inserted"],
+            "bytes": stats["total_bytes"],
+            "fetch_time": round(stats["fetch_time"], 3),
+            "sanitize_time": round(stats["sanitize_time"], 3),
+            "insert_time": round(stats["insert_time"], 3),
+            "commit_time": round(stats["commit_time"], 3),
+            "load_time": round(time.perf_counter() - started, 3),
+            "batch_size": batch_size,
+            "workers": num_workers,
+            "row_fallbacks": stats["row_fallbacks"],
+        })
+        if LOAD_DIGEST_ENABLED:
+            metrics.update({
+                "digest_time": round(stats["digest_time"], 3),
+                "load_digest": stats["digest"].hexdigest(),
+                "digest_rows": stats["digest"].rows,
+            })
     return stats['total_inserted']
 
+# ─────────────────────── SMALL-TABLE BUNDLES ───────────────────────
+class BundleTooLarge(RuntimeError):
+    """A bundle fetched more rows than its cap (the statistics it was planned from were stale)."""
+
+
+def migrate_table_bundle(
+    source_type: str,
+    source_schema: str,
+    target_schema: str,
+    tables: List[str],
+    batch_size: int = 1000,
+    max_rows: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Copy several small tables over one DB2 connection in a single transaction.
+    Returns rows inserted per table. Any failure rolls the whole bundle back and
+    re-raises, so the caller can fall back to loading the tables one by one; so does
+    fetching more than `max_rows` rows in total (BundleTooLarge), which keeps a table
+    with stale statistics from turning the bundle into one huge transaction.
+    """
+    if source_type.lower() == 'oracle':
+        from services.oracle_service import fetch_table_data_generator as fetch_data
+    else:
+        from services.sql_service import fetch_table_data_generator as fetch_data
+
+    conn_raw = get_db2_connection_fast()
+    # The cached connection is shared with everything else on this thread: put its
+    # autocommit mode back the way it was afterwards.
+    previous_autocommit = ibm_db.autocommit(conn_raw)
+    ibm_db.autocommit(conn_raw, ibm_db.SQL_AUTOCOMMIT_OFF)
+    cursor = DBI_Connection(conn_raw).cursor()
+    governor = get_memory_governor()
+    counts = {}
+    fetched = 0
+    try:
+        for table in tables:
+            column_info = get_table_column_info(target_schema, table)
+            if not column_info:
+                raise RuntimeError(f"No column info for {target_schema}.{table}")
+            column_names = [col['column_name'].upper() for col in column_info]
+            col_types = {col['column_name'].upper(): col['data_type'] for col in column_info}
+            col_lengths = {col['column_name'].upper(): col.get('length') for col in column_info}
+            placeholders = ', '.join(['?' for _ in column_names])
+            col_names_str = ', '.join([f'"{c}"' for c in column_names])
+            insert_sql = f'INSERT INTO "{target_schema.upper()}"."{table.upper()}" ({col_names_str}) VALUES ({placeholders})'
+
+            inserted = 0
+            for batch in fetch_data(source_schema, table, batch_size=batch_size):
+                if batch and isinstance(batch[0], dict) and 'error' in batch[0]:
+                    raise RuntimeError(batch[0]['error'])
+                fetched += len(batch)
+                if max_rows is not None and fetched > max_rows:
+                    raise BundleTooLarge(f"bundle exceeded {max_rows:,} rows at {table}")
+                nbytes = governor.acquire(sum(estimate_row_bytes(r) for r in batch))
+                try:
+                    rows = [
+                        tuple(improved_sanitize_value(row.get(col), col_types[col], col_lengths[col]) for col in column_names)
+                        for row in batch
+                    ]
+                    if rows:
+                        cursor.executemany(insert_sql, rows)
+                        inserted += len(rows)
+                finally:
+                    governor.release(nbytes)
+            counts[table] = inserted
+        ibm_db.commit(conn_raw)
+        logger.info(f"📦 BUNDLE: {len(tables)} tables, {sum(counts.values()):,} rows committed")
+        return counts
+    except Exception:
+        ibm_db.rollback(conn_raw)
+        raise
+    finally:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+        ibm_db.autocommit(conn_raw, previous_autocommit)
+
+
 # ─────────────────────── IMPROVED TABLE MIGRATION ───────────────────────
 def improved_table_migration(
     source_type: str,
@@ -520,30 +743,39 @@ def get_table_row_count(schema: str, table: str) -> int:
     except Exception:
         return 0
 
+def db2_column_spec(col: Dict[str, Any], source_type: str) -> Optional[Tuple[str, str, bool]]:
+    """(column name, DB2 type, NOT NULL) for one source metadata entry, or None if unusable."""
+    col_name = col.get("column_name")
+    data_type = col.get("data_type")
+    if not col_name or not data_type:
+        return None
+    if source_type.lower() == "oracle":
+        length = col.get("data_length")
+        precision = col.get("data_precision")
+        scale = col.get("data_scale")
+        nullable = col.get("nullable", "Y")
+        db2_type = oracle_to_db2_type(data_type, length, precision, scale)
+    elif source_type.lower() == "sql":
+        length = col.get("character_maximum_length")
+        precision = col.get("numeric_precision")
+        scale = col.get("numeric_scale")
+        nullable = col.get("is_nullable", "YES")
+        db2_type = sql_to_db2_type(data_type, length, precision, scale)
+    else:
+        return None
+    return col_name.upper(), db2_type, nullable in ["N", "NO", "NOT NULL"]
+
+
 def generate_table_ddl_db2(schema: str, table: str, metadata: List[Dict[str, Any]], source_type: str) -> str:
     col_defs = []
     for col in metadata:
         try:
-            col_name = col.get("column_name")
-            data_type = col.get("data_type")
-            if not col_name or not data_type:
-                continue
-            if source_type.lower() == "oracle":
-                length = col.get("data_length")
-                precision = col.get("data_precision")
-                scale = col.get("data_scale")
-                nullable = col.get("nullable", "Y")
-                db2_type = oracle_to_db2_type(data_type, length, precision, scale)
-            elif source_type.lower() == "sql":
-                length = col.get("character_maximum_length")
-                precision = col.get("numeric_precision")
-                scale = col.get("numeric_scale")
-                nullable = col.get("is_nullable", "YES")
-                db2_type = sql_to_db2_type(data_type, length, precision, scale)
-            else:
+            spec = db2_column_spec(col, source_type)
+            if not spec:
                 continue
-            nullable_str = "NOT NULL" if nullable in ["N", "NO", "NOT NULL"] else ""
-            col_defs.append(f'"{col_name.upper()}" {db2_type} {nullable_str}'.strip())
+            col_name, db2_type, not_null = spec
+            nullable_str = "NOT NULL" if not_null else ""
+            col_defs.append(f'"{col_name}" {db2_type} {nullable_str}'.strip())
         except:
             continue
     return f'CREATE TABLE "{schema.upper()}"."{table.upper()}" (\n  ' + ",\n  ".join(col_defs) + "\n)"
@@ -561,6 +793,7 @@ def execute_db2_ddl(ddl: str, expect_result: bool = False):
             return result
 
         dbi_conn.commit()
+        get_target_catalog().apply_ddl(ddl)
         return True
     except Exception as e:
         logger.error(f"[❌ DB2 EXEC ERROR]\nDDL: {ddl}\nERROR: {e}")
@@ -588,15 +821,167 @@ def create_table_parallel_worker(table_info: Tuple[str, str, List[Dict[str, Any]
         results[table] = f"error: {str(e)}"
 
 
+# ─────────────────────── BATCHED DDL ───────────────────────
+DDL_BATCH_SIZE = int(os.getenv("DB2_DDL_BATCH_SIZE", "50"))
+DDL_USE_COMPOUND = os.getenv("DB2_DDL_COMPOUND", "1") == "1"
+
+
+def _compound_ddl(ddls: List[str]) -> str:
+    body = "\n".join(
+        "  EXECUTE IMMEDIATE '{}';".format(ddl.strip().rstrip(";").replace("'", "''")) for ddl in ddls
+    )
+    return f"BEGIN\n{body}\nEND"
+
+
+def execute_ddl_batch(ddls: List[str]) -> List[Tuple[bool, Optional[str]]]:
+    """
+    Execute a group of DDL statements on one connection and return (ok, error) per statement.
+
+    The group is first sent as a single compound statement and committed once. If that
+    fails, it is rolled back and replayed statement by statement in the original order,
+    so every statement gets its own result and later ones still run; the replay is
+    committed once at the end.
+    """
+    if not ddls:
+        return []
+    conn = get_db2_connection_fast()
+    catalog = get_target_catalog()
+
+    if DDL_USE_COMPOUND and len(ddls) > 1:
+        try:
+            ibm_db.exec_immediate(conn, _compound_ddl(ddls))
+            ibm_db.commit(conn)
+            for ddl in ddls:
+                catalog.apply_ddl(ddl)
+            return [(True, None)] * len(ddls)
+        except Exception as e:
+            ibm_db.rollback(conn)
+            logger.warning(f"⚠️ Compound DDL batch of {len(ddls)} failed, replaying one by one: {e}")
+
+    results = []
+    for ddl in ddls:
+        try:
+            ibm_db.exec_immediate(conn, ddl.strip().rstrip(";"))
+            results.append((True, None))
+        except Exception as e:
+            # DB2 only undoes the failing statement; earlier ones in the unit of work stay.
+            results.append((False, ibm_db.stmt_errmsg() or str(e)))
+    try:
+        ibm_db.commit(conn)
+    except Exception as e:
+        ibm_db.rollback(conn)
+        return [(False, f"commit failed: {e}")] * len(ddls)
+    for ddl, (ok, _) in zip(ddls, results):
+        if ok:
+            catalog.apply_ddl(ddl)
+    return results
+
+
+def create_db2_sequences(schema: str, ddls: Dict[str, str], batch_size: int = DDL_BATCH_SIZE) -> Dict[str, Dict[str, Any]]:
+    """
+    Create sequences (name -> CREATE SEQUENCE DDL) in `schema`. Existing sequences are read
+    with one catalog query and skipped; the rest are created in batches of `batch_size`
+    through `execute_ddl_batch`. Returns name -> {"status": created|exists|failed, "error"}.
+    """
+    cache = get_conversion_cache()
+    existing = get_target_catalog().reload_sequences(schema)
+    results: Dict[str, Dict[str, Any]] = {}
+    missing = []
+    for name, ddl in ddls.items():
+        if name.upper() in existing:
+            # "unchanged": created by an earlier run from the same definition
+            results[name] = {"status": "exists", "error": None, "unchanged": cache.unchanged("sequence", schema, name, ddl)}
+        else:
+            missing.append((name, ddl))
+
+    for start in range(0, len(missing), max(1, batch_size)):
+        chunk = missing[start:start + max(1, batch_size)]
+        try:
+            outcomes = execute_ddl_batch([ddl for _, ddl in chunk])
+        except Exception as e:
+            outcomes = [(False, str(e))] * len(chunk)
+        for (name, _), (ok, error) in zip(chunk, outcomes):
+            results[name] = {"status": "created" if ok else "failed", "error": error}
+        try:
+            cache.record_many("sequence", schema, [(n, d, ok, err) for (n, d), (ok, err) in zip(chunk, outcomes)])
+        except Exception as e:
+            logger.warning(f"⚠️ Could not record sequence outcomes in the conversion cache: {e}")
+
+    created = sum(1 for r in results.values() if r["status"] == "created")
+    logger.info(
+        f"🔢 Sequences {schema}: {created} created, {len(ddls) - len(missing)} already present, "
+        f"{len(missing) - created} failed"
+    )
+    return results
+
+
+# ─────────────────────── ERROR CLASSIFICATION ───────────────────────
+# Deadlock/lock timeout, resource unavailable, system rollback, communication and reroute errors.
+TRANSIENT_SQLCODES = {-911, -913, -904, -1040, -1224, -1229, -30080, -30081, -30108}
+TRANSIENT_SQLSTATES = {"40001", "40003", "57011", "57019", "57033", "08001", "08003", "08S01", "HYT00"}
+CONNECTION_SQLCODES = {-1224, -30080, -30081, -30108}
+
+_SQLCODE_RE = re.compile(r"SQLCODE\s*=\s*(-?\d+)|\bSQL(\d{4,5})N\b", re.IGNORECASE)
+_SQLSTATE_RE = re.compile(r"SQLSTATE\s*=\s*(\w{5})", re.IGNORECASE)
+
+
+def parse_db2_error(message: Optional[str]) -> Tuple[Optional[int], Optional[str]]:
+    """(SQLCODE, SQLSTATE) from a CLI driver error message, where present."""
+    message = message or ""
+    code = state = None
+    match = _SQLCODE_RE.search(message)
+    if match:
+        code = int(match.group(1)) if match.group(1) else -int(match.group(2))
+    match = _SQLSTATE_RE.search(message)
+    if match:
+        state = match.group(1).upper()
+    return code, state
+
+
+def is_connection_error(message: Optional[str]) -> bool:
+    code, state = parse_db2_error(message)
+    return code in CONNECTION_SQLCODES or bool(state and state.startswith("08"))
+
+
+def is_transient_db2_error(message: Optional[str]) -> bool:
+    """Whether retrying the same statement can succeed; syntax, authorization and object errors can't."""
+    code, state = parse_db2_error(message)
+    if code is None and state is None:
+        return "timeout" in (message or "").lower()
+    return code in TRANSIENT_SQLCODES or state in TRANSIENT_SQLSTATES or is_connection_error(message)
+
+
 def create_tables_multithreaded(schema: str, table_metadata_list: List[Tuple[str, List[Dict[str, Any]], str]], max_workers: int = None) -> Dict[str, str]:
-    """Parallel table creation"""
+    """Table creation in batches of DDL_BATCH_SIZE statements, batches running in parallel"""
     max_workers = max_workers or min(6, multiprocessing.cpu_count())
     results = {}
-    tasks = [(schema, tbl, meta, source) for tbl, meta, source in table_metadata_list]
+    pending = []
+    for table, metadata, source_type in table_metadata_list:
+        try:
+            if check_table_exists(schema, table):
+                results[table] = "exists"
+                continue
+            pending.append((table, generate_table_ddl_db2(schema, table, metadata, source_type)))
+        except Exception as e:
+            results[table] = f"error: {str(e)}"
+
+    batches = [pending[i:i + DDL_BATCH_SIZE] for i in range(0, len(pending), DDL_BATCH_SIZE)]
+
+    def run_batch(batch):
+        for (table, ddl), (ok, error) in zip(batch, execute_ddl_batch([ddl for _, ddl in batch])):
+            results[table] = "created" if ok else "failed"
+            if not ok:
+                logger.error(f"[❌ DB2 EXEC ERROR]\nDDL: {ddl}\nERROR: {error}")
+
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(create_table_parallel_worker, task, results): task for task in tasks}
+        futures = {executor.submit(run_batch, batch): batch for batch in batches}
         for future in as_completed(futures):
-            pass  # all result recording is done inside the worker
+            try:
+                future.result()
+            except Exception as e:
+                for table, _ in futures[future]:
+                    results.setdefault(table, f"error: {str(e)}")
+    logger.info(f"🔨 Created {sum(1 for r in results.values() if r == 'created')} tables in {len(batches)} DDL batches")
     return results
 # ─────────────────────── UPDATED FUNCTION ALIASES ───────────────────────
 def maximum_speed_batch_insert(schema: str, table: str, data_generator, batch_size: int = 1000, num_workers: int = None) -> int:
@@ -684,8 +1069,14 @@ def cleanup_connections():
     logger.info("🧹 All connections cleaned up")
 
 def close_thread_connection():
-    """Close thread connection - compatibility"""
-    pass
+    """Drop the calling thread's cached connection (e.g. after a communication error)."""
+    with _cache_lock:
+        conn = _connection_cache.pop(threading.get_ident(), None)
+    if conn is not None:
+        try:
+            ibm_db.close(conn)
+        except:
+            pass
 
 def check_schema_exists(schema: str) -> bool:
     """Check if schema exists"""
@@ -802,7 +1193,7 @@ def improved_table_migration_with_monitoring(
             return result
 
         # Ensure safe table creation only if it doesn't exist
-        if check_table_exists(target_schema, table, skip_cache=True):
+        if check_table_exists(target_schema, table):
             logger.info(f"✅ Table already exists: {target_schema}.{table}, skipping DDL")
         else:
             ddl = generate_table_ddl_db2(target_schema, table, metadata, source_type)
@@ -843,6 +1234,8 @@ def improved_table_migration_with_monitoring(
         result["duration"] = time.time() - start_time
         logger.error(f"❌ MIGRATION FAILED: {table} - {e}")
 
+    result["retries"] = retry_count
+
     # Retry logic — prevent infinite loops
     if result["status"] == "failed" and "Incomplete" in result.get("error", ""):
         final_count = get_table_row_count(target_schema, table)
@@ -888,9 +1281,11 @@ def _run_migration_worker(source_type, source_schema, target_schema, table, resu
             from services.sql_service import fetch_table_data_generator as fetch_data
 
         data_generator = fetch_data(source_schema, table, batch_size=1000)
-        total_rows = optimized_batch_insert(target_schema, table, data_generator, num_workers=10)
+        metrics = {}
+        total_rows = optimized_batch_insert(target_schema, table, data_generator, num_workers=10, metrics=metrics)
 
         # Store result directly
+        result["metrics"] = metrics
         result["_background_rows"] = total_rows
         result["_background_complete"] = True
 
@@ -0,0 +1,529 @@
+# services/full_schema_pipeline.py
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Generator, List, Optional
+
+from services.migration_dag import MigrationDAG, DagNodeResult
+from services.schema_migrator import OptimizedSchemaMigrator, MigrationStatus, TableMigrationResult, TableLoadPlan
+from services.schema_diff import SchemaDiff, compute_schema_diff, apply_table_changes
+from services.sequence_oracle_service import convert_sequences_from_oracle, list_sequences_from_oracle
+from services.sequence_sql_service import convert_sequences_from_mssql, list_sequences_from_mssql
+from services.trigger_oracle_service import (
+    fetch_trigger_tables as fetch_oracle_trigger_tables,
+    fetch_trigger_definitions as fetch_oracle_trigger_definitions,
+    migrate_trigger as migrate_oracle_trigger,
+)
+from services.trigger_sql_service import (
+    fetch_trigger_tables as fetch_sql_trigger_tables,
+    fetch_trigger_definitions as fetch_sql_trigger_definitions,
+    migrate_trigger as migrate_sql_trigger,
+)
+from services.index_oracle_service import get_index_ddl as oracle_index_ddl
+from services.index_sql_service import get_index_ddl as sql_index_ddl
+from services.index_converter import convert_index_cached, build_table_indexes
+from services.view_oracle_service import (
+    get_view_ddl as oracle_view_ddl,
+    fetch_view_dependencies as oracle_view_dependencies,
+)
+from services.view_sql_service import (
+    get_view_ddl as sql_view_ddl,
+    fetch_view_dependencies as sql_view_dependencies,
+)
+from services.view_converter import (
+    convert_view_cached,
+    execute_view_ddl,
+    extract_table_names_from_ddl,
+    view_dependencies,
+)
+from services.db2_service import check_table_exists, cleanup_connections, clear_table_cache
+from utils.credentials_store import load_credentials, get_target_credentials
+from utils.couchdb_helpers import save_migration_status_to_couchdb
+from utils.ddl_writer import save_ddl, begin_ddl_run, flush_ddl_writes
+
+logger = logging.getLogger(__name__)
+
+TABLES_CREATED = "schema:tables"
+SEQUENCES = "schema:sequences"
+
+_STATUS_KEYS = {"table": "tables", "sequence": "sequences", "trigger": "triggers", "index": "indexes", "view": "views"}
+
+
+def _table_key(table: str) -> str:
+    return f"table:{table.upper()}"
+
+
+def _is_oracle(source_type: str) -> bool:
+    return source_type.lower() == "oracle"
+
+
+def _record(transaction_id: Optional[str], schema: str, obj_type: str, name: str, success: bool):
+    if not transaction_id:
+        return
+    update = {"success": [name], "error": []} if success else {"success": [], "error": [name]}
+    save_migration_status_to_couchdb(transaction_id, {obj_type: update}, schema)
+
+
+# ─────────────────────── DISCOVERY ───────────────────────
+def _discover_source_objects(migrator: OptimizedSchemaMigrator, source_type: str, schema: str) -> Dict[str, Any]:
+    """Fetch table metadata, triggers (with their DDL), indexes and views from the source concurrently."""
+    oracle = _is_oracle(source_type)
+    fetchers = {
+        "tables": lambda: migrator.prepare_tables(source_type, schema, schema),
+        "triggers": lambda: (fetch_oracle_trigger_tables if oracle else fetch_sql_trigger_tables)(schema),
+        "trigger_ddls": lambda: (fetch_oracle_trigger_definitions if oracle else fetch_sql_trigger_definitions)(schema),
+        "indexes": lambda: (oracle_index_ddl if oracle else sql_index_ddl)(schema),
+        "views": lambda: (oracle_view_ddl if oracle else sql_view_ddl)(schema),
+        "view_deps": lambda: (oracle_view_dependencies if oracle else sql_view_dependencies)(schema),
+    }
+    found, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=len(fetchers)) as executor:
+        futures = {name: executor.submit(func) for name, func in fetchers.items()}
+        for name, future in futures.items():
+            try:
+                found[name] = future.result()
+            except Exception as e:
+                logger.error(f"Failed to fetch {name} for {schema}: {e}")
+                errors[name] = str(e)
+    return {"found": found, "errors": errors}
+
+
+# ─────────────────────── STAGES ───────────────────────
+def _migrate_sequences(source_type: str, schema: str, transaction_id: Optional[str]) -> Dict[str, Any]:
+    source_creds = load_credentials(source_type)
+    target_creds = get_target_credentials()
+    if _is_oracle(source_type):
+        sequences = convert_sequences_from_oracle(source_creds, target_creds, schema, transaction_id)
+    else:
+        sequences = convert_sequences_from_mssql(source_creds, target_creds, schema, transaction_id)
+
+    if not sequences:
+        return {"status": "success", "messages": ["⚠️ No sequences found to migrate."]}
+
+    messages = []
+    for seq in sequences:
+        name = seq.get("sequence", "<unknown>")
+        if seq.get("skipped_existing") or seq.get("skipped"):
+            messages.append(f"⚠️ Sequence '{name}' already exists — skipped.")
+        elif seq.get("created_in_db2") or seq.get("created"):
+            messages.append(f"✅ Sequence '{name}' created.")
+        else:
+            messages.append(f"❌ Failed to create sequence '{name}': {seq.get('error', 'Unknown error')}")
+    return {"status": "success", "messages": messages}
+
+
+def _table_outcome(result: TableMigrationResult) -> Dict[str, Any]:
+    table = result.table
+    if result.status == "success":
+        message = f"✅ {table}: {result.status} - rows migrated: {result.rows_migrated}"
+    else:
+        message = f"❌ {table}: {result.error}"
+    return {"status": result.status, "messages": [message], "result": result}
+
+
+def _migrate_table_data(
+    migrator: OptimizedSchemaMigrator,
+    source_type: str,
+    schema: str,
+    table: str,
+    migration_status: MigrationStatus,
+    transaction_id: Optional[str],
+) -> Dict[str, Any]:
+    return _table_outcome(migrator.migrate_table(
+        source_type, schema, schema, table,
+        migration_status=migration_status,
+        transaction_id=transaction_id,
+    ))
+
+
+def _migrate_bundle(
+    migrator: OptimizedSchemaMigrator,
+    source_type: str,
+    schema: str,
+    tables: List[str],
+    migration_status: MigrationStatus,
+    transaction_id: Optional[str],
+    bundle_results: Dict[str, TableMigrationResult],
+) -> Dict[str, Any]:
+    results = migrator.migrate_table_bundle(
+        source_type, schema, schema, tables,
+        migration_status=migration_status,
+        transaction_id=transaction_id,
+    )
+    bundle_results.update(results)
+    rows = sum(r.rows_migrated for r in results.values())
+    return {"status": "success", "messages": [f"📦 Loaded bundle of {len(tables)} small tables ({rows:,} rows)"]}
+
+
+def _migrate_trigger(
+    source_type: str,
+    schema: str,
+    trigger: str,
+    transaction_id: Optional[str],
+    ddl: Optional[str] = None,
+) -> Dict[str, Any]:
+    migrate_func = migrate_oracle_trigger if _is_oracle(source_type) else migrate_sql_trigger
+    result = migrate_func(schema, trigger, schema, transaction_id, ddl=ddl)
+    name = result.get("trigger", trigger)
+    status = result.get("status")
+    reason = result.get("reason", "")
+    if status == "success":
+        message = f"✅ Trigger migrated: {name}"
+    elif status == "skipped":
+        message = f"⚠️ Trigger skipped: {name} - {reason}"
+    else:
+        message = f"❌ Trigger failed: {name} - {reason}"
+    return {"status": status, "messages": [message]}
+
+
+def _index_groups(indexes: List[Dict[str, Any]], diff: Optional[SchemaDiff] = None) -> Dict[str, tuple]:
+    """DAG key -> (table, indexes on it); with a `diff`, only indexes missing on the target."""
+    groups: Dict[str, tuple] = {}
+    create = set(diff.indexes.create) if diff is not None else None
+    for idx in indexes:
+        if create is not None and (idx.get("name") or "").upper() not in create:
+            continue
+        table = (idx.get("table") or "").upper() or None
+        groups.setdefault(f"index:{table or '*'}", (table, []))[1].append(idx)
+    return groups
+
+
+def _build_indexes(schema: str, table: Optional[str], idxs: List[Dict[str, Any]], transaction_id: Optional[str]) -> Dict[str, Any]:
+    """Convert and build every index of one table once its data is loaded."""
+    messages, succeeded, failed, to_build = [], [], [], []
+    for idx in idxs:
+        name, ddl = idx.get("name"), idx.get("source_ddl")
+        if not ddl:
+            failed.append(name)
+            messages.append(f"⚠️ Index '{name}' skipped: No DDL.")
+            continue
+        converted = convert_index_cached(ddl)
+        save_ddl("source", schema, name, ddl, object_type="index")
+        save_ddl("target", schema, name, converted, object_type="index")
+        to_build.append((name, converted))
+
+    if to_build and table and not check_table_exists(schema, table):
+        failed.extend(name for name, _ in to_build)
+        messages.extend(f"⚠️ Index '{name}' skipped: Table '{table}' not found." for name, _ in to_build)
+        to_build = []
+
+    timings = {}
+    for build in build_table_indexes(schema, table or "", to_build) if to_build else []:
+        timings[build["name"]] = build["duration"]
+        if build["status"] == "success":
+            succeeded.append(build["name"])
+            if build.get("cached"):
+                messages.append(f"⏭️ Index '{build['name']}' unchanged since last run.")
+            else:
+                messages.append(f"✅ Index '{build['name']}' built in {build['duration']:.2f}s.")
+        else:
+            failed.append(build["name"])
+            messages.append(f"❌ Failed to build index '{build['name']}': {build['error']}")
+
+    if transaction_id:
+        save_migration_status_to_couchdb(transaction_id, {"indexes": {"success": succeeded, "error": failed}}, schema)
+    return {
+        "status": "success" if not failed else "failed",
+        "messages": messages,
+        "built": len(succeeded),
+        "total": len(idxs),
+        "timings": timings,
+    }
+
+
+def _migrate_view(schema: str, view: Dict[str, Any], transaction_id: Optional[str]) -> Dict[str, Any]:
+    name = view.get("name")
+    ddl = view.get("source_ddl")
+
+    if not ddl:
+        _record(transaction_id, schema, "views", name, False)
+        return {"status": "skipped", "messages": [f"⚠️ View '{name}' skipped: No DDL"]}
+
+    # Views this one selects from are upstream DAG nodes, so they exist by now.
+    missing_tables = sorted({
+        tbl for sch, tbl in extract_table_names_from_ddl(ddl) if not check_table_exists(sch or schema, tbl)
+    })
+    if missing_tables:
+        _record(transaction_id, schema, "views", name, False)
+        return {"status": "skipped", "messages": [f"⚠️ View '{name}' skipped: Missing referenced tables {missing_tables}"]}
+
+    converted = convert_view_cached(ddl)
+    save_ddl("source", schema, name, ddl, object_type="view")
+    save_ddl("target", schema, name, converted, object_type="view")
+
+    if execute_view_ddl(converted, schema, view_name=name):
+        _record(transaction_id, schema, "views", name, True)
+        return {"status": "success", "messages": [f"✅ View '{name}' migrated."]}
+    _record(transaction_id, schema, "views", name, False)
+    return {"status": "failed", "messages": [f"❌ Failed to execute view '{name}'."]}
+
+
+# ─────────────────────── PIPELINE ───────────────────────
+def build_full_schema_dag(
+    migrator: OptimizedSchemaMigrator,
+    source_type: str,
+    schema: str,
+    metadata_map: Dict[str, List[Dict]],
+    triggers: Dict[str, str],
+    indexes: List[Dict[str, Any]],
+    views: List[Dict[str, Any]],
+    migration_status: MigrationStatus,
+    transaction_id: Optional[str] = None,
+    limits: Optional[Dict[str, int]] = None,
+    load_plan: Optional[TableLoadPlan] = None,
+    diff: Optional[SchemaDiff] = None,
+    trigger_ddls: Optional[Dict[str, str]] = None,
+    view_deps: Optional[Dict[str, Any]] = None,
+) -> MigrationDAG:
+    """
+    Build the dependency graph for a full-schema migration:
+    tables DDL → table data → (indexes, triggers); sequences → triggers; tables DDL → views.
+    Small tables from `load_plan` load through a shared bundle node; empty ones skip the data path.
+    With a `diff`, only triggers, indexes, views and sequences missing on the target are created.
+    `trigger_ddls` holds prefetched trigger definitions; triggers not in it are fetched one by one.
+    Views depend on the views they reference (parsed DDL plus `view_deps` from the source catalog).
+    """
+    dag = MigrationDAG(limits)
+    load_plan = load_plan or TableLoadPlan(large=list(metadata_map))
+    if diff is not None:
+        create_triggers, create_views = set(diff.triggers.create), set(diff.views.create)
+        triggers = {t: tbl for t, tbl in triggers.items() if t.upper() in create_triggers}
+        views = [v for v in views if (v.get("name") or "").upper() in create_views]
+
+    dag.add(TABLES_CREATED, "schema", lambda: migrator.create_tables(schema, metadata_map, source_type))
+    if diff is not None and not diff.sequences.create:
+        dag.add(SEQUENCES, "sequence", lambda: {"status": "success", "messages": ["⏭️ Sequences unchanged."]})
+    else:
+        dag.add(SEQUENCES, "sequence", lambda: _migrate_sequences(source_type, schema, transaction_id))
+
+    for table in load_plan.empty:
+        dag.add(
+            _table_key(table), "table",
+            lambda t=table: _table_outcome(
+                migrator.migrate_empty_table(t, migration_status, transaction_id, source_type, schema, schema)
+            ),
+            deps=[TABLES_CREATED],
+        )
+
+    bundle_results: Dict[str, TableMigrationResult] = {}
+    for n, bundle in enumerate(load_plan.bundles):
+        bundle_key = f"bundle:{n}"
+        dag.add(
+            bundle_key, "bundle",
+            lambda b=bundle: _migrate_bundle(migrator, source_type, schema, b, migration_status, transaction_id, bundle_results),
+            deps=[TABLES_CREATED],
+        )
+        for table in bundle:
+            dag.add(_table_key(table), "table", lambda t=table: _table_outcome(bundle_results[t]), deps=[bundle_key])
+
+    for table in load_plan.large:
+        dag.add(
+            _table_key(table), "table",
+            lambda t=table: _migrate_table_data(migrator, source_type, schema, t, migration_status, transaction_id),
+            deps=[TABLES_CREATED],
+        )
+
+    for trigger, table in triggers.items():
+        dag.add(
+            f"trigger:{trigger}", "trigger",
+            lambda t=trigger: _migrate_trigger(
+                source_type, schema, t, transaction_id, (trigger_ddls or {}).get(t.upper())
+            ),
+            deps=[TABLES_CREATED, SEQUENCES, _table_key(table or "")],
+        )
+
+    # One node per table: its indexes are built after its data is loaded (nothing to maintain
+    # during inserts), and tables build in parallel up to the index pool / DB2 build cap.
+    for key, (table, idxs) in _index_groups(indexes, diff).items():
+        dag.add(
+            key, "index",
+            lambda t=table, i=idxs: _build_indexes(schema, t, i, transaction_id),
+            deps=[TABLES_CREATED, _table_key(table)] if table else [TABLES_CREATED],
+        )
+
+    # A view waits for the views it selects from; independent views run in parallel.
+    # Keys use the upper-case names view_dependencies returns, so mixed-case views link up.
+    depends_on = view_dependencies(views, view_deps)
+    for view in views:
+        name = (view.get("name") or "").upper()
+        dag.add(
+            f"view:{name}", "view",
+            lambda v=view: _migrate_view(schema, v, transaction_id),
+            deps=[TABLES_CREATED] + [f"view:{d}" for d in sorted(depends_on.get(name, ()))],
+        )
+
+    return dag
+
+
+def _list_sequences(source_type: str, schema: str) -> List[str]:
+    list_sequences = list_sequences_from_oracle if _is_oracle(source_type) else list_sequences_from_mssql
+    try:
+        return list_sequences(load_credentials(source_type), schema)
+    except Exception as e:
+        logger.warning(f"Could not list sequences for {schema}: {e}")
+        return []
+
+
+def _schema_diff(source_type: str, schema: str, metadata_map: Dict[str, List[Dict]], found: Dict[str, Any]) -> SchemaDiff:
+    return compute_schema_diff(
+        source_type, schema, metadata_map,
+        sequences=_list_sequences(source_type, schema),
+        triggers=found.get("triggers") or {},
+        indexes=found.get("indexes") or [],
+        views=found.get("views") or [],
+    )
+
+
+def preview_schema_diff(source_type: str, schema: str, migrator: Optional[OptimizedSchemaMigrator] = None) -> Dict[str, Any]:
+    """What an incremental run would create, alter and reload, without changing anything."""
+    discovery = _discover_source_objects(migrator or OptimizedSchemaMigrator(), source_type, schema)
+    found, errors = discovery["found"], discovery["errors"]
+    if "tables" in errors:
+        raise RuntimeError(f"Table metadata fetch failed: {errors['tables']}")
+    _, metadata_map = found["tables"]
+    return {**_schema_diff(source_type, schema, metadata_map, found).summary(), "errors": errors}
+
+
+def _apply_schema_diff(
+    source_type: str,
+    schema: str,
+    metadata_map: Dict[str, List[Dict]],
+    found: Dict[str, Any],
+) -> Generator[str, None, SchemaDiff]:
+    """Diff the source against DB2, run the ALTERs and empty the tables to reload."""
+    yield "🧮 Comparing source with target..."
+    diff = _schema_diff(source_type, schema, metadata_map, found)
+    yield (
+        f"🧮 Tables: {len(diff.tables_with('create'))} new, {len(diff.tables_with('alter'))} changed, "
+        f"{len(diff.tables_with('skip'))} unchanged; {len(diff.reload)} to load. "
+        f"New: {len(diff.sequences.create)} sequences, {len(diff.triggers.create)} triggers, "
+        f"{len(diff.indexes.create)} indexes, {len(diff.views.create)} views"
+    )
+    for table in diff.tables_with("conflict"):
+        changes = ", ".join(f"{c.column} {c.target_type} → {c.expected_type}" for c in diff.tables[table].changes if c.action == "conflict")
+        yield f"⚠️ {table}: incompatible column changes ({changes}) — left as is"
+
+    for table, outcome in apply_table_changes(diff).items():
+        if outcome.startswith("failed"):
+            if table in diff.reload:
+                diff.reload.remove(table)
+            yield f"❌ {table}: {outcome}"
+        elif outcome == "altered":
+            yield f"🔧 {table}: {len(diff.tables[table].changes)} column changes applied"
+    return diff
+
+
+def _describe(outcome: DagNodeResult) -> List[str]:
+    if outcome.status == "done":
+        if outcome.kind == "schema":
+            created = outcome.result or {}
+            failed = [t for t, s in created.items() if s not in ("created", "exists")]
+            return [f"✅ Tables created ({len(created) - len(failed)}/{len(created)})"]
+        return list((outcome.result or {}).get("messages", []))
+    if outcome.status == "failed":
+        return [f"❌ {outcome.key} failed: {outcome.error}"]
+    return [f"⚠️ {outcome.key} skipped: {outcome.error}"]
+
+
+def run_full_schema_migration(
+    source_type: str,
+    schema: str,
+    transaction_id: Optional[str] = None,
+    limits: Optional[Dict[str, int]] = None,
+    migrator: Optional[OptimizedSchemaMigrator] = None,
+    incremental: bool = False,
+) -> Generator[str, None, None]:
+    """
+    Migrate tables, sequences, triggers, indexes and views as one dependency-aware pipeline.
+    `incremental` diffs the source against the DB2 catalog first and only creates, alters
+    and reloads what differs.
+    """
+    migrator = migrator or OptimizedSchemaMigrator()
+    migration_status = MigrationStatus(schema)
+
+    try:
+        for side in ("source", "target"):
+            begin_ddl_run(side, schema)
+        clear_table_cache(schema)
+        yield "🔍 Discovering source objects..."
+        discovery = _discover_source_objects(migrator, source_type, schema)
+        found, errors = discovery["found"], discovery["errors"]
+        if "tables" in errors:
+            yield f"❌ Table metadata fetch failed: {errors['tables']}"
+            return
+        for name, error in errors.items():
+            yield f"❌ Error fetching {name}: {error}"
+
+        all_tables, metadata_map = found["tables"]
+        diff = None
+        load_tables = list(metadata_map)
+        if incremental:
+            diff = yield from _apply_schema_diff(source_type, schema, metadata_map, found)
+            load_tables = diff.reload
+        load_plan = migrator.plan_table_loads(source_type, schema, load_tables)
+        if load_plan.empty or load_plan.bundles:
+            yield (
+                f"🗂️ {len(load_plan.empty)} empty tables (DDL only), "
+                f"{sum(len(b) for b in load_plan.bundles)} small tables in {len(load_plan.bundles)} bundles"
+            )
+        dag = build_full_schema_dag(
+            migrator, source_type, schema, metadata_map,
+            triggers=found.get("triggers") or {},
+            indexes=found.get("indexes") or [],
+            views=found.get("views") or [],
+            migration_status=migration_status,
+            transaction_id=transaction_id,
+            limits=limits,
+            load_plan=load_plan,
+            diff=diff,
+            trigger_ddls=found.get("trigger_ddls"),
+            view_deps=found.get("view_deps"),
+        )
+
+        index_groups = _index_groups(found.get("indexes") or [], diff)
+        totals = {kind: dag.count(kind) for kind in ("table", "trigger", "index", "view")}
+        totals["index"] = sum(len(idxs) for _, idxs in index_groups.values())
+        yield (
+            f"✅ Discovered {totals['table']} tables, {totals['trigger']} triggers, "
+            f"{totals['index']} indexes, {totals['view']} views"
+        )
+
+        done = {kind: 0 for kind in totals}
+        succeeded = {kind: 0 for kind in totals}
+        for outcome in dag.run():
+            for message in _describe(outcome):
+                yield message
+
+            if outcome.kind == "index":
+                result = outcome.result or {}
+                succeeded["index"] += result.get("built", 0)
+                if outcome.status != "done":
+                    names = [i.get("name") for i in index_groups.get(outcome.key, (None, []))[1]]
+                    if transaction_id and names:
+                        save_migration_status_to_couchdb(transaction_id, {"indexes": {"success": [], "error": names}}, schema)
+                continue
+            if outcome.kind not in done:
+                continue
+            done[outcome.kind] += 1
+            status = (outcome.result or {}).get("status") if outcome.status == "done" else outcome.status
+            if status == "success":
+                succeeded[outcome.kind] += 1
+            elif outcome.status != "done" and outcome.kind != "table":
+                _record(transaction_id, schema, _STATUS_KEYS[outcome.kind], outcome.key.split(":", 1)[1], False)
+
+            if outcome.kind == "table":
+                if outcome.status != "done":
+                    migration_status.store_error("tables", outcome.key.split(":", 1)[1])
+                    if transaction_id:
+                        save_migration_status_to_couchdb(transaction_id, migration_status.status, migration_status.schema)
+                progress = done["table"] / totals["table"] * 100 if totals["table"] else 100.0
+                yield f"📈 Progress: {progress:.1f}% ({done['table']}/{totals['table']})"
+
+        for kind, label in (("table", "Table"), ("trigger", "Trigger"), ("index", "Index"), ("view", "View")):
+            yield f"🎉 {label} migration completed: {succeeded[kind]} / {totals[kind]} migrated."
+
+    except Exception as e:
+        logger.error(f"Full schema pipeline error: {e}")
+        yield f"❌ Full schema migration error: {e}"
+    finally:
+        flush_ddl_writes()
+        cleanup_connections()
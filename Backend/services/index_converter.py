@@ -1,8 +1,65 @@
 # services/index_converter.py
+import logging
+import os
 import re
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
 import ibm_db
-from utils.credentials_store import load_credentials
-from services.db2_service import check_table_exists
+from services.db2_service import (
+    check_table_exists,
+    get_db2_connection_fast,
+    close_thread_connection,
+    is_connection_error,
+    is_transient_db2_error,
+)
+from services.db2_catalog import get_target_catalog
+from services.sql_rewrite import GROUP, NAME, NUMBER, Match, Opt, Rewriter, Rule, Until
+from services.conversion_cache import get_conversion_cache
+
+logger = logging.getLogger(__name__)
+
+# Index builds are sort-heavy on the DB2 side; cap how many run at once across all callers.
+INDEX_BUILD_CONCURRENCY = max(1, int(os.getenv("DB2_INDEX_BUILD_CONCURRENCY", "4")))
+_build_slots = threading.BoundedSemaphore(INDEX_BUILD_CONCURRENCY)
+# Bump when the index conversion output changes, so cached conversions are redone.
+INDEX_CONVERTER_VERSION = "2"
+
+
+def _qualified(m: Match, schema: int, name: int) -> str:
+    quoted = f'"{m.name(name).upper()}"'
+    return f'"{m.name(schema).upper()}".{quoted}' if m.matched(schema) else quoted
+
+
+def _index_header(m: Match) -> str:
+    unique_kw = "UNIQUE " if m.matched(1) else ""
+    return f"CREATE {unique_kw}INDEX {_qualified(m, 4, 5)} ON {_qualified(m, 7, 8)}"
+
+
+_INDEX_RULES = Rewriter([
+    # Quote schema/table/index: CREATE [UNIQUE] [NON]CLUSTERED INDEX [schema.]index_name ON [schema.]table
+    Rule(
+        ["CREATE", Opt("UNIQUE"), Opt({"CLUSTERED", "NONCLUSTERED"}), "INDEX",
+         Opt(NAME, "."), NAME, "ON", Opt(NAME, "."), NAME],
+        _index_header,
+    ),
+    # --- Oracle-specific clauses ---
+    Rule(["TABLESPACE", NAME]),
+    Rule(["STORAGE", GROUP]),
+    Rule(["PCTFREE", NUMBER]),
+    Rule(["INITRANS", NUMBER]),
+    Rule(["MAXTRANS", NUMBER]),
+    Rule(["NOPARALLEL"]),
+    Rule(["PARALLEL", Opt(NUMBER)]),
+    Rule(["COMPUTE", "STATISTICS"]),
+    # --- SQL Server specific clauses ---
+    Rule(["INCLUDE", GROUP]),
+    Rule(["WITH", GROUP]),
+    Rule(["ON", NAME, "FILEGROUP", NAME]),
+    Rule(["ON", NAME, Opt(GROUP)], depth=0),  # ON [PRIMARY] / partition scheme
+    Rule(["WHERE", Until(";")], depth=0),  # Filtered index not supported
+], collapse=True, brackets_to_quotes=True)
 
 
 def convert_index_ddl_to_db2(source_ddl: str) -> str:
@@ -15,53 +72,18 @@ def convert_index_ddl_to_db2(source_ddl: str) -> str:
 
     Returns: Safe DB2 DDL string.
     """
+    ddl = _INDEX_RULES.rewrite(source_ddl)
+    ddl = ddl.rstrip(" ;")
 
-    ddl = source_ddl.strip()
-
-    # --- Remove Oracle-specific clauses ---
-    ddl = re.sub(r"TABLESPACE\s+\"?[^\s\"]+\"?", "", ddl, flags=re.IGNORECASE)
-    ddl = re.sub(r"STORAGE\s*\([^)]+\)", "", ddl, flags=re.IGNORECASE)
-    ddl = re.sub(r"PCTFREE\s+\d+", "", ddl, flags=re.IGNORECASE)
-    ddl = re.sub(r"INITRANS\s+\d+", "", ddl, flags=re.IGNORECASE)
-    ddl = re.sub(r"MAXTRANS\s+\d+", "", ddl, flags=re.IGNORECASE)
-    ddl = re.sub(r"NOPARALLEL", "", ddl, flags=re.IGNORECASE)
-    ddl = re.sub(r"PARALLEL", "", ddl, flags=re.IGNORECASE)
-    ddl = re.sub(r"COMPUTE STATISTICS", "", ddl, flags=re.IGNORECASE)
-
-    # --- Remove SQL Server specific clauses ---
-    ddl = re.sub(r"\[([^\]]+)\]", r'"\1"', ddl)  # Convert [col] → "col"
-    ddl = re.sub(r"INCLUDE\s*\([^)]+\)", "", ddl, flags=re.IGNORECASE)
-    ddl = re.sub(r"WITH\s*\([^)]+\)", "", ddl, flags=re.IGNORECASE)
-    ddl = re.sub(r"ON\s+\[?[A-Za-z0-9_]+\]?\s+FILEGROUP\s+[A-Za-z0-9_\[\]]+", "", ddl, flags=re.IGNORECASE)
-    ddl = re.sub(r"WHERE\s+.+$", "", ddl, flags=re.IGNORECASE)  # Filtered index not supported
-
-    # --- Normalize whitespace ---
-    ddl = re.sub(r"\s+", " ", ddl).strip()
-
-    # --- Ensure CREATE INDEX format has quoted schema/table/index ---
-    # Match CREATE [UNIQUE] INDEX index_name ON schema.table(cols)
-    pattern = re.compile(
-        r"CREATE\s+(UNIQUE\s+)?INDEX\s+\"?([\w\d_]+)\"?\s+ON\s+\"?([\w\d_]+)\"?\.\"?([\w\d_]+)\"?",
-        re.IGNORECASE
-    )
-    m = pattern.search(ddl)
-    if m:
-        unique_kw = "UNIQUE " if m.group(1) else ""
-        index_name = m.group(2).upper()
-        schema_name = m.group(3).upper()
-        table_name = m.group(4).upper()
-
-        # Keep the rest of the statement after ON schema.table
-        rest = ddl[m.end():].strip()
-
-        # Safe DB2 DDL
-        ddl = f'CREATE {unique_kw}INDEX "{index_name}" ON "{schema_name}"."{table_name}" {rest}'
+    # --- Add semicolon ---
+    return ddl + ";"
 
-    # --- Add semicolon if missing ---
-    if not ddl.endswith(";"):
-        ddl += ";"
 
-    return ddl
+def convert_index_cached(source_ddl: str) -> str:
+    """`convert_index_ddl_to_db2` through the conversion cache."""
+    return get_conversion_cache().convert(
+        "index", INDEX_CONVERTER_VERSION, source_ddl, lambda: convert_index_ddl_to_db2(source_ddl)
+    )
 
 
 def execute_index_ddl(ddl: str, schema: str, conn=None) -> bool:
@@ -80,31 +102,26 @@ def execute_index_ddl(ddl: str, schema: str, conn=None) -> bool:
         target_schema = match.group(1).upper()
         target_table = match.group(2).upper()
 
-        if not check_table_exists(target_schema, target_table, skip_cache=True):
+        if not check_table_exists(target_schema, target_table):
             print(f"❌ Skipped: Table {target_schema}.{target_table} does not exist in DB2.")
             return False
 
-        # --- Open connection if not provided ---
-        local_conn = None
-        if conn is None:
-            creds = load_credentials("db2", is_target=True)
-            dsn = (
-                f"DATABASE={creds['database']};HOSTNAME={creds['host']};PORT={creds['port']};"
-                f"UID={creds['username']};PWD={creds['password']};SECURITY={creds.get('security', 'SSL')};"
-                f"CHARSET=UTF-8;AUTOCOMMIT=0;CONNECTTIMEOUT=30;QUERYTIMEOUT=300;CURRENTSCHEMA={schema};"
-            )
-            local_conn = ibm_db.connect(dsn, "", "")
-            conn_to_use = local_conn
-        else:
-            conn_to_use = conn
+        # --- Use the thread's pooled connection if none is provided ---
+        pooled = conn is None
+        conn_to_use = get_db2_connection_fast() if pooled else conn
 
         print(f"[DEBUG] Executing Index DDL:\n{ddl}")
-        ibm_db.exec_immediate(conn_to_use, ddl)
+        try:
+            ibm_db.exec_immediate(conn_to_use, ddl)
+        except Exception:
+            if pooled:
+                ibm_db.rollback(conn_to_use)
+            raise
 
-        if local_conn:
-            ibm_db.commit(local_conn)
-            ibm_db.close(local_conn)
+        if pooled:
+            ibm_db.commit(conn_to_use)
 
+        get_target_catalog().apply_ddl(ddl, default_schema=schema)
         return True
 
     except Exception as e:
@@ -120,13 +137,7 @@ def bulk_execute_index_ddls(ddls: list, schema: str) -> dict:
     results = {"success": [], "error": []}
 
     try:
-        creds = load_credentials("db2", is_target=True)
-        dsn = (
-            f"DATABASE={creds['database']};HOSTNAME={creds['host']};PORT={creds['port']};"
-            f"UID={creds['username']};PWD={creds['password']};SECURITY={creds.get('security', 'SSL')};"
-            f"CHARSET=UTF-8;AUTOCOMMIT=0;CONNECTTIMEOUT=30;QUERYTIMEOUT=300;CURRENTSCHEMA={schema};"
-        )
-        conn = ibm_db.connect(dsn, "", "")
+        conn = get_db2_connection_fast()
 
         for name, ddl in ddls:
             if execute_index_ddl(ddl, schema, conn=conn):
@@ -135,9 +146,66 @@ def bulk_execute_index_ddls(ddls: list, schema: str) -> dict:
                 results["error"].append(name)
 
         ibm_db.commit(conn)
-        ibm_db.close(conn)
 
     except Exception as e:
         print(f"❌ Bulk index migration connection error: {e}")
 
     return results
+
+
+def build_table_indexes(schema: str, table: str, ddls: List[Tuple[str, str]], max_retries: int = 2) -> List[Dict[str, Any]]:
+    """
+    Build the indexes of one (already loaded) table on a pooled connection, one after the
+    other, holding one of the INDEX_BUILD_CONCURRENCY build slots for the whole table.
+    Transient DB2 errors are retried; returns {name, status, duration, error} per index.
+    Indexes that exist and were last built from the same DDL are not rebuilt ("cached": True).
+    """
+    catalog = get_target_catalog()
+    cache = get_conversion_cache()
+    results = []
+    pending = []
+    for name, ddl in ddls:
+        if cache.unchanged("index", schema, name, ddl) and catalog.has_index(schema, name):
+            results.append({"name": name, "status": "success", "duration": 0.0, "error": None, "cached": True})
+        else:
+            pending.append((name, ddl))
+    if not pending:
+        return results
+
+    built = []
+    with _build_slots:
+        for name, ddl in pending:
+            statement = ddl.strip().rstrip(";")
+            started = time.time()
+            error = None
+            for attempt in range(1, max_retries + 1):
+                try:
+                    conn = get_db2_connection_fast()
+                    ibm_db.exec_immediate(conn, statement)
+                    ibm_db.commit(conn)
+                    catalog.apply_ddl(statement, default_schema=schema)
+                    error = None
+                    break
+                except Exception as e:
+                    error = ibm_db.stmt_errmsg() or str(e)
+                    try:
+                        ibm_db.rollback(conn)
+                    except Exception:
+                        pass
+                    if is_connection_error(error):
+                        close_thread_connection()
+                    if not is_transient_db2_error(error) or attempt == max_retries:
+                        break
+                    time.sleep(2 ** attempt)
+            duration = round(time.time() - started, 3)
+            if error:
+                logger.error(f"❌ Index {name} on {schema}.{table} failed after {duration:.2f}s: {error}")
+            else:
+                logger.info(f"🗂️ Index {name} on {schema}.{table} built in {duration:.2f}s")
+            results.append({"name": name, "status": "failed" if error else "success", "duration": duration, "error": error})
+            built.append((name, ddl, not error, error))
+    try:
+        cache.record_many("index", schema, built)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not record index outcomes in the conversion cache: {e}")
+    return results
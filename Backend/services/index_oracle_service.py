@@ -31,13 +31,13 @@ def get_index_ddl(schema: str, index_names=None):
             params[bind_key] = name.upper()
         filter_clause = f"AND index_name IN ({', '.join(bind_names)})"
         sql = f"""
-            SELECT index_name, dbms_metadata.get_ddl('INDEX', index_name, owner) AS ddl
+            SELECT index_name, table_name, dbms_metadata.get_ddl('INDEX', index_name, owner) AS ddl
             FROM all_indexes
             WHERE owner = :schema {filter_clause}
         """
         cursor.execute(sql, params)
         result = []
-        for name, ddl_lob in cursor.fetchall():
+        for name, table_name, ddl_lob in cursor.fetchall():
             ddl = None
             # Convert LOB to string safely
             if ddl_lob is not None:
@@ -48,7 +48,7 @@ def get_index_ddl(schema: str, index_names=None):
                     ddl = str(ddl_lob)
             else:
                 ddl = ''
-            result.append({"name": name, "source_ddl": ddl})
+            result.append({"name": name, "table": table_name, "source_ddl": ddl})
         return result
     finally:
         cursor.close()
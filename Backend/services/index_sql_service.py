@@ -36,7 +36,7 @@ def get_index_ddl(schema: str, index_names=None):
             return []
         placeholders = ','.join('?' for _ in index_names)
         sql = f"""
-            SELECT i.name, i.type_desc,
+            SELECT i.name, OBJECT_NAME(i.object_id) AS table_name, i.type_desc,
             (SELECT definition FROM sys.index_columns ic
              JOIN sys.columns c ON ic.column_id = c.column_id AND ic.object_id = c.object_id
              WHERE ic.object_id = i.object_id FOR XML PATH(''), TYPE).value('.', 'NVARCHAR(MAX)') AS definition
@@ -46,9 +46,9 @@ def get_index_ddl(schema: str, index_names=None):
         params = index_names + [schema]
         cursor.execute(sql, params)
         result = []
-        for name, type_desc, definition in cursor.fetchall():
+        for name, table_name, type_desc, definition in cursor.fetchall():
             ddl = f"CREATE {type_desc} INDEX [{name}] ON [{schema}] ... "  # construct properly from definition; adjust as needed
-            result.append({"name": name, "source_ddl": ddl})
+            result.append({"name": name, "table": table_name, "source_ddl": ddl})
         return result
     finally:
         cursor.close()
@@ -0,0 +1,94 @@
+# services/memory_governor.py
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Process-wide cap on the estimated size of row batches waiting to be inserted.
+MEMORY_BUDGET_BYTES = int(float(os.getenv("MIGRATION_MEMORY_BUDGET_MB", "512")) * 1024 * 1024)
+# How long a producer may stay blocked before the load is considered stuck.
+MEMORY_WAIT_TIMEOUT = float(os.getenv("MIGRATION_MEMORY_WAIT_TIMEOUT", "300"))
+
+
+class MemoryGovernor:
+    """
+    Byte-counting semaphore shared by every table load in the process.
+
+    Producers `acquire` the estimated size of a batch before queueing it and insert
+    workers `release` it once the batch is written (or dropped). When the budget is
+    used up producers block, so fetching slows down to the speed DB2 accepts rows.
+    A single batch larger than the whole budget is still let through when nothing
+    else is in flight, otherwise it could never be loaded.
+    """
+
+    def __init__(self, budget_bytes: int = MEMORY_BUDGET_BYTES):
+        self.budget_bytes = max(1, budget_bytes)
+        self._cond = threading.Condition()
+        self._in_use = 0
+        self._peak = 0
+        self._batches = 0
+        self._waiting = 0
+        self._blocked_seconds = 0.0
+
+    def acquire(self, nbytes: int, timeout: Optional[float] = MEMORY_WAIT_TIMEOUT) -> int:
+        nbytes = max(0, int(nbytes))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if self._in_use and self._in_use + nbytes > self.budget_bytes:
+                self._waiting += 1
+                started = time.monotonic()
+                try:
+                    while self._in_use and self._in_use + nbytes > self.budget_bytes:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            raise TimeoutError(
+                                f"Memory budget exhausted: {self._in_use:,}/{self.budget_bytes:,} bytes in flight "
+                                f"for more than {timeout}s"
+                            )
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+                    self._blocked_seconds += time.monotonic() - started
+            self._in_use += nbytes
+            self._batches += 1
+            self._peak = max(self._peak, self._in_use)
+        return nbytes
+
+    def release(self, nbytes: int):
+        with self._cond:
+            self._in_use = max(0, self._in_use - max(0, int(nbytes)))
+            self._batches = max(0, self._batches - 1)
+            self._cond.notify_all()
+
+    @property
+    def in_use(self) -> int:
+        with self._cond:
+            return self._in_use
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "budget_bytes": self.budget_bytes,
+                "in_use_bytes": self._in_use,
+                "utilization": round(self._in_use / self.budget_bytes, 4),
+                "peak_bytes": self._peak,
+                "batches_in_flight": self._batches,
+                "blocked_producers": self._waiting,
+                "blocked_seconds_total": round(self._blocked_seconds, 3),
+            }
+
+
+_governor: Optional[MemoryGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_memory_governor() -> MemoryGovernor:
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = MemoryGovernor()
+            logger.info(f"🧮 Loader memory budget: {_governor.budget_bytes / (1024 * 1024):.0f} MiB")
+        return _governor
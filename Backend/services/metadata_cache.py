@@ -0,0 +1,185 @@
+# services/metadata_cache.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+METADATA_CACHE_PATH = os.getenv(
+    "SOURCE_METADATA_CACHE_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "metadata_cache.sqlite3"),
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS table_metadata (
+    source_key  TEXT NOT NULL,
+    schema_name TEXT NOT NULL,
+    table_name  TEXT NOT NULL,
+    ddl_time    TEXT,
+    columns     TEXT NOT NULL,
+    PRIMARY KEY (source_key, schema_name, table_name)
+);
+"""
+
+Columns = List[Dict[str, Any]]
+
+
+def source_key(source_type: str, creds: Optional[Dict[str, Any]]) -> str:
+    """Identify a source connection without its password."""
+    creds = creds or {}
+    target = creds.get("database") or creds.get("service_name") or creds.get("sid") or ""
+    return f"{source_type.lower()}://{creds.get('username', '')}@{creds.get('host', '')}:{creds.get('port', '')}/{target}"
+
+
+class _Flight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SourceMetadataCache:
+    """
+    On-disk column metadata per (source connection, schema, table).
+
+    Each table row carries the source's last DDL time. Validating a schema costs one
+    DDL-time query; only tables whose DDL time changed (or that are new) are re-read
+    from the source. Concurrent callers for the same schema share a single load
+    instead of serialising on a global lock.
+    """
+
+    def __init__(self, path: str = METADATA_CACHE_PATH):
+        self.path = path
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._db_lock:
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+        self._lock = threading.Lock()
+        self._memory: Dict[tuple, Dict[str, Columns]] = {}
+        self._flights: Dict[tuple, _Flight] = {}
+
+    def get_schema(
+        self,
+        key: str,
+        schema: str,
+        load_ddl_times: Callable[[], Dict[str, str]],
+        load_columns: Callable[[Optional[List[str]]], Dict[str, Columns]],
+        refresh: bool = False,
+    ) -> Dict[str, Columns]:
+        """
+        Column metadata of every table in the schema. Served from memory unless `refresh`
+        is set or this process hasn't seen the schema yet, in which case the disk copy is
+        validated against `load_ddl_times()` and stale tables re-read with `load_columns(tables)`
+        (`None` means the whole schema).
+        """
+        cache_key = (key, schema.upper())
+        if not refresh:
+            with self._lock:
+                cached = self._memory.get(cache_key)
+            if cached is not None:
+                return cached
+        return self._single_flight(cache_key, lambda: self._validate(cache_key, load_ddl_times, load_columns))
+
+    def invalidate(self, key: str, schema: str, tables: Optional[Iterable[str]] = None):
+        schema = schema.upper()
+        with self._lock:
+            self._memory.pop((key, schema), None)
+        with self._db_lock:
+            if tables is None:
+                self._conn.execute(
+                    "DELETE FROM table_metadata WHERE source_key = ? AND schema_name = ?", (key, schema)
+                )
+            else:
+                self._conn.executemany(
+                    "DELETE FROM table_metadata WHERE source_key = ? AND schema_name = ? AND table_name = ?",
+                    [(key, schema, t.upper()) for t in tables],
+                )
+            self._conn.commit()
+
+    def _single_flight(self, cache_key: tuple, load: Callable[[], Dict[str, Columns]]) -> Dict[str, Columns]:
+        with self._lock:
+            flight = self._flights.get(cache_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[cache_key] = _Flight()
+        if leader:
+            try:
+                flight.result = load()
+                with self._lock:
+                    self._memory[cache_key] = flight.result
+            except BaseException as e:
+                flight.error = e
+            finally:
+                with self._lock:
+                    self._flights.pop(cache_key, None)
+                flight.event.set()
+        else:
+            flight.event.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def _read_disk(self, key: str, schema: str) -> Dict[str, tuple]:
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT table_name, ddl_time, columns FROM table_metadata WHERE source_key = ? AND schema_name = ?",
+                (key, schema),
+            ).fetchall()
+        return {name: (ddl_time, columns) for name, ddl_time, columns in rows}
+
+    def _validate(self, cache_key: tuple, load_ddl_times, load_columns) -> Dict[str, Columns]:
+        key, schema = cache_key
+        ddl_times = {t.upper(): v for t, v in load_ddl_times().items()}
+        on_disk = self._read_disk(key, schema)
+
+        stale = [t for t, v in ddl_times.items() if t not in on_disk or on_disk[t][0] != v]
+        dropped = [t for t in on_disk if t not in ddl_times]
+
+        fresh: Dict[str, Columns] = {}
+        if stale:
+            # Past half the schema one full query is cheaper than filtered ones.
+            whole = len(stale) > len(ddl_times) // 2
+            loaded = load_columns(None if whole else stale)
+            fresh = {t.upper(): cols for t, cols in loaded.items() if t.upper() in ddl_times}
+
+        with self._db_lock:
+            if dropped:
+                self._conn.executemany(
+                    "DELETE FROM table_metadata WHERE source_key = ? AND schema_name = ? AND table_name = ?",
+                    [(key, schema, t) for t in dropped],
+                )
+            if fresh:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO table_metadata (source_key, schema_name, table_name, ddl_time, columns) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(key, schema, t, ddl_times[t], json.dumps(cols, default=str)) for t, cols in fresh.items()],
+                )
+            self._conn.commit()
+
+        metadata = {}
+        for table in ddl_times:
+            if table in fresh:
+                metadata[table] = fresh[table]
+            elif table in on_disk and table not in stale:
+                metadata[table] = json.loads(on_disk[table][1])
+        logger.info(
+            f"📋 Metadata cache {schema}: {len(metadata)} tables "
+            f"({len(fresh)} re-read, {len(metadata) - len(fresh)} from cache, {len(dropped)} dropped)"
+        )
+        return metadata
+
+
+_cache: Optional[SourceMetadataCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_metadata_cache() -> SourceMetadataCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SourceMetadataCache()
+        return _cache
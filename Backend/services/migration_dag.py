@@ -0,0 +1,151 @@
+# services/migration_dag.py
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Default number of objects of each kind that may run at the same time.
+DEFAULT_CONCURRENCY = {
+    "schema": 1,
+    "table": 12,
+    "bundle": 4,
+    "sequence": 1,
+    "trigger": 32,
+    "index": 8,
+    "view": 8,
+}
+FALLBACK_CONCURRENCY = 4
+
+
+@dataclass
+class DagNode:
+    key: str
+    kind: str
+    func: Callable[[], Any]
+    deps: Set[str] = field(default_factory=set)
+
+
+@dataclass
+class DagNodeResult:
+    key: str
+    kind: str
+    status: str  # 'done', 'failed', 'skipped'
+    result: Any = None
+    error: Optional[str] = None
+    duration: float = 0.0
+
+
+class MigrationDAG:
+    """
+    Runs migration objects as soon as their dependencies are done.
+
+    Every node belongs to a kind (table, index, view, ...) and each kind gets its
+    own thread pool, so the concurrency limit applies per object type. A node whose
+    function raises is 'failed'; nodes depending on a failed or skipped node are
+    'skipped'. Dependencies on keys that were never added are treated as satisfied.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        self.limits = {**DEFAULT_CONCURRENCY, **{k: v for k, v in (limits or {}).items() if v}}
+        self._nodes: Dict[str, DagNode] = {}
+
+    def add(self, key: str, kind: str, func: Callable[[], Any], deps: Iterable[str] = ()) -> DagNode:
+        if key in self._nodes:
+            raise ValueError(f"Duplicate DAG node: {key}")
+        node = DagNode(key=key, kind=kind, func=func, deps=set(deps))
+        self._nodes[key] = node
+        return node
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._nodes
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def count(self, kind: str) -> int:
+        return sum(1 for n in self._nodes.values() if n.kind == kind)
+
+    def run(self) -> Generator[DagNodeResult, None, None]:
+        """Execute the graph, yielding each node's result as soon as it completes."""
+        remaining: Dict[str, Set[str]] = {}
+        dependents: Dict[str, List[str]] = {key: [] for key in self._nodes}
+        for key, node in self._nodes.items():
+            known = {d for d in node.deps if d in self._nodes and d != key}
+            unknown = node.deps - known - {key}
+            if unknown:
+                logger.debug(f"DAG node {key}: ignoring unknown dependencies {sorted(unknown)}")
+            remaining[key] = known
+            for dep in known:
+                dependents[dep].append(key)
+
+        ready = deque(key for key, deps in remaining.items() if not deps)
+        unsatisfied: Set[str] = set()
+        finished: Set[str] = set()
+        running = {}
+        starts: Dict[str, float] = {}
+
+        kinds = {node.kind for node in self._nodes.values()}
+        pools = {
+            kind: ThreadPoolExecutor(
+                max_workers=max(1, self.limits.get(kind, FALLBACK_CONCURRENCY)),
+                thread_name_prefix=f"dag-{kind}",
+            )
+            for kind in kinds
+        }
+
+        def release(key: str):
+            finished.add(key)
+            for child in dependents[key]:
+                remaining[child].discard(key)
+                if not remaining[child]:
+                    ready.append(child)
+
+        completed_normally = False
+        try:
+            while ready or running:
+                while ready:
+                    key = ready.popleft()
+                    node = self._nodes[key]
+                    blocked = node.deps & unsatisfied
+                    if blocked:
+                        unsatisfied.add(key)
+                        release(key)
+                        yield DagNodeResult(
+                            key=key,
+                            kind=node.kind,
+                            status="skipped",
+                            error=f"Dependency not completed: {', '.join(sorted(blocked))}",
+                        )
+                        continue
+                    starts[key] = time.time()
+                    running[pools[node.kind].submit(node.func)] = key
+
+                if not running:
+                    break
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = running.pop(future)
+                    node = self._nodes[key]
+                    duration = time.time() - starts[key]
+                    try:
+                        outcome = DagNodeResult(key, node.kind, "done", result=future.result(), duration=duration)
+                    except Exception as e:
+                        logger.error(f"DAG node {key} failed: {e}")
+                        unsatisfied.add(key)
+                        outcome = DagNodeResult(key, node.kind, "failed", error=str(e), duration=duration)
+                    release(key)
+                    yield outcome
+
+            # Anything left was never released, which only happens with a cycle.
+            for key, node in self._nodes.items():
+                if key not in finished:
+                    yield DagNodeResult(key=key, kind=node.kind, status="skipped", error="Dependency cycle detected")
+            completed_normally = True
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=completed_normally, cancel_futures=not completed_normally)
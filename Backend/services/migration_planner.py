@@ -0,0 +1,198 @@
+# services/migration_planner.py
+import heapq
+import logging
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+from services.schema_migrator import OptimizedSchemaMigrator, MigrationConfig
+from services.throughput_history import get_throughput_history
+
+logger = logging.getLogger(__name__)
+
+# Fallback throughput used when neither the table nor its schema has load history.
+DEFAULT_ROWS_PER_SECOND = float(os.getenv("MIGRATION_PLAN_ROWS_PER_SEC", "5000"))
+DEFAULT_LOB_ROWS_PER_SECOND = float(os.getenv("MIGRATION_PLAN_LOB_ROWS_PER_SEC", "500"))
+DEFAULT_BYTES_PER_SECOND = float(os.getenv("MIGRATION_PLAN_BYTES_PER_SEC", str(5 * 1024 * 1024)))
+
+# Mirrors the loader in db2_service: 1000-row fetches fanned out to 10 insert workers,
+# with the row-count monitor polling every 10 seconds.
+FETCH_BATCH_SIZE = 1000
+INSERT_WORKERS = 10
+MONITOR_POLL_SECONDS = 10
+TABLE_DDL_SECONDS = 0.5
+
+LOB_TYPES = {
+    "CLOB", "NCLOB", "BLOB", "LONG", "LONG RAW", "BFILE", "XMLTYPE",
+    "TEXT", "NTEXT", "IMAGE", "XML",
+}
+
+
+@dataclass
+class TablePlan:
+    table: str
+    rows: Optional[int]
+    estimated_bytes: Optional[int]
+    columns: int
+    lob_columns: List[str]
+    strategy: Dict[str, Any]
+    estimated_seconds: float
+    stats_source: str
+    throughput_source: str
+
+
+def _lob_columns(source_type: str, metadata: List[Dict[str, Any]]) -> List[str]:
+    lobs = []
+    for col in metadata:
+        data_type = (col.get("data_type") or "").upper()
+        if data_type in LOB_TYPES:
+            lobs.append(col.get("column_name"))
+        elif source_type.lower() != "oracle" and data_type in ("VARCHAR", "NVARCHAR", "VARBINARY") \
+                and col.get("character_maximum_length") == -1:
+            lobs.append(col.get("column_name"))  # (MAX) columns
+    return lobs
+
+
+def _fetch_stats(source_type: str, schema: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        if source_type.lower() == "oracle":
+            from services.oracle_service import fetch_table_stats
+        else:
+            from services.sql_service import fetch_table_stats
+        return fetch_table_stats(schema)
+    except Exception as e:
+        logger.warning(f"⚠️ Source statistics unavailable for {schema}: {e}")
+        return {}
+
+
+def _exact_counts(source_type: str, schema: str, tables: List[str], workers: int) -> Dict[str, int]:
+    if source_type.lower() == "oracle":
+        from services.oracle_service import get_table_row_count
+    else:
+        from services.sql_service import get_table_row_count
+
+    def count(table):
+        try:
+            return table, get_table_row_count(schema, table)
+        except Exception as e:
+            logger.warning(f"⚠️ Row count failed for {table}: {e}")
+            return table, None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(executor.map(count, tables))
+
+
+def _history_throughput(source_type: str, schema: str):
+    try:
+        history = get_throughput_history()
+        return history.table_throughput(source_type, schema), history.schema_throughput(source_type, schema)
+    except Exception as e:
+        logger.warning(f"⚠️ Throughput history unavailable for {schema}: {e}")
+        return {}, None
+
+
+def estimate_table_seconds(rows: int, estimated_bytes: int, lob: bool, throughput: Optional[Dict[str, float]] = None) -> float:
+    """Predict load time for one table from rows/bytes and a rows/s, bytes/s throughput."""
+    if not rows:
+        return TABLE_DDL_SECONDS
+    throughput = throughput or {}
+    rows_per_sec = throughput.get("rows_per_sec") or (DEFAULT_LOB_ROWS_PER_SECOND if lob else DEFAULT_ROWS_PER_SECOND)
+    bytes_per_sec = throughput.get("bytes_per_sec") or DEFAULT_BYTES_PER_SECOND
+    load = max(rows / rows_per_sec, (estimated_bytes or 0) / bytes_per_sec)
+    # The monitor only notices completion on its next poll.
+    return TABLE_DDL_SECONDS + math.ceil(load / MONITOR_POLL_SECONDS) * MONITOR_POLL_SECONDS
+
+
+def schedule_makespan(durations: List[float], workers: int) -> float:
+    """Longest-processing-time-first estimate of wall time across `workers` parallel slots."""
+    if not durations:
+        return 0.0
+    slots = [0.0] * max(1, workers)
+    for duration in sorted(durations, reverse=True):
+        heapq.heapreplace(slots, slots[0] + duration)
+    return max(slots)
+
+
+def build_migration_plan(
+    source_type: str,
+    schema: str,
+    table_filter: Optional[List[str]] = None,
+    exact_counts: bool = False,
+    config: Optional[MigrationConfig] = None,
+) -> Dict[str, Any]:
+    """
+    Dry run of a schema migration: per-table volumes, the loader strategy and a predicted
+    duration. Reads source metadata and statistics only; nothing is written to DB2.
+    """
+    migrator = OptimizedSchemaMigrator(config)
+    workers = migrator.config.data_migration_workers
+
+    tables, metadata_map = migrator._get_all_metadata_parallel(source_type, schema, table_filter)
+    stats = _fetch_stats(source_type, schema)
+
+    missing = [t for t in tables if exact_counts or (stats.get(t.upper()) or {}).get("rows") is None]
+    counts = _exact_counts(source_type, schema, missing, migrator.config.table_creation_workers) if missing else {}
+    table_history, schema_history = _history_throughput(source_type, schema)
+
+    plans: List[TablePlan] = []
+    for table in sorted(tables):
+        metadata = metadata_map.get(table) or []
+        table_stats = stats.get(table.upper()) or {}
+        if table in counts and counts[table] is not None:
+            rows, stats_source = counts[table], "count"
+        else:
+            rows, stats_source = table_stats.get("rows"), ("statistics" if table_stats else "unknown")
+
+        avg_row_bytes = table_stats.get("avg_row_bytes") or 0
+        estimated_bytes = rows * avg_row_bytes if rows is not None and avg_row_bytes else table_stats.get("bytes")
+        lobs = _lob_columns(source_type, metadata)
+        # Prefer this table's own past runs, then the schema average, then the static defaults.
+        if table.upper() in table_history:
+            throughput, throughput_source = table_history[table.upper()], "table_history"
+        elif schema_history and not lobs:
+            throughput, throughput_source = schema_history, "schema_history"
+        else:
+            throughput, throughput_source = None, "default"
+        chunks = math.ceil(rows / FETCH_BATCH_SIZE) if rows else 0
+
+        strategy = {
+            # The loader has no DB2 LOAD path; every table goes through batched INSERTs.
+            "method": "DDL_ONLY" if not rows else ("BUNDLE" if rows <= migrator.config.small_table_rows else "INSERT"),
+            "chunked": chunks > 1,
+            "chunk_size": FETCH_BATCH_SIZE,
+            "chunks": chunks,
+            "insert_workers": INSERT_WORKERS if rows else 0,
+            "lob_lane": bool(lobs),
+        }
+        plans.append(TablePlan(
+            table=table,
+            rows=rows,
+            estimated_bytes=estimated_bytes,
+            columns=len(metadata),
+            lob_columns=lobs,
+            strategy=strategy,
+            estimated_seconds=round(estimate_table_seconds(rows or 0, estimated_bytes or 0, bool(lobs), throughput), 1),
+            stats_source=stats_source,
+            throughput_source=throughput_source,
+        ))
+
+    durations = [p.estimated_seconds for p in plans]
+    return {
+        "source_type": source_type,
+        "schema": schema.upper(),
+        "table_workers": workers,
+        "totals": {
+            "tables": len(plans),
+            "empty_tables": sum(1 for p in plans if not p.rows),
+            "lob_tables": sum(1 for p in plans if p.lob_columns),
+            "rows": sum(p.rows or 0 for p in plans),
+            "estimated_bytes": sum(p.estimated_bytes or 0 for p in plans),
+            "unknown_row_counts": sum(1 for p in plans if p.rows is None),
+            "tables_with_history": sum(1 for p in plans if p.throughput_source == "table_history"),
+        },
+        "estimated_duration_seconds": round(schedule_makespan(durations, workers), 1),
+        "serial_duration_seconds": round(sum(durations), 1),
+        "tables": [asdict(p) for p in plans],
+    }
@@ -2,10 +2,10 @@
 import logging
 import oracledb
 # oracledb.init_oracle_client(lib_dir=None)
-from typing import List, Dict, Any, Generator, Union
-import threading
+from typing import List, Dict, Any, Generator, Optional, Union
 from utils.credentials_store import load_credentials
 from utils.ddl_writer import save_ddl
+from services.metadata_cache import get_metadata_cache, source_key
 
 
 logging.basicConfig(level=logging.INFO)
@@ -93,50 +93,89 @@ def fetch_tables(schema: str) -> List[str]:
         conn.close()
 
 
-_metadata_cache = {}
-_cache_lock = threading.Lock()
+def _source_key() -> str:
+    return source_key("oracle", load_credentials("oracle"))
 
 
-def fetch_table_metadata(schema: str, table: str) -> List[Dict[str, Any]]:
+def fetch_schema_metadata(schema: str, refresh: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Columns of every MAXOBJECT table in the schema, from the on-disk metadata cache.
+    `refresh=True` re-validates the cache against ALL_OBJECTS.LAST_DDL_TIME.
+    """
     schema_up = schema.upper()
-    table_up = table.upper()
-    with _cache_lock:
-        if schema_up not in _metadata_cache:
-            _metadata_cache[schema_up] = _fetch_all_metadata_for_schema(schema_up)
-    return _metadata_cache[schema_up].get(table_up, [])
+    return get_metadata_cache().get_schema(
+        _source_key(), schema_up,
+        load_ddl_times=lambda: _fetch_ddl_times(schema_up),
+        load_columns=lambda tables: _fetch_all_metadata_for_schema(schema_up, tables),
+        refresh=refresh,
+    )
+
+
+def fetch_table_metadata(schema: str, table: str) -> List[Dict[str, Any]]:
+    return fetch_schema_metadata(schema).get(table.upper(), [])
+
+
+def _maxobject_tables_sql(schema: str) -> str:
+    return f"""
+        SELECT OBJECTNAME FROM {quote_identifier(schema)}.MAXOBJECT
+        WHERE UPPER(OBJECTNAME) IN (
+            SELECT UPPER(TABLE_NAME) FROM ALL_TABLES WHERE OWNER = '{schema}'
+        )
+    """
+
+
+def _fetch_ddl_times(schema: str) -> Dict[str, str]:
+    conn = get_oracle_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT o.OBJECT_NAME, TO_CHAR(o.LAST_DDL_TIME, 'YYYY-MM-DD HH24:MI:SS')
+            FROM ALL_OBJECTS o
+            WHERE o.OWNER = '{schema}' AND o.OBJECT_TYPE = 'TABLE'
+            AND o.OBJECT_NAME IN ({_maxobject_tables_sql(schema)})
+        """)
+        return {row[0]: row[1] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+        conn.close()
 
 
-def _fetch_all_metadata_for_schema(schema: str) -> dict:
+def _fetch_all_metadata_for_schema(schema: str, tables: Optional[List[str]] = None) -> dict:
     conn = get_oracle_connection()
     cursor = conn.cursor()
     metadata = {}
     try:
-        # Inject schema as a string, no bind variables for identifiers
-        sql = f"""
-            SELECT c.TABLE_NAME, c.COLUMN_NAME, c.DATA_TYPE, c.DATA_LENGTH, c.NULLABLE, c.DATA_PRECISION, c.DATA_SCALE, c.COLUMN_ID
-            FROM ALL_TAB_COLUMNS c
-            WHERE c.OWNER = '{schema}'
-            AND c.TABLE_NAME IN (
-                SELECT OBJECTNAME FROM {quote_identifier(schema)}.MAXOBJECT
-                WHERE UPPER(OBJECTNAME) IN (
-                    SELECT UPPER(TABLE_NAME) FROM ALL_TABLES WHERE OWNER = '{schema}'
-                )
-            )
-            ORDER BY c.TABLE_NAME, c.COLUMN_ID
-        """
-        cursor.execute(sql)
-        for row in cursor:
-            table = row[0]
-            metadata.setdefault(table, []).append({
-                "column_name": row[1],
-                "data_type": row[2],
-                "data_length": row[3],
-                "nullable": row[4],
-                "data_precision": row[5],
-                "data_scale": row[6]
-            })
+        if tables is None:
+            filters = [f"c.TABLE_NAME IN ({_maxobject_tables_sql(schema)})"]
+        else:
+            # Oracle caps IN lists at 1000 entries.
+            filters = [
+                "c.TABLE_NAME IN ({})".format(", ".join(f"'{t.upper()}'" for t in tables[i:i + 1000]))
+                for i in range(0, len(tables), 1000)
+            ]
+        for table_filter in filters:
+            # Inject schema as a string, no bind variables for identifiers
+            sql = f"""
+                SELECT c.TABLE_NAME, c.COLUMN_NAME, c.DATA_TYPE, c.DATA_LENGTH, c.NULLABLE, c.DATA_PRECISION, c.DATA_SCALE, c.COLUMN_ID
+                FROM ALL_TAB_COLUMNS c
+                WHERE c.OWNER = '{schema}'
+                AND {table_filter}
+                ORDER BY c.TABLE_NAME, c.COLUMN_ID
+            """
+            cursor.execute(sql)
+            for row in cursor:
+                table = row[0]
+                metadata.setdefault(table, []).append({
+                    "column_name": row[1],
+                    "data_type": row[2],
+                    "data_length": row[3],
+                    "nullable": row[4],
+                    "data_precision": row[5],
+                    "data_scale": row[6]
+                })
     except Exception as e:
         logger.error(f"Error fetching metadata for schema {schema}: {e}")
+        raise
     finally:
         cursor.close()
         conn.close()
@@ -148,13 +187,6 @@ def _fetch_all_metadata_for_schema(schema: str) -> dict:
 
 
 
-
-
-
-
-
-
-
 def get_table_count(schema: str, table: str) -> int:
     conn = get_oracle_connection()
     cursor = conn.cursor()
@@ -233,6 +265,57 @@ def get_table_row_count(schema: str, table: str) -> int:
     return get_table_count(schema, table)
 
 
+def fetch_table_stats(schema: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Optimizer statistics for every table in the schema from ALL_TABLES (one query).
+    Values are as fresh as the last DBMS_STATS run; tables never analyzed report rows=None.
+    """
+    conn = get_oracle_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT TABLE_NAME, NUM_ROWS, AVG_ROW_LEN, BLOCKS, LAST_ANALYZED
+            FROM ALL_TABLES
+            WHERE OWNER = '{schema.upper()}'
+        """)
+        stats = {}
+        for name, num_rows, avg_row_len, blocks, last_analyzed in cursor.fetchall():
+            rows = int(num_rows) if num_rows is not None else None
+            stats[name.upper()] = {
+                "rows": rows,
+                "avg_row_bytes": int(avg_row_len or 0),
+                "bytes": rows * int(avg_row_len or 0) if rows is not None else None,
+                "last_analyzed": last_analyzed.isoformat() if last_analyzed else None,
+            }
+        return stats
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def fetch_nonempty_tables(schema: str, tables: List[str], chunk_size: int = 100) -> set:
+    """Which of `tables` hold at least one row, probed with EXISTS in one UNION ALL query per chunk."""
+    if not tables:
+        return set()
+    conn = get_oracle_connection()
+    cursor = conn.cursor()
+    try:
+        found = set()
+        for i in range(0, len(tables), chunk_size):
+            chunk = tables[i:i + chunk_size]
+            sql = " UNION ALL ".join(
+                f"SELECT '{t.upper()}' FROM DUAL WHERE EXISTS "
+                f"(SELECT 1 FROM {quote_identifier(schema)}.{quote_identifier(t)})"
+                for t in chunk
+            )
+            cursor.execute(sql)
+            found.update(row[0] for row in cursor.fetchall())
+        return found
+    finally:
+        cursor.close()
+        conn.close()
+
+
 def fetch_indexes(schema: str):
     creds = load_credentials("oracle")
     conn = oracledb.connect(creds["username"], creds["password"], f"{creds['host']}:{creds['port']}/{creds['service']}")
@@ -0,0 +1,394 @@
+# services/range_checksum.py
+import logging
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from services.row_digest import row_hash
+
+logger = logging.getLogger(__name__)
+
+# Sub-ranges per split: the key span is cut into this many ranges, and every range whose
+# checksums differ is cut into as many again.
+RANGE_CHECKSUM_FANOUT = int(os.getenv("RANGE_CHECKSUM_FANOUT", "16"))
+# A differing range with at most this many rows on either side is compared row by row.
+RANGE_CHECKSUM_LEAF_ROWS = int(os.getenv("RANGE_CHECKSUM_LEAF_ROWS", "500"))
+# Differing keys reported per table; bisection stops once this many have been found.
+RANGE_CHECKSUM_MAX_DIFFS = int(os.getenv("RANGE_CHECKSUM_MAX_DIFFS", "100"))
+
+# Declared characters hashed in one call. Wider rows are hashed in column groups whose
+# hashes are hashed again, which keeps every engine under its string limits (4000 bytes
+# for VARCHAR2, 8000 for HASHBYTES before SQL Server 2016).
+_GROUP_WIDTH = 2000
+# Leading hex digits of each row's MD5 that are summed: 56 bits fit a BIGINT, and the
+# sum over a billion rows still fits the DECIMAL(31, 0) DB2 allows.
+_HEX_DIGITS = 14
+# Floats and unconstrained NUMBERs are compared to this many decimal places.
+_FLOAT_SCALE = 6
+
+_TEXT_TYPES = {"CHAR", "NCHAR", "VARCHAR", "VARCHAR2", "NVARCHAR", "NVARCHAR2", "CHARACTER"}
+_INT_TYPES = {"BIT", "TINYINT", "SMALLINT", "INT", "INTEGER", "BIGINT"}
+_DECIMAL_TYPES = {"NUMBER", "NUMERIC", "DECIMAL", "MONEY", "SMALLMONEY"}
+_FLOAT_TYPES = {"FLOAT", "REAL", "DOUBLE", "BINARY_FLOAT", "BINARY_DOUBLE"}
+_DATETIME_TYPES = {"DATE", "DATETIME", "DATETIME2", "SMALLDATETIME"}
+_LOB_TYPES = {"CLOB", "NCLOB", "BLOB", "LONG", "TEXT", "NTEXT", "IMAGE", "XML"}
+
+
+class HashColumn(NamedTuple):
+    name: str
+    kind: str   # text, number, datetime
+    scale: int  # numbers: decimal places kept
+    width: int  # declared characters of its text form
+
+
+def column_type(col: Dict[str, Any]) -> Tuple[str, int]:
+    """
+    (kind, scale) of a source column (Oracle or SQL Server metadata entry). Kinds: text,
+    int, decimal (scale = decimal places), float, datetime, lob, other.
+    """
+    data_type = (col.get("data_type") or "").upper()
+    length = int(col.get("data_length") or col.get("character_maximum_length") or 0)
+    scale = col.get("data_scale") if "data_scale" in col else col.get("numeric_scale")
+    if data_type in _TEXT_TYPES:
+        return ("text", 0) if 0 < length <= 4000 else ("lob", 0)
+    if data_type in _INT_TYPES:
+        return "int", 0
+    if data_type in _DECIMAL_TYPES:
+        return ("float", _FLOAT_SCALE) if scale is None else ("decimal", int(scale))
+    if data_type in _FLOAT_TYPES:
+        return "float", _FLOAT_SCALE
+    if data_type in _DATETIME_TYPES or data_type.startswith("TIMESTAMP"):
+        return "datetime", 0
+    if data_type in _LOB_TYPES:
+        return "lob", 0
+    return "other", 0
+
+
+def hash_column(col: Dict[str, Any]) -> Optional[HashColumn]:
+    """
+    How a source column is hashed in SQL, or None for types no engine can render the
+    same way (LOBs, binary, XML, ...). Those columns are still compared row by row
+    inside ranges that differ.
+    """
+    name = col["column_name"]
+    kind, scale = column_type(col)
+    if kind == "text":
+        return HashColumn(name, "text", 0, int(col.get("data_length") or col.get("character_maximum_length")))
+    if kind in ("int", "decimal", "float"):
+        return HashColumn(name, "number", scale, 21)
+    if kind == "datetime":
+        return HashColumn(name, "datetime", 0, 19)
+    return None
+
+
+def _groups(columns: Sequence[HashColumn]) -> List[List[HashColumn]]:
+    groups, width = [[]], 0
+    for col in columns:
+        if groups[-1] and width + col.width + 1 > _GROUP_WIDTH:
+            groups.append([])
+            width = 0
+        groups[-1].append(col)
+        width += col.width + 1
+    return groups
+
+
+class Dialect(ABC):
+    """
+    SQL that renders a row the same way on every engine: text right-trimmed with NULL and ''
+    alike, numbers as integers scaled by their decimal places, timestamps to the second,
+    '|' before each value. The MD5 of that text is the row hash.
+    """
+
+    concat = " || "
+
+    def quote(self, name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    def value(self, col: HashColumn) -> str:
+        quoted = self.quote(col.name)
+        if col.kind == "text":
+            expr = self.text(quoted)
+        elif col.kind == "datetime":
+            expr = self.datetime(quoted)
+        else:
+            expr = self.number(quoted if not col.scale else f"{quoted} * 1{'0' * col.scale}", col.scale)
+        return f"COALESCE({expr}, '')"
+
+    def row_hex(self, columns: Sequence[HashColumn]) -> str:
+        hashes = [
+            self.md5_hex(self.concat.join(part for col in group for part in ("'|'", self.value(col))) or "'|'")
+            for group in _groups(columns)
+        ]
+        return hashes[0] if len(hashes) == 1 else self.md5_hex(self.concat.join(hashes))
+
+    def substr(self, expr: str, length: int) -> str:
+        return f"SUBSTR({expr}, 1, {length})"
+
+    def text(self, col: str) -> str:
+        return f"RTRIM({col})"
+
+    @abstractmethod
+    def number(self, expr: str, scale: int) -> str:
+        ...
+
+    @abstractmethod
+    def datetime(self, col: str) -> str:
+        ...
+
+    @abstractmethod
+    def md5_hex(self, expr: str) -> str:
+        ...
+
+    @abstractmethod
+    def hex_to_int(self, expr: str) -> str:
+        ...
+
+    # ── column profiles ──
+    def numeric(self, col: str, kind: str, scale: int) -> str:
+        """The column as a type MIN/MAX/SUM accept and SUM cannot overflow."""
+        return col
+
+    def length(self, expr: str) -> str:
+        return f"LENGTH({expr})"
+
+    def count_distinct(self, expr: str, kind: str) -> str:
+        return f"COUNT(DISTINCT {expr})"
+
+
+class OracleDialect(Dialect):
+    def number(self, expr, scale):
+        # CAST keeps BINARY_DOUBLE values out of TO_CHAR's exponent notation.
+        return f"TO_CHAR(CAST(ROUND({expr}) AS NUMBER(19)))"
+
+    def datetime(self, col):
+        return f"TO_CHAR({col}, 'YYYY-MM-DD HH24:MI:SS')"
+
+    def md5_hex(self, expr):
+        return f"RAWTOHEX(STANDARD_HASH({expr}, 'MD5'))"
+
+    def hex_to_int(self, expr):
+        return f"TO_NUMBER({expr}, '{'X' * _HEX_DIGITS}')"
+
+    def count_distinct(self, expr, kind):
+        return f"APPROX_COUNT_DISTINCT({expr})"
+
+
+class SqlServerDialect(Dialect):
+    concat = " + "
+
+    def quote(self, name):
+        return "[" + name.replace("]", "]]") + "]"
+
+    def substr(self, expr, length):
+        return f"SUBSTRING({expr}, 1, {length})"
+
+    def text(self, col):
+        # VARCHAR, so NVARCHAR values hash as the same bytes as on the other engines.
+        return f"CAST(RTRIM({col}) AS VARCHAR(4000))"
+
+    def number(self, expr, scale):
+        value = f"ROUND({expr}, 0)" if scale else expr
+        return f"CAST(CAST({value} AS BIGINT) AS VARCHAR(20))"
+
+    def datetime(self, col):
+        return f"CONVERT(VARCHAR(19), CAST({col} AS DATETIME2), 120)"
+
+    def md5_hex(self, expr):
+        return f"CONVERT(VARCHAR(32), HASHBYTES('MD5', {expr}), 2)"
+
+    def hex_to_int(self, expr):
+        return f"CONVERT(BIGINT, CONVERT(VARBINARY({_HEX_DIGITS // 2}), {expr}, 2))"
+
+    def numeric(self, col, kind, scale):
+        if kind == "int":
+            return f"CAST({col} AS BIGINT)"
+        if kind == "decimal":
+            return f"CAST({col} AS DECIMAL(38, {scale}))"
+        return f"CAST({col} AS FLOAT)"
+
+    def length(self, expr):
+        return f"CAST(LEN({expr}) AS BIGINT)"
+
+    def count_distinct(self, expr, kind):
+        # Binary, so a case-insensitive collation doesn't merge values DB2 keeps apart.
+        if kind == "text":
+            return f"COUNT(DISTINCT CAST({expr} AS VARBINARY(8000)))"
+        return f"COUNT(DISTINCT {expr})"
+
+
+class Db2Dialect(Dialect):
+    def number(self, expr, scale):
+        value = f"ROUND({expr}, 0)" if scale else expr
+        return f"VARCHAR(BIGINT({value}))"
+
+    def datetime(self, col):
+        return f"VARCHAR_FORMAT({col}, 'YYYY-MM-DD HH24:MI:SS')"
+
+    def md5_hex(self, expr):
+        return f"HEX(HASH({expr}, 0))"
+
+    def numeric(self, col, kind, scale):
+        if kind == "int":
+            return f"BIGINT({col})"
+        if kind == "decimal":
+            return f"DECIMAL({col}, 31, {scale})"
+        return f"DOUBLE({col})"
+
+    def length(self, expr):
+        # Characters, not UTF-8 bytes, to count what the other engines count.
+        return f"BIGINT(LENGTH({expr}, CODEUNITS32))"
+
+    def hex_to_int(self, expr):
+        # DB2 has no hex-to-integer conversion; add up the digits instead.
+        digits = " + ".join(
+            f"(LOCATE(SUBSTR({expr}, {i}, 1), '0123456789ABCDEF') - 1) * {16 ** (_HEX_DIGITS - i)}"
+            for i in range(1, _HEX_DIGITS + 1)
+        )
+        return f"({digits})"
+
+
+def source_dialect(source_type: str) -> Dialect:
+    if source_type.lower() == "oracle":
+        return OracleDialect()
+    if source_type.lower() == "sql":
+        return SqlServerDialect()
+    raise ValueError("Invalid source type. Must be 'oracle' or 'sql'.")
+
+
+class RangeSide:
+    """One side of the comparison: a connection, the table on it and the SQL to checksum it."""
+
+    def __init__(self, conn, dialect: Dialect, table: str, key_column: str,
+                 select_columns: Sequence[str], hashed: Sequence[HashColumn]):
+        self.conn = conn
+        self.dialect = dialect
+        self.table = table
+        self.key = dialect.quote(key_column)
+        self.key_index = list(select_columns).index(key_column)
+        self.select_list = ", ".join(dialect.quote(c) for c in select_columns)
+        self.row_hex = dialect.row_hex(hashed)
+
+    def _query(self, sql: str) -> List[Sequence[Any]]:
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(sql)
+            return cursor.fetchall()
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+    def bounds(self) -> Tuple[Optional[int], Optional[int], int]:
+        """(smallest key, largest key, row count)."""
+        low, high, rows = self._query(f"SELECT MIN({self.key}), MAX({self.key}), COUNT(*) FROM {self.table}")[0]
+        return (None if low is None else int(low)), (None if high is None else int(high)), int(rows)
+
+    def checksums(self, low: int, high: int, width: int) -> Dict[int, Tuple[int, int]]:
+        """{range number: (rows, checksum)} for keys low..high in ranges of `width` keys, in one query."""
+        d = self.dialect
+        checksum = d.hex_to_int(d.substr("H", _HEX_DIGITS))
+        rows = self._query(
+            f"SELECT B, COUNT(*), SUM(CAST({checksum} AS DECIMAL(31, 0))) "
+            f"FROM (SELECT FLOOR(({self.key} - {low}) / {width}) AS B, {self.row_hex} AS H "
+            f"FROM {self.table} WHERE {self.key} BETWEEN {low} AND {high}) X GROUP BY B"
+        )
+        return {int(b): (int(count), int(total or 0)) for b, count, total in rows}
+
+    def rows(self, low: int, high: int) -> Dict[int, int]:
+        """{key: row hash} of the rows with keys low..high, hashed in Python over every column."""
+        rows = self._query(f"SELECT {self.select_list} FROM {self.table} WHERE {self.key} BETWEEN {low} AND {high}")
+        return {int(row[self.key_index]): row_hash(row) for row in rows}
+
+
+def compare_ranges(
+    source: RangeSide,
+    target: RangeSide,
+    fanout: int = RANGE_CHECKSUM_FANOUT,
+    leaf_rows: int = RANGE_CHECKSUM_LEAF_ROWS,
+    max_diffs: int = RANGE_CHECKSUM_MAX_DIFFS,
+) -> Dict[str, Any]:
+    """
+    Compare a table by key range: both databases return (rows, checksum) per range, ranges
+    that agree are done, ranges that differ are split again until they are small enough to
+    fetch and compare row by row. When the table matches only the checksums of the first
+    split leave the databases. Rows with a NULL key show up only in the row counts.
+    """
+    fanout = max(2, fanout)
+    result: Dict[str, Any] = {
+        "ranges_checked": 0,
+        "ranges_mismatched": 0,
+        "rows_compared": 0,
+        "missing_in_target": [],
+        "extra_in_target": [],
+        "different": [],
+        "truncated": False,
+    }
+    diffs = 0
+    false_alarms = 0
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        def both(method: str, *args):
+            futures = [pool.submit(getattr(side, method), *args) for side in (source, target)]
+            return [f.result() for f in futures]
+
+        (s_low, s_high, s_rows), (t_low, t_high, t_rows) = both("bounds")
+        result["row_count_source"] = s_rows
+        result["row_count_target"] = t_rows
+        keys = [k for k in (s_low, s_high, t_low, t_high) if k is not None]
+        pending = [(min(keys), max(keys))] if keys else []
+
+        while pending:
+            if diffs >= max_diffs:
+                result["truncated"] = True
+                break
+            low, high = pending.pop()
+            width = -(-(high - low + 1) // fanout)
+            s_sums, t_sums = both("checksums", low, high, width)
+            # Walk sub-ranges highest first so the stack pops them in key order.
+            for b in sorted(set(s_sums) | set(t_sums), reverse=True):
+                result["ranges_checked"] += 1
+                s, t = s_sums.get(b, (0, 0)), t_sums.get(b, (0, 0))
+                if s == t:
+                    continue
+                result["ranges_mismatched"] += 1
+                sub_low = low + b * width
+                sub_high = min(high, sub_low + width - 1)
+                if max(s[0], t[0]) > leaf_rows and sub_low < sub_high:
+                    pending.append((sub_low, sub_high))
+                    continue
+                s_hashes, t_hashes = both("rows", sub_low, sub_high)
+                result["rows_compared"] += len(s_hashes) + len(t_hashes)
+                found = _diff_rows(s_hashes, t_hashes, result, max_diffs)
+                if not found:
+                    false_alarms += 1
+                diffs += found
+
+    if false_alarms:
+        # Same rows, different SQL rendering (e.g. non-ASCII text in a non-UTF-8 code page).
+        logger.warning(f"⚠️ {false_alarms} range(s) had different checksums but identical rows")
+    result["diff_count"] = diffs
+    result["match"] = diffs == 0 and s_rows == t_rows and not result["truncated"]
+    return result
+
+
+def _diff_rows(source: Dict[int, int], target: Dict[int, int], result: Dict[str, Any], max_diffs: int) -> int:
+    found = 0
+    for key, digest in source.items():
+        other = target.get(key)
+        if other == digest:
+            continue
+        found += 1
+        bucket = result["missing_in_target"] if other is None else result["different"]
+        if _reported(result) < max_diffs:
+            bucket.append(key)
+    for key in target.keys() - source.keys():
+        found += 1
+        if _reported(result) < max_diffs:
+            result["extra_in_target"].append(key)
+    return found
+
+
+def _reported(result: Dict[str, Any]) -> int:
+    return len(result["missing_in_target"]) + len(result["different"]) + len(result["extra_in_target"])
@@ -0,0 +1,122 @@
+# services/row_digest.py
+import datetime
+import hashlib
+import uuid
+from decimal import Decimal, InvalidOperation
+from typing import Any, Iterable, Optional, Sequence
+
+_MASK = (1 << 128) - 1
+_NULL = "\x00"
+_SEP = "\x1f"
+
+
+def canonical_value(value: Any) -> str:
+    """
+    One text form per value, whichever database and driver produced it:
+    - NULL and '' are the same (Oracle stores '' as NULL); CHAR padding is ignored
+    - numbers of any type (int, float, Decimal, bool) compare by numeric value
+    - dates and timestamps compare by instant (midnight timestamps equal dates)
+    - binary data as hex, LOB locators are read first
+    """
+    if value is None:
+        return _NULL
+    if hasattr(value, "read") and not isinstance(value, (str, bytes)):
+        value = value.read()
+    if isinstance(value, str):
+        value = value.rstrip(" ")
+        return value if value else _NULL
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, (float, Decimal)):
+        return _canonical_number(value)
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        if value.time() == datetime.time(0):
+            return value.date().isoformat()
+        text = value.isoformat(sep=" ")
+        return text.rstrip("0").rstrip(".") if "." in text else text
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, datetime.time):
+        text = value.isoformat()
+        return text.rstrip("0").rstrip(".") if "." in text else text
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+        return "0x" + data.hex() if data else _NULL
+    if isinstance(value, uuid.UUID):
+        return str(value).upper()
+    return str(value)
+
+
+def _canonical_number(value) -> str:
+    try:
+        number = Decimal(repr(value)) if isinstance(value, float) else value
+        if not number.is_finite():
+            return str(number)
+        number = number.normalize()
+        if number == 0:
+            return "0"
+        return format(number, "f")
+    except (InvalidOperation, ValueError):
+        return str(value)
+
+
+def row_hash(row: Sequence[Any]) -> int:
+    """128-bit hash of one row's canonical values."""
+    text = _SEP.join(canonical_value(v) for v in row)
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest(), "big")
+
+
+class TableDigest:
+    """
+    Order-independent digest of a multiset of rows: the row count plus the sum (mod 2**128)
+    of the rows' 128-bit hashes. Rows can be added in any order and in chunks, digests of
+    parts of a table can be merged, and memory use does not depend on the table size.
+    A sum rather than XOR keeps duplicate rows from cancelling each other out.
+    """
+
+    __slots__ = ("rows", "total")
+
+    def __init__(self, rows: int = 0, total: int = 0):
+        self.rows = rows
+        self.total = total
+
+    def add(self, row: Sequence[Any]):
+        self.rows += 1
+        self.total = (self.total + row_hash(row)) & _MASK
+
+    def update(self, rows: Iterable[Sequence[Any]]):
+        total = self.total
+        count = 0
+        for row in rows:
+            total += row_hash(row)
+            count += 1
+        self.rows += count
+        self.total = total & _MASK
+
+    def merge(self, other: "TableDigest") -> "TableDigest":
+        self.rows += other.rows
+        self.total = (self.total + other.total) & _MASK
+        return self
+
+    def hexdigest(self) -> str:
+        return f"{self.total:032x}"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, TableDigest) and (self.rows, self.total) == (other.rows, other.total)
+
+    def __repr__(self) -> str:
+        return f"TableDigest(rows={self.rows}, digest={self.hexdigest()})"
+
+
+def digest_cursor(cursor, fetch_size: int, digest: Optional[TableDigest] = None) -> TableDigest:
+    """Stream an executed cursor into a digest, `fetch_size` rows at a time."""
+    digest = digest or TableDigest()
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            return digest
+        digest.update(rows)
@@ -0,0 +1,321 @@
+# services/schema_diff.py
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from services.db2_catalog import TargetCatalog, get_target_catalog
+from services.db2_service import (
+    db2_column_spec,
+    execute_db2_ddl,
+    execute_ddl_batch,
+    get_table_row_count,
+    truncate_table,
+)
+from services.throughput_history import get_throughput_history
+
+logger = logging.getLogger(__name__)
+
+# Parallel COUNT(*) pairs for unchanged tables that have no migration history.
+SCHEMA_DIFF_COUNT_WORKERS = int(os.getenv("SCHEMA_DIFF_COUNT_WORKERS", "8"))
+
+_TYPE_RE = re.compile(r"^\s*([A-Z ]+?)\s*(?:\(\s*(\d+)\s*([KMG])?\s*(?:,\s*(\d+)\s*)?\))?\s*$", re.IGNORECASE)
+_TYPE_ALIASES = {"CHAR": "CHARACTER", "INT": "INTEGER", "DEC": "DECIMAL", "NUMERIC": "DECIMAL", "FLOAT": "DOUBLE"}
+_LOBS = {"CLOB", "BLOB", "DBCLOB"}
+# Type changes DB2 can make in place with ALTER COLUMN ... SET DATA TYPE without losing data.
+_FAMILIES = {
+    "SMALLINT": ("int", 1), "INTEGER": ("int", 2), "BIGINT": ("int", 3),
+    "REAL": ("float", 1), "DOUBLE": ("float", 2),
+}
+
+
+def _parse_type(db2_type: str) -> Tuple[str, Optional[int], int]:
+    """'DECIMAL(10, 2)' -> ('DECIMAL', 10, 2); 'CHAR(5)' -> ('CHARACTER', 5, 0)."""
+    match = _TYPE_RE.match(db2_type or "")
+    if not match:
+        return (db2_type or "").upper(), None, 0
+    base = _TYPE_ALIASES.get(match.group(1).upper(), match.group(1).upper())
+    length = int(match.group(2)) if match.group(2) else None
+    if length is not None and match.group(3):
+        length *= {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}[match.group(3).upper()]
+    return base, length, int(match.group(4) or 0)
+
+
+@dataclass
+class ColumnChange:
+    column: str
+    action: str  # 'add', 'widen', 'drop_not_null', 'conflict'
+    expected_type: Optional[str] = None
+    target_type: Optional[str] = None
+    ddl: Optional[str] = None
+
+
+@dataclass
+class TableDiff:
+    table: str
+    action: str  # 'create', 'alter', 'skip', 'conflict'
+    changes: List[ColumnChange] = field(default_factory=list)
+    extra_columns: List[str] = field(default_factory=list)
+    needs_reorg: bool = False
+
+    @property
+    def ddls(self) -> List[str]:
+        return [c.ddl for c in self.changes if c.ddl]
+
+
+@dataclass
+class ObjectDiff:
+    create: List[str] = field(default_factory=list)
+    skip: List[str] = field(default_factory=list)
+
+
+@dataclass
+class SchemaDiff:
+    source_type: str
+    source_schema: str
+    target_schema: str
+    tables: Dict[str, TableDiff] = field(default_factory=dict)
+    sequences: ObjectDiff = field(default_factory=ObjectDiff)
+    indexes: ObjectDiff = field(default_factory=ObjectDiff)
+    triggers: ObjectDiff = field(default_factory=ObjectDiff)
+    views: ObjectDiff = field(default_factory=ObjectDiff)
+    # Tables whose data has to be (re)loaded: new, altered, or not successfully loaded last time.
+    reload: List[str] = field(default_factory=list)
+
+    def tables_with(self, action: str) -> List[str]:
+        return sorted(t for t, d in self.tables.items() if d.action == action)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "source_schema": self.source_schema,
+            "target_schema": self.target_schema,
+            "tables": {action: self.tables_with(action) for action in ("create", "alter", "conflict", "skip")},
+            "table_changes": {t: [asdict(c) for c in d.changes] for t, d in self.tables.items() if d.changes},
+            "reload": sorted(self.reload),
+            "sequences": asdict(self.sequences),
+            "indexes": asdict(self.indexes),
+            "triggers": asdict(self.triggers),
+            "views": asdict(self.views),
+        }
+
+
+def _target_type(col: Dict[str, Any]) -> str:
+    base = (col.get("data_type") or "").upper()
+    if base in ("VARCHAR", "CHARACTER") or base in _LOBS:
+        return f"{base}({col.get('length')})"
+    if base == "DECIMAL":
+        return f"DECIMAL({col.get('length')}, {col.get('scale') or 0})"
+    return base
+
+
+def _compare_type(expected: str, target_col: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], bool]:
+    """
+    Decide how an existing column relates to the type the source now maps to.
+    Returns (action, new type, needs reorg); action is None when the column already fits.
+    """
+    base, length, scale = _parse_type(expected)
+    t_base = _TYPE_ALIASES.get((target_col.get("data_type") or "").upper(), (target_col.get("data_type") or "").upper())
+    t_length = int(target_col.get("length") or 0)
+    t_scale = int(target_col.get("scale") or 0)
+
+    if base == t_base:
+        if base == "VARCHAR" and length and length > t_length:
+            return "widen", expected, False
+        if base == "CHARACTER" and length and length > t_length:
+            return "widen", expected, True
+        if base == "DECIMAL" and length:
+            digits = max(length - scale, t_length - t_scale)
+            new_scale = max(scale, t_scale)
+            precision = min(31, digits + new_scale)
+            if (precision, new_scale) != (t_length, t_scale):
+                return "widen", f"DECIMAL({precision}, {new_scale})", True
+        # LOB lengths are capped differently per type; an existing LOB column is accepted as is.
+        return None, None, False
+
+    if base == "VARCHAR" and t_base == "CHARACTER" and (length or 0) >= t_length:
+        return "widen", expected, True
+    if base in _FAMILIES and t_base in _FAMILIES and _FAMILIES[base][0] == _FAMILIES[t_base][0]:
+        if _FAMILIES[base][1] > _FAMILIES[t_base][1]:
+            return "widen", expected, True
+        return None, None, False
+    return "conflict", None, False
+
+
+def diff_table(
+    target_schema: str,
+    table: str,
+    metadata: List[Dict[str, Any]],
+    source_type: str,
+    catalog: Optional[TargetCatalog] = None,
+) -> TableDiff:
+    catalog = catalog or get_target_catalog()
+    table = table.upper()
+    if not catalog.has_table(target_schema, table):
+        return TableDiff(table=table, action="create")
+
+    qualified = f'"{target_schema.upper()}"."{table}"'
+    existing = {c["column_name"].upper(): c for c in catalog.columns(target_schema, table)}
+    diff = TableDiff(table=table, action="skip")
+    seen = set()
+    for col in metadata:
+        spec = db2_column_spec(col, source_type)
+        if not spec:
+            continue
+        name, expected, not_null = spec
+        seen.add(name)
+        target_col = existing.get(name)
+        if target_col is None:
+            # Existing rows have no value for it, so the column is added nullable.
+            diff.changes.append(ColumnChange(
+                name, "add", expected_type=expected,
+                ddl=f'ALTER TABLE {qualified} ADD COLUMN "{name}" {expected}',
+            ))
+            continue
+        action, new_type, reorg = _compare_type(expected, target_col)
+        if action == "widen":
+            diff.changes.append(ColumnChange(
+                name, "widen", expected_type=new_type, target_type=_target_type(target_col),
+                ddl=f'ALTER TABLE {qualified} ALTER COLUMN "{name}" SET DATA TYPE {new_type}',
+            ))
+            diff.needs_reorg |= reorg
+        elif action == "conflict":
+            diff.changes.append(ColumnChange(name, "conflict", expected_type=expected, target_type=_target_type(target_col)))
+        if not not_null and target_col.get("nullable") == "N":
+            diff.changes.append(ColumnChange(
+                name, "drop_not_null", expected_type=expected, target_type=_target_type(target_col),
+                ddl=f'ALTER TABLE {qualified} ALTER COLUMN "{name}" DROP NOT NULL',
+            ))
+            diff.needs_reorg = True
+    diff.extra_columns = [c for c in existing if c not in seen]
+
+    if any(c.action == "conflict" for c in diff.changes):
+        diff.action = "conflict"
+    elif diff.changes:
+        diff.action = "alter"
+    return diff
+
+
+def diff_names(names: Iterable[str], exists: Callable[[str], bool]) -> ObjectDiff:
+    result = ObjectDiff()
+    for name in sorted({n for n in names if n}):
+        (result.skip if exists(name) else result.create).append(name)
+    return result
+
+
+def _loaded_without_history(source_type: str, source_schema: str, target_schema: str, tables: Dict[str, str]) -> set:
+    """
+    Tables (by DB2 name) whose source and DB2 row counts match. Used for unchanged tables
+    with no history row, e.g. ones loaded before history was kept; any failure means reload.
+    """
+    if not tables:
+        return set()
+    if source_type.lower() == "oracle":
+        from services.oracle_service import get_table_row_count as source_count
+    else:
+        from services.sql_service import get_table_row_count as source_count
+
+    def matches(item):
+        target_table, source_table = item
+        try:
+            return target_table, source_count(source_schema, source_table) == get_table_row_count(target_schema, target_table)
+        except Exception as e:
+            logger.warning(f"⚠️ Row count check failed for {source_table}, reloading it: {e}")
+            return target_table, False
+
+    with ThreadPoolExecutor(max_workers=max(1, min(SCHEMA_DIFF_COUNT_WORKERS, len(tables)))) as executor:
+        return {table for table, same in executor.map(matches, tables.items()) if same}
+
+
+def compute_schema_diff(
+    source_type: str,
+    source_schema: str,
+    metadata_map: Dict[str, List[Dict[str, Any]]],
+    sequences: Iterable[str] = (),
+    triggers: Optional[Dict[str, str]] = None,
+    indexes: Optional[List[Dict[str, Any]]] = None,
+    views: Optional[List[Dict[str, Any]]] = None,
+    target_schema: Optional[str] = None,
+    refresh_catalog: bool = True,
+) -> SchemaDiff:
+    """
+    Compare source metadata (MAXOBJECT tables) and source object names with the DB2 catalog.
+    `refresh_catalog` re-reads the target snapshot first, so objects created by an earlier
+    process or by hand are seen. Unchanged tables are reloaded when their last run did not
+    succeed; without any history they are kept if source and DB2 row counts match.
+    """
+    target_schema = (target_schema or source_schema).upper()
+    catalog = get_target_catalog()
+    if refresh_catalog:
+        catalog.refresh(target_schema)
+
+    diff = SchemaDiff(source_type=source_type, source_schema=source_schema.upper(), target_schema=target_schema)
+    for table, metadata in metadata_map.items():
+        try:
+            diff.tables[table.upper()] = diff_table(target_schema, table, metadata or [], source_type, catalog)
+        except Exception as e:
+            logger.warning(f"⚠️ Diff failed for {table}, treating it as changed: {e}")
+            diff.tables[table.upper()] = TableDiff(
+                table=table.upper(), action="conflict", changes=[ColumnChange("*", "conflict", target_type=str(e))]
+            )
+
+    diff.sequences = diff_names((s.upper() for s in sequences), lambda n: catalog.has_sequence(target_schema, n))
+    diff.triggers = diff_names((t.upper() for t in (triggers or {})), lambda n: catalog.has_trigger(target_schema, n))
+    diff.indexes = diff_names(
+        ((i.get("name") or "").upper() for i in (indexes or [])), lambda n: catalog.has_index(target_schema, n)
+    )
+    diff.views = diff_names(
+        ((v.get("name") or "").upper() for v in (views or [])), lambda n: catalog.has_view(target_schema, n)
+    )
+
+    try:
+        last_status = get_throughput_history().latest_status(source_type, source_schema, target_schema)
+    except Exception as e:
+        logger.warning(f"⚠️ Migration history unavailable, reloading every table: {e}")
+        last_status = {}
+    source_names = {t.upper(): t for t in metadata_map}
+    unrecorded = {t: source_names[t] for t, d in diff.tables.items() if d.action == "skip" and t not in last_status}
+    already_loaded = _loaded_without_history(source_type, source_schema, target_schema, unrecorded)
+    diff.reload = sorted(
+        t for t, d in diff.tables.items()
+        if d.action in ("create", "alter")
+        or (d.action == "skip" and last_status.get(t) != "success" and t not in already_loaded)
+    )
+
+    logger.info(
+        f"🧮 Schema diff {diff.source_schema} → {target_schema}: "
+        f"{len(diff.tables_with('create'))} create, {len(diff.tables_with('alter'))} alter, "
+        f"{len(diff.tables_with('conflict'))} conflict, {len(diff.tables_with('skip'))} unchanged; "
+        f"{len(diff.reload)} to reload"
+    )
+    return diff
+
+
+def apply_table_changes(diff: SchemaDiff) -> Dict[str, str]:
+    """
+    Run the ALTER statements of every 'alter' table (one DDL batch per table, REORG where DB2
+    leaves the table reorg-pending) and empty existing tables that are about to be reloaded.
+    """
+    results: Dict[str, str] = {}
+    schema = diff.target_schema
+    for table in diff.tables_with("alter"):
+        table_diff = diff.tables[table]
+        errors = [err for ok, err in execute_ddl_batch(table_diff.ddls) if not ok]
+        if errors:
+            results[table] = f"failed: {errors[0]}"
+            logger.error(f"❌ ALTER failed for {schema}.{table}: {errors[0]}")
+            continue
+        if table_diff.needs_reorg and not execute_db2_ddl(
+            f"CALL SYSPROC.ADMIN_CMD('REORG TABLE \"{schema}\".\"{table}\"')"
+        ):
+            results[table] = "failed: REORG after ALTER failed"
+            continue
+        results[table] = "altered"
+
+    for table in diff.reload:
+        if diff.tables[table].action == "create" or results.get(table, "").startswith("failed"):
+            continue
+        truncate_table(schema, table)
+        results.setdefault(table, "truncated")
+    return results
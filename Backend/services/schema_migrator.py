@@ -5,20 +5,39 @@ import threading
 import multiprocessing
 from typing import Dict, Any, List, Optional, Tuple, Generator
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 from services.db2_service import (
     improved_table_migration_with_monitoring,
+    migrate_table_bundle,
     create_schema_if_not_exists,
     create_tables_multithreaded,
     get_table_row_count,
     cleanup_connections,
+    clear_table_cache,
 )
 from utils.couchdb_helpers import save_migration_status_to_couchdb
-from services.oracle_service import fetch_tables as fetch_oracle_tables, fetch_table_metadata as fetch_oracle_metadata
-from services.sql_service import fetch_tables as fetch_sql_tables, fetch_table_metadata as fetch_sql_metadata
-from utils.ddl_writer import save_ddl
+from services.oracle_service import (
+    fetch_tables as fetch_oracle_tables,
+    fetch_table_metadata as fetch_oracle_metadata,
+    fetch_schema_metadata as fetch_oracle_schema_metadata,
+)
+from services.sql_service import (
+    fetch_tables as fetch_sql_tables,
+    fetch_table_metadata as fetch_sql_metadata,
+    fetch_schema_metadata as fetch_sql_schema_metadata,
+)
+from utils.ddl_writer import save_ddl, begin_ddl_run, flush_ddl_writes
+from services.throughput_history import record_table_run
+from services.validation_service import (
+    VALIDATION_SAMPLE_CONFIDENCE,
+    ConnectionPool,
+    compare_table_sample,
+    get_source_conn,
+)
+from connections.db2_connection import get_db2_connection
+from utils.credentials_store import get_target_credentials
 
 
 logger = logging.getLogger(__name__)
@@ -31,7 +50,16 @@ class MigrationConfig:
     data_migration_workers: int = min(12, multiprocessing.cpu_count())
     batch_size: int = 1000
     enable_validation: bool = True
+    # 'count' compares row counts only; 'sample' also compares a random sample of rows by key.
+    validation_mode: str = "sample"
+    sample_confidence: float = VALIDATION_SAMPLE_CONFIDENCE
     max_retries: int = 3
+    # Tables at or below this many rows (per optimizer stats) are loaded in bundles.
+    small_table_rows: int = 1000
+    bundle_max_rows: int = 20000
+    bundle_max_tables: int = 100
+    # Rows a bundle may actually fetch; past this it rolls back and its tables load one by one.
+    bundle_row_cap: int = 40000
 
 
 @dataclass
@@ -42,6 +70,17 @@ class TableMigrationResult:
     duration: float = 0.0
     error: Optional[str] = None
     verified: bool = False
+    bytes_migrated: int = 0
+    attempts: int = 0
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    validation: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class TableLoadPlan:
+    empty: List[str] = field(default_factory=list)
+    bundles: List[List[str]] = field(default_factory=list)
+    large: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -107,6 +146,7 @@ class OptimizedSchemaMigrator:
     ) -> SchemaMigrationResult:
         target_schema = target_schema or source_schema
         start_time = time.time()
+        clear_table_cache(target_schema)
 
 
         self._validate_schemas(source_type, source_schema, target_schema)
@@ -126,7 +166,7 @@ class OptimizedSchemaMigrator:
 
 
         if self.config.enable_validation:
-            self._verify_migration_parallel(target_schema, migration_results)
+            self._verify_migration_parallel(target_schema, migration_results, source_type, source_schema)
 
 
         total_duration = time.time() - start_time
@@ -156,6 +196,9 @@ class OptimizedSchemaMigrator:
         migration_status = MigrationStatus(source_schema)
         try:
             yield f"🚀 Starting migration: {source_schema} → {target_schema}"
+            begin_ddl_run("source", source_schema)
+            begin_ddl_run("target", target_schema)
+            clear_table_cache(target_schema)
             yield "🔍 Validating schemas..."
             self._validate_schemas(source_type, source_schema, target_schema)
             yield "✅ Schemas validated"
@@ -171,25 +214,18 @@ class OptimizedSchemaMigrator:
             results = {}
 
 
-            def migrate_table(table: str):
-                return self._migrate_data_parallel(
-                    source_type, source_schema, target_schema, [table],
-                    migration_status=migration_status,
-                    transaction_id=transaction_id
-                )[table]
-
-
-            with ThreadPoolExecutor(max_workers=self.config.data_migration_workers) as executor:
-                futures = {executor.submit(migrate_table, t): t for t in all_tables}
-                for future in as_completed(futures):
-                    table = futures[future]
-                    result = future.result()
-                    results[table] = result
-                    yield f"✅ {table}: {result.status} - rows migrated: {result.rows_migrated}" if result.status == "success" else f"❌ {table}: {result.error}"
-                    if transaction_id:
-                        save_migration_status_to_couchdb(transaction_id, migration_status.status, migration_status.schema)
-                    progress = len(results) / len(all_tables) * 100
-                    yield f"📈 Progress: {progress:.1f}% ({len(results)}/{len(all_tables)})"
+            for result in self.migrate_tables(
+                source_type, source_schema, target_schema, all_tables,
+                migration_status=migration_status,
+                transaction_id=transaction_id,
+            ):
+                table = result.table
+                results[table] = result
+                yield f"✅ {table}: {result.status} - rows migrated: {result.rows_migrated}" if result.status == "success" else f"❌ {table}: {result.error}"
+                if transaction_id:
+                    save_migration_status_to_couchdb(transaction_id, migration_status.status, migration_status.schema)
+                progress = len(results) / len(all_tables) * 100
+                yield f"📈 Progress: {progress:.1f}% ({len(results)}/{len(all_tables)})"
 
 
             success_count = sum(1 for r in results.values() if r.status == "success")
@@ -201,9 +237,218 @@ class OptimizedSchemaMigrator:
             yield f"❌ Migration failed with error: {e}"
             logger.error(f"Migration stream error: {e}")
         finally:
+            flush_ddl_writes()
             cleanup_connections()
 
 
+    def prepare_tables(
+        self,
+        source_type: str,
+        source_schema: str,
+        target_schema: Optional[str] = None,
+        table_filter: Optional[List[str]] = None,
+    ) -> Tuple[List[str], Dict[str, List[Dict]]]:
+        """Validate source/target schemas and fetch the metadata of every table to migrate."""
+        target_schema = target_schema or source_schema
+        self._validate_schemas(source_type, source_schema, target_schema)
+        return self._get_all_metadata_parallel(source_type, source_schema, table_filter)
+
+
+    def create_tables(
+        self,
+        target_schema: str,
+        metadata_map: Dict[str, List[Dict]],
+        source_type: str,
+    ) -> Dict[str, str]:
+        """Create every table in `metadata_map` on the target (no data)."""
+        return self._create_tables_without_verification(target_schema, metadata_map, source_type)
+
+
+    def migrate_table(
+        self,
+        source_type: str,
+        source_schema: str,
+        target_schema: str,
+        table: str,
+        migration_status: Optional[MigrationStatus] = None,
+        transaction_id: Optional[str] = None,
+    ) -> TableMigrationResult:
+        """Migrate the data of a single, already created table (with retries)."""
+        return self._migrate_table_with_retries(
+            source_type, source_schema, target_schema, table, migration_status, transaction_id
+        )
+
+
+    def plan_table_loads(self, source_type: str, source_schema: str, tables: List[str]) -> TableLoadPlan:
+        """
+        Split tables by size using optimizer statistics (one query for the whole schema).
+        Tables the statistics call empty are confirmed with a batched EXISTS probe; tables
+        without statistics always take the regular per-table path.
+        """
+        if source_type.lower() == "oracle":
+            from services.oracle_service import fetch_table_stats, fetch_nonempty_tables
+        else:
+            from services.sql_service import fetch_table_stats, fetch_nonempty_tables
+
+        try:
+            stats = fetch_table_stats(source_schema)
+        except Exception as e:
+            logger.warning(f"⚠️ Table statistics unavailable, loading every table individually: {e}")
+            return TableLoadPlan(large=list(tables))
+
+        rows = {t: (stats.get(t.upper()) or {}).get("rows") for t in tables}
+        zero = [t for t in tables if rows[t] == 0]
+        try:
+            nonempty = fetch_nonempty_tables(source_schema, zero)
+        except Exception as e:
+            logger.warning(f"⚠️ Empty-table probe failed, bundling them instead: {e}")
+            nonempty = set(t.upper() for t in zero)
+
+        plan = TableLoadPlan()
+        small = []
+        for table in tables:
+            if rows[table] == 0 and table.upper() not in nonempty:
+                plan.empty.append(table)
+            elif rows[table] is not None and rows[table] <= self.config.small_table_rows:
+                small.append(table)
+            else:
+                plan.large.append(table)
+
+        bundle, bundle_rows = [], 0
+        for table in sorted(small, key=lambda t: rows[t] or 0):
+            table_rows = rows[table] or 0
+            if bundle and (len(bundle) >= self.config.bundle_max_tables
+                           or bundle_rows + table_rows > self.config.bundle_max_rows):
+                plan.bundles.append(bundle)
+                bundle, bundle_rows = [], 0
+            bundle.append(table)
+            bundle_rows += table_rows
+        if bundle:
+            plan.bundles.append(bundle)
+
+        logger.info(
+            f"🗂️ Load plan: {len(plan.empty)} empty, {len(small)} small in {len(plan.bundles)} bundles, "
+            f"{len(plan.large)} individual"
+        )
+        return plan
+
+
+    def migrate_empty_table(
+        self,
+        table: str,
+        migration_status: Optional[MigrationStatus] = None,
+        transaction_id: Optional[str] = None,
+        source_type: Optional[str] = None,
+        source_schema: Optional[str] = None,
+        target_schema: Optional[str] = None,
+    ) -> TableMigrationResult:
+        """Empty tables only need their DDL, which is already in place; mark them done."""
+        if source_type and source_schema:
+            record_table_run(
+                source_type=source_type, source_schema=source_schema, target_schema=target_schema or source_schema,
+                table=table, status="success", rows_migrated=0, run_id=transaction_id,
+            )
+        if migration_status is not None:
+            migration_status.store_success("tables", table)
+            if transaction_id:
+                save_migration_status_to_couchdb(transaction_id, migration_status.status, migration_status.schema)
+        return TableMigrationResult(table=table, status="success", rows_migrated=0, attempts=0)
+
+
+    def migrate_table_bundle(
+        self,
+        source_type: str,
+        source_schema: str,
+        target_schema: str,
+        tables: List[str],
+        migration_status: Optional[MigrationStatus] = None,
+        transaction_id: Optional[str] = None,
+    ) -> Dict[str, TableMigrationResult]:
+        """Load a bundle of small tables in one transaction; on failure load them one by one."""
+        start_time = time.time()
+        try:
+            counts = migrate_table_bundle(
+                source_type, source_schema, target_schema, tables, self.config.batch_size,
+                max_rows=self.config.bundle_row_cap,
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Bundle of {len(tables)} tables failed, falling back to per-table loads: {e}")
+            return {
+                table: self.migrate_table(source_type, source_schema, target_schema, table, migration_status, transaction_id)
+                for table in tables
+            }
+
+        duration = time.time() - start_time
+        # The bundle is timed as a whole; each table is charged its share of the rows, so
+        # recorded throughput is the bundle's rate rather than skewed by table count.
+        total_rows = sum(counts.get(table, 0) for table in tables)
+        for table in tables:
+            rows = counts.get(table, 0)
+            record_table_run(
+                source_type=source_type, source_schema=source_schema, target_schema=target_schema,
+                table=table, status="success", rows_migrated=rows,
+                duration=duration * rows / total_rows if total_rows else duration / len(tables),
+                run_id=transaction_id,
+            )
+        if migration_status is not None:
+            for table in tables:
+                migration_status.store_success("tables", table)
+            if transaction_id:
+                save_migration_status_to_couchdb(transaction_id, migration_status.status, migration_status.schema)
+        return {
+            table: TableMigrationResult(
+                table=table, status="success", rows_migrated=counts.get(table, 0), duration=duration, attempts=1,
+            )
+            for table in tables
+        }
+
+
+    def migrate_tables(
+        self,
+        source_type: str,
+        source_schema: str,
+        target_schema: str,
+        tables: List[str],
+        migration_status: Optional[MigrationStatus] = None,
+        transaction_id: Optional[str] = None,
+    ) -> Generator[TableMigrationResult, None, None]:
+        """
+        Migrate table data, yielding each result as it completes: empty tables are marked done
+        immediately, small tables load in bundles and the rest go through the monitored loader.
+        """
+        plan = self.plan_table_loads(source_type, source_schema, tables)
+        for table in plan.empty:
+            yield self.migrate_empty_table(
+                table, migration_status, transaction_id, source_type, source_schema, target_schema
+            )
+
+        with ThreadPoolExecutor(max_workers=self.config.data_migration_workers) as executor:
+            futures = {
+                executor.submit(self.migrate_table_bundle, source_type, source_schema, target_schema,
+                                bundle, migration_status, transaction_id): bundle
+                for bundle in plan.bundles
+            }
+            futures.update({
+                executor.submit(self.migrate_table, source_type, source_schema, target_schema,
+                                table, migration_status, transaction_id): [table]
+                for table in plan.large
+            })
+            for future in as_completed(futures):
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    logger.error(f"❌ Migration task failed for {', '.join(futures[future])}: {e}")
+                    for table in futures[future]:
+                        if migration_status is not None:
+                            migration_status.store_error("tables", table)
+                        yield TableMigrationResult(table=table, status="failed", error=str(e))
+                    continue
+                if isinstance(outcome, dict):
+                    yield from outcome.values()
+                else:
+                    yield outcome
+
+
     #------------------ rest of your methods below, unchanged ----------------
 
 
@@ -253,9 +498,14 @@ class OptimizedSchemaMigrator:
         if source_type.lower() == "oracle":
             maxobject_tables = fetch_oracle_tables(source_schema)
             fetch_metadata = fetch_oracle_metadata
+            refresh_metadata = fetch_oracle_schema_metadata
         else:
             maxobject_tables = fetch_sql_tables(source_schema)
             fetch_metadata = fetch_sql_metadata
+            refresh_metadata = fetch_sql_schema_metadata
+        # Re-validate the cached snapshot against the source's DDL times once per run;
+        # the per-table lookups below are then served from memory.
+        refresh_metadata(source_schema, refresh=True)
 
 
         maxobject_tables_upper = set(t.upper() for t in maxobject_tables)
@@ -326,85 +576,107 @@ class OptimizedSchemaMigrator:
     ) -> Dict[str, TableMigrationResult]:
         logger.info(f"📊 Migrating data with {self.config.data_migration_workers} workers...")
         results = {}
+        for result in self.migrate_tables(
+            source_type, source_schema, target_schema, tables, migration_status, transaction_id
+        ):
+            results[result.table] = result
+            completed = len(results)
+            progress = (completed / len(tables)) * 100
+            logger.info(f"📈 Progress: {progress:.1f}% ({completed}/{len(tables)})")
+        return results
 
 
-        def migrate_single_table_with_retries(table: str) -> TableMigrationResult:
-            last_error = None
-            for attempt in range(1, self.config.max_retries + 1):
-                start_time = time.time()
-                try:
-                    raw_result = improved_table_migration_with_monitoring(
-                        source_type, source_schema, target_schema, table, timeout_minutes=15
+    def _migrate_table_with_retries(
+        self,
+        source_type: str,
+        source_schema: str,
+        target_schema: str,
+        table: str,
+        migration_status: Optional[MigrationStatus] = None,
+        transaction_id: Optional[str] = None,
+    ) -> TableMigrationResult:
+        last_error = None
+        retries = 0
+        for attempt in range(1, self.config.max_retries + 1):
+            start_time = time.time()
+            try:
+                raw_result = improved_table_migration_with_monitoring(
+                    source_type, source_schema, target_schema, table, timeout_minutes=15
+                )
+                retries += raw_result.get("retries", 0)
+                if raw_result.get("status") == "success":
+                    duration = time.time() - start_time
+                    metrics = raw_result.get("metrics") or {}
+                    record_table_run(
+                        source_type=source_type, source_schema=source_schema, target_schema=target_schema,
+                        table=table, status="success", rows_migrated=raw_result.get("rows_migrated", 0),
+                        bytes_migrated=metrics.get("bytes", 0), duration=duration, metrics=metrics,
+                        retries=retries + attempt - 1, run_id=transaction_id,
                     )
-                    if raw_result.get("status") == "success":
-                        duration = time.time() - start_time
-                        if migration_status is not None:
-                            migration_status.store_success("tables", table)
-                        if transaction_id:
-                            save_migration_status_to_couchdb(
-                                transaction_id, migration_status.status, migration_status.schema
-                            )
-                        return TableMigrationResult(
-                            table=table,
-                            status="success",
-                            rows_migrated=raw_result.get("rows_migrated", 0),
-                            duration=duration,
+                    if migration_status is not None:
+                        migration_status.store_success("tables", table)
+                    if transaction_id and migration_status is not None:
+                        save_migration_status_to_couchdb(
+                            transaction_id, migration_status.status, migration_status.schema
                         )
-                    else:
-                        last_error = raw_result.get("error")
-                        logger.error(f"[{table}] Attempt {attempt}/{self.config.max_retries} failed: {last_error}")
-                except Exception as e:
-                    last_error = str(e)
-                    logger.error(f"[{table}] Exception on attempt {attempt}/{self.config.max_retries}: {last_error}")
+                    return TableMigrationResult(
+                        table=table,
+                        status="success",
+                        rows_migrated=raw_result.get("rows_migrated", 0),
+                        duration=duration,
+                        bytes_migrated=metrics.get("bytes", 0),
+                        attempts=attempt,
+                        metrics=metrics,
+                    )
+                else:
+                    last_error = raw_result.get("error")
+                    logger.error(f"[{table}] Attempt {attempt}/{self.config.max_retries} failed: {last_error}")
+            except Exception as e:
+                last_error = str(e)
+                logger.error(f"[{table}] Exception on attempt {attempt}/{self.config.max_retries}: {last_error}")
 
 
-                if attempt < self.config.max_retries:
-                    time.sleep(3)
+            if attempt < self.config.max_retries:
+                time.sleep(3)
 
 
-            if migration_status is not None:
-                migration_status.store_error("tables", table)
+        record_table_run(
+            source_type=source_type, source_schema=source_schema, target_schema=target_schema,
+            table=table, status="failed", retries=retries + self.config.max_retries - 1,
+            run_id=transaction_id, error=last_error,
+        )
+        if migration_status is not None:
+            migration_status.store_error("tables", table)
             if transaction_id:
                 save_migration_status_to_couchdb(transaction_id, migration_status.status, migration_status.schema)
 
 
-            return TableMigrationResult(
-                table=table,
-                status="failed",
-                error=last_error,
-                rows_migrated=0,
-                duration=0.0,
-            )
-
-
-        with ThreadPoolExecutor(max_workers=self.config.data_migration_workers) as executor:
-            futures = {executor.submit(migrate_single_table_with_retries, table): table for table in tables}
-            for future in as_completed(futures):
-                table = futures[future]
-                try:
-                    result = future.result()
-                    results[table] = result
-                    completed = len(results)
-                    progress = (completed / len(tables)) * 100
-                    logger.info(f"📈 Progress: {progress:.1f}% ({completed}/{len(tables)})")
-                except Exception as e:
-                    logger.error(f"❌ Migration task failed for {table}: {e}")
-                    results[table] = TableMigrationResult(table=table, status="failed", error=str(e))
-                    if migration_status is not None:
-                        migration_status.store_error("tables", table)
-                        if transaction_id:
-                            save_migration_status_to_couchdb(transaction_id, migration_status.status, migration_status.schema)
-        return results
+        return TableMigrationResult(
+            table=table,
+            status="failed",
+            error=last_error,
+            rows_migrated=0,
+            duration=0.0,
+            attempts=self.config.max_retries,
+        )
 
 
     def _verify_migration_parallel(
         self,
         target_schema: str,
         migration_results: Dict[str, TableMigrationResult],
+        source_type: Optional[str] = None,
+        source_schema: Optional[str] = None,
     ):
         if not self.config.enable_validation:
             return
-        logger.info("🔍 Verifying migration...")
+        sample = self.config.validation_mode == "sample" and source_type and source_schema
+        logger.info(f"🔍 Verifying migration ({'row counts and samples' if sample else 'row counts'})...")
+        workers = self.config.table_creation_workers
+        if sample:
+            target_creds = get_target_credentials()
+            source_pool = ConnectionPool(lambda: get_source_conn(source_type), workers)
+            target_pool = ConnectionPool(lambda: get_db2_connection(target_creds), workers)
 
 
         def verify_table(table: str, result: TableMigrationResult):
@@ -412,26 +684,50 @@ class OptimizedSchemaMigrator:
                 if result.status != "success":
                     return
                 target_count = get_table_row_count(target_schema, table)
-                if target_count == result.rows_migrated:
+                if target_count != result.rows_migrated:
+                    result.verified = False
+                    logger.warning(
+                        f"⚠️ {table}: Count mismatch - expected {result.rows_migrated:,}, got {target_count:,}"
+                    )
+                    return
+                if not sample:
                     result.verified = True
                     logger.debug(f"✅ {table}: Verified {target_count:,} rows")
+                    return
+                with source_pool.connection() as source_conn, target_pool.connection() as target_conn:
+                    result.validation = compare_table_sample(
+                        f"{source_schema}.{table}", source_type, source_conn, target_conn,
+                        confidence=self.config.sample_confidence, target_schema=target_schema,
+                        source_row_count=result.rows_migrated, target_row_count=target_count,
+                    )
+                result.verified = result.validation["match"]
+                if result.verified:
+                    logger.debug(
+                        f"✅ {table}: Verified {target_count:,} rows, "
+                        f"{result.validation.get('sampled_rows', 0):,} sampled rows match"
+                    )
                 else:
-                    result.verified = False
                     logger.warning(
-                        f"⚠️ {table}: Count mismatch - expected {result.rows_migrated:,}, got {target_count:,}"
+                        f"⚠️ {table}: {result.validation.get('mismatches', 0)} of "
+                        f"{result.validation.get('sampled_rows', 0)} sampled rows differ"
                     )
             except Exception as e:
                 logger.warning(f"⚠️ Verification failed for {table}: {e}")
                 result.verified = False
 
 
-        with ThreadPoolExecutor(max_workers=self.config.table_creation_workers) as executor:
-            futures = []
-            for table, result in migration_results.items():
-                if result.status == "success":
-                    futures.append(executor.submit(verify_table, table, result))
-            for future in as_completed(futures):
-                future.result()
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = []
+                for table, result in migration_results.items():
+                    if result.status == "success":
+                        futures.append(executor.submit(verify_table, table, result))
+                for future in as_completed(futures):
+                    future.result()
+        finally:
+            if sample:
+                source_pool.close()
+                target_pool.close()
         verified_count = sum(1 for r in migration_results.values() if r.verified)
         total_successful = sum(1 for r in migration_results.values() if r.status == "success")
         logger.info(f"✅ Verification: {verified_count}/{total_successful} tables verified")
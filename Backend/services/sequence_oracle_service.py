@@ -1,9 +1,8 @@
 import os
 from decimal import Decimal
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from connections.oracle_connection import get_oracle_connection
-from services.db2_service import check_schema_exists, create_schema_if_not_exists, execute_db2_ddl
+from services.db2_service import check_schema_exists, create_db2_sequences, create_schema_if_not_exists
 from utils.ddl_writer import save_ddl
 from utils.couchdb_helpers import save_migration_status_to_couchdb
 
@@ -38,7 +37,8 @@ def convert_sequences_from_oracle(
     """
     Convert and migrate sequences from Oracle to DB2,
     restricted to sequences listed in custom MAXSEQUENCE table.
-    Performs per-sequence saving of migration status to CouchDB.
+    Existing DB2 sequences are read in one catalog query, missing ones created in
+    batches, and the migration status saved to CouchDB in one update.
     """
     ensure_ddl_dir()
     sequences = []
@@ -74,9 +74,11 @@ def convert_sequences_from_oracle(
         if not create_schema_if_not_exists(final_schema):
             final_schema = db2_details.get("username", schema).upper()
 
-    def process_sequence(row):
+    prepared = {}
+    for row in sequence_rows:
         name, min_val, max_val, inc, cycle, order, cache, last = row
         result = {"sequence": name}
+        sequences.append(result)
         try:
             min_val = int(Decimal(min_val or 1))
             max_val = int(Decimal(max_val or DB2_MAX))
@@ -112,53 +114,46 @@ NO ORDER;"""
             save_ddl("source", schema, name, oracle_ddl, object_type="sequence")
             save_ddl("target", final_schema, name, db2_ddl, object_type="sequence")
 
-            check_sql = f"SELECT 1 FROM SYSCAT.SEQUENCES WHERE SEQNAME = '{name.upper()}' AND SEQSCHEMA = '{final_schema}'"
-            if not execute_db2_ddl(check_sql, expect_result=True):
-                if not execute_db2_ddl(db2_ddl):
-                    raise Exception(f"Execution failed for DB2 sequence: {final_schema}.{name}")
-            else:
-                result["skipped_existing"] = True
-
             result.update({
-                "created_in_db2": True,
                 "oracle_statement": oracle_ddl,
                 "statement": db2_ddl,
                 "oracle_current_value": last,
                 "db2_start_value": start_with,
                 "db2_schema": final_schema,
             })
-
-            if transaction_id:
-                # Save success immediately to CouchDB
-                save_migration_status_to_couchdb(
-                    transaction_id,
-                    {"sequences": {"success": [name], "error": []}},
-                    schema,
-                )
-
+            prepared[name] = db2_ddl
         except Exception as e:
+            result.update({"created_in_db2": False, "error": str(e)})
+
+    # 3. One catalog probe for what already exists, batched CREATEs for the rest
+    try:
+        outcomes = create_db2_sequences(final_schema, prepared) if prepared else {}
+    except Exception as e:
+        outcomes = {name: {"status": "failed", "error": str(e)} for name in prepared}
+
+    for result in sequences:
+        outcome = outcomes.get(result["sequence"])
+        if outcome is None:
+            continue
+        if outcome["status"] == "failed":
             result.update({
                 "created_in_db2": False,
-                "error": str(e),
+                "error": outcome["error"] or f"Execution failed for DB2 sequence: {final_schema}.{result['sequence']}",
             })
+        else:
+            result["created_in_db2"] = True
+            if outcome["status"] == "exists":
+                result["skipped_existing"] = True
 
-            if transaction_id:
-                # Save error immediately to CouchDB
-                save_migration_status_to_couchdb(
-                    transaction_id,
-                    {"sequences": {"success": [], "error": [name]}},
-                    schema,
-                )
-
-        return result
-
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = [executor.submit(process_sequence, row) for row in sequence_rows]
-        for future in as_completed(futures):
-            try:
-                sequences.append(future.result())
-            except Exception:
-                # Optional: log here
-                pass
+    if transaction_id and sequences:
+        # One status update for the whole stage
+        save_migration_status_to_couchdb(
+            transaction_id,
+            {"sequences": {
+                "success": [r["sequence"] for r in sequences if r.get("created_in_db2")],
+                "error": [r["sequence"] for r in sequences if not r.get("created_in_db2")],
+            }},
+            schema,
+        )
 
     return sequences
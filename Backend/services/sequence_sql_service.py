@@ -1,9 +1,8 @@
 import os
 from decimal import Decimal
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from connections.sql_connection import get_sql_connection
-from services.db2_service import check_schema_exists, create_schema_if_not_exists, execute_db2_ddl
+from services.db2_service import check_schema_exists, create_db2_sequences, create_schema_if_not_exists
 from utils.ddl_writer import save_ddl
 from utils.couchdb_helpers import save_migration_status_to_couchdb
 
@@ -51,6 +50,30 @@ def get_sequence_metadata(seq_name: str, schema: str, sql_creds: dict):
         conn.close()
 
 
+def fetch_sequence_metadata(schema: str, sql_creds: dict) -> dict:
+    """
+    Metadata of every sequence in the schema from sys.sequences, in one query.
+    Returns {UPPER name: row} with rows shaped like `get_sequence_metadata`.
+    """
+    conn = get_sql_connection(sql_creds)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            """
+            SELECT name, CAST(start_value AS BIGINT), CAST(increment AS BIGINT),
+                   CAST(minimum_value AS BIGINT), CAST(maximum_value AS BIGINT),
+                   is_cycling, cache_size, CAST(current_value AS BIGINT)
+            FROM sys.sequences
+            WHERE schema_id = SCHEMA_ID(?)
+            """,
+            (schema,),
+        )
+        return {row[0].upper(): row for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+        conn.close()
+
+
 def convert_sequences_from_mssql(
     sql_creds: dict,
     db2_creds: dict,
@@ -59,6 +82,8 @@ def convert_sequences_from_mssql(
 ):
     """
     Convert and migrate sequences defined in MAXSEQUENCE from MS SQL Server to Db2.
+    Source metadata and existing Db2 sequences are each read with one query, missing
+    sequences created in batches, and the status saved to CouchDB in one update.
     """
     sequence_names = list_sequences_from_mssql(sql_creds, schema)
     if not sequence_names:
@@ -69,12 +94,17 @@ def convert_sequences_from_mssql(
         if not create_schema_if_not_exists(final_schema):
             final_schema = db2_creds.get("username", final_schema)
 
+    metadata = fetch_sequence_metadata(schema, sql_creds)
     results = []
+    prepared = {}
 
-    def process(seq_name):
+    for seq_name in sequence_names:
         result = {"sequence": seq_name}
+        results.append(result)
         try:
-            meta = get_sequence_metadata(seq_name, schema, sql_creds)
+            meta = metadata.get(seq_name.upper())
+            if not meta:
+                raise ValueError(f"Metadata not found for sequence {seq_name}")
             (name, start_val, inc, min_val, max_val, cycle, cache, current_val) = meta
 
             inc = int(inc or 1)
@@ -106,17 +136,6 @@ MAXVALUE {max_val}
             save_ddl("source", schema, name, oracle_ddl, "sequence")
             save_ddl("target", final_schema, name, db2_ddl, "sequence")
 
-            check_sql = f"SELECT 1 FROM syscat.sequences WHERE seqname = '{name.upper()}' AND seqschema = '{final_schema}'"
-            exists = execute_db2_ddl(check_sql, expect_result=True)
-
-            if exists and len(exists) > 0:
-                result["skipped"] = True
-                result["created"] = False
-            else:
-                if not execute_db2_ddl(db2_ddl):
-                    raise RuntimeError(f"Failed to create sequence {name} in Db2")
-                result["created"] = True
-
             result.update({
                 "db2_ddl": db2_ddl,
                 "start_with": start_with,
@@ -126,36 +145,39 @@ MAXVALUE {max_val}
                 "minvalue": min_val,
                 "maxvalue": max_val,
             })
-
-            if transaction_id:
-                save_migration_status_to_couchdb(
-                    transaction_id,
-                    {
-                        "sequences": {
-                            "success": [name] if result["created"] or result.get("skipped") else [],
-                            "error": [] if result["created"] or result.get("skipped") else [name],
-                        }
-                    },
-                    schema,
-                )
-
+            prepared[seq_name] = db2_ddl
         except Exception as e:
             result.update({"created": False, "error": str(e)})
-            if transaction_id:
-                save_migration_status_to_couchdb(
-                    transaction_id,
-                    {"sequences": {"success": [], "error": [seq_name]}},
-                    schema,
-                )
-
-        return result
-
-    with ThreadPoolExecutor(max_workers=32) as executor:
-        futures = [executor.submit(process, seq_name) for seq_name in sequence_names]
-        for future in as_completed(futures):
-            try:
-                results.append(future.result())
-            except Exception:
-                pass
+
+    try:
+        outcomes = create_db2_sequences(final_schema, prepared) if prepared else {}
+    except Exception as e:
+        outcomes = {name: {"status": "failed", "error": str(e)} for name in prepared}
+
+    for result in results:
+        outcome = outcomes.get(result["sequence"])
+        if outcome is None:
+            continue
+        if outcome["status"] == "exists":
+            result["skipped"] = True
+            result["created"] = False
+        elif outcome["status"] == "created":
+            result["created"] = True
+        else:
+            result.update({
+                "created": False,
+                "error": outcome["error"] or f"Failed to create sequence {result['sequence']} in Db2",
+            })
+
+    if transaction_id:
+        done = [bool(r.get("created") or r.get("skipped")) for r in results]
+        save_migration_status_to_couchdb(
+            transaction_id,
+            {"sequences": {
+                "success": [r["sequence"] for r, ok in zip(results, done) if ok],
+                "error": [r["sequence"] for r, ok in zip(results, done) if not ok],
+            }},
+            schema,
+        )
 
     return results
@@ -0,0 +1,348 @@
+# services/sql_rewrite.py
+import re
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+# One alternation, one left-to-right scan: the converters never re-read a statement per rule.
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>[Nn]?'(?:[^']|'')*(?:'|\Z))
+  | (?P<qident>"(?:[^"]|"")*(?:"|\Z)|\[[^\]]*(?:\]|\Z))
+  | (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?)
+  | (?P<word>[^\W\d][\w$#@]*|[@#][\w$#@]*)
+  | (?P<op>:=|=>|<>|!=|<=|>=|\|\||.)
+""", re.VERBOSE | re.DOTALL)
+
+_TRIVIA = ("ws", "comment")
+
+
+class Token(NamedTuple):
+    kind: str   # ws, comment, string, qident, number, word, op
+    text: str
+    depth: int  # parenthesis depth; '(' and ')' carry the depth outside them
+
+    @property
+    def upper(self) -> str:
+        return self.text.upper() if self.kind in ("word", "op") else self.text
+
+    @property
+    def name(self) -> str:
+        """Identifier without quoting: [a b] / "a b" -> a b, abc -> ABC (unquoted names fold to upper case)."""
+        if self.kind == "qident":
+            return self.text[1:-1].replace('""', '"') if self.text[0] == '"' else self.text[1:-1]
+        return self.text.upper()
+
+    @property
+    def is_name(self) -> bool:
+        return self.kind in ("word", "qident")
+
+
+def tokenize(sql: str) -> List[Token]:
+    tokens = []
+    depth = 0
+    for m in _TOKEN_RE.finditer(sql or ""):
+        text = m.group()
+        if text == ")":
+            depth = max(0, depth - 1)
+        tokens.append(Token(m.lastgroup, text, depth))
+        if text == "(":
+            depth += 1
+    return tokens
+
+
+class TokenList:
+    """Tokens of one statement plus the lookups the matcher needs, all built in one pass each."""
+
+    def __init__(self, source: Union[str, Sequence[Token]]):
+        self.tokens: List[Token] = tokenize(source) if isinstance(source, str) else list(source)
+        n = len(self.tokens)
+        self.next_sig = [n] * (n + 1)
+        for i in range(n - 1, -1, -1):
+            self.next_sig[i] = i if self.tokens[i].kind not in _TRIVIA else self.next_sig[i + 1]
+        self.close: Dict[int, int] = {}
+        stack = []
+        for i, tok in enumerate(self.tokens):
+            if tok.text == "(":
+                stack.append(i)
+            elif tok.text == ")" and stack:
+                self.close[stack.pop()] = i
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def __getitem__(self, i):
+        return self.tokens[i]
+
+    def significant(self, start: int = 0, end: Optional[int] = None) -> List[int]:
+        end = len(self.tokens) if end is None else end
+        result = []
+        i = self.next_sig[start]
+        while i < end:
+            result.append(i)
+            i = self.next_sig[i + 1]
+        return result
+
+    def find(self, words: Union[str, Iterable[str]], start: int = 0, end: Optional[int] = None,
+             depth: Optional[int] = None) -> int:
+        """Index of the first significant token in `words` (at `depth`, if given), or -1."""
+        words = {words} if isinstance(words, str) else set(words)
+        for i in self.significant(start, end):
+            tok = self.tokens[i]
+            if tok.upper in words and (depth is None or tok.depth == depth):
+                return i
+        return -1
+
+    def split(self, sep: str = ",", start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+        """(start, end) ranges between `sep` tokens at the depth of the range's first token."""
+        end = len(self.tokens) if end is None else end
+        first = self.next_sig[start]
+        if first >= end:
+            return []
+        depth = self.tokens[first].depth
+        parts, begin = [], start
+        for i in self.significant(start, end):
+            if self.tokens[i].text == sep and self.tokens[i].depth == depth:
+                parts.append((begin, i))
+                begin = i + 1
+        parts.append((begin, end))
+        return parts
+
+    def text(self, start: int = 0, end: Optional[int] = None, collapse: bool = False) -> str:
+        return render(self.tokens[start:end], collapse=collapse)
+
+
+def render(tokens: Iterable[Token], collapse: bool = False, brackets_to_quotes: bool = False) -> str:
+    """
+    Join tokens back into SQL. `collapse` turns runs of whitespace into one space and line
+    comments into block comments (so they survive being joined onto one line); string
+    literals are never touched.
+    """
+    out = []
+    for tok in tokens:
+        text = _emit(tok, collapse, brackets_to_quotes)
+        if not (collapse and text == " " and out and out[-1] == " "):
+            out.append(text)
+    text = "".join(out)
+    return text.strip() if collapse else text
+
+
+def _emit(tok: Token, collapse: bool, brackets_to_quotes: bool) -> str:
+    if collapse and tok.kind == "ws":
+        return " "
+    if collapse and tok.kind == "comment" and tok.text.startswith("--"):
+        return "/* " + tok.text[2:].strip().replace("*/", "* /") + " */"
+    if brackets_to_quotes and tok.kind == "qident" and tok.text.startswith("["):
+        return '"' + tok.name.replace('"', '""') + '"'
+    return tok.text
+
+
+# ── patterns ──
+class _Kind(NamedTuple):
+    kinds: Tuple[str, ...]
+
+
+NAME = _Kind(("word", "qident"))
+NUMBER = _Kind(("number",))
+STRING = _Kind(("string",))
+ANY = _Kind(())
+
+
+def _normalize(items: Sequence) -> Tuple:
+    return tuple(
+        i.upper() if isinstance(i, str) else frozenset(w.upper() for w in i) if isinstance(i, (set, frozenset)) else i
+        for i in items
+    )
+
+
+class _Group:
+    def __repr__(self):
+        return "GROUP"
+
+
+GROUP = _Group()
+
+
+class Opt:
+    """Items that either all match or are skipped together."""
+
+    def __init__(self, *items):
+        self.items = _normalize(items)
+
+
+class Until:
+    """Everything up to (not including) a stop word at the same depth, a closing ')' or the end."""
+
+    def __init__(self, *stops):
+        self.stops = tuple(s.upper() for s in stops)
+
+
+class Match:
+    def __init__(self, rewriter: "Rewriter", tl: TokenList, spans: List[Tuple[int, int]], end: int):
+        self.rewriter = rewriter
+        self.tl = tl
+        self.spans = spans
+        self.end = end
+
+    def tokens(self, k: int) -> List[Token]:
+        start, end = self.spans[k]
+        return [self.tl[i] for i in self.tl.significant(start, end)]
+
+    def name(self, k: int) -> str:
+        toks = self.tokens(k)
+        return toks[0].name if toks else ""
+
+    def matched(self, k: int) -> bool:
+        start, end = self.spans[k]
+        return end > start
+
+    def text(self, k: int) -> str:
+        """Span `k` with the rewriter's rules applied to it as well."""
+        start, end = self.spans[k]
+        return self.rewriter.rewrite_range(self.tl, start, end).strip()
+
+
+Replacement = Union[str, Callable[[Match], str]]
+
+
+class Rule:
+    """
+    `pattern` is a sequence of items matched against significant tokens (whitespace and
+    comments between them are skipped): a keyword or operator string, a set of alternative
+    keywords, NAME, NUMBER,
+    STRING, ANY, GROUP (a balanced parenthesis group), Opt(...) or Until(...).
+    `replace` is the replacement text or a callable taking the Match. `depth` limits the
+    rule to tokens at that parenthesis depth.
+    """
+
+    def __init__(self, pattern: Sequence, replace: Replacement = "", depth: Optional[int] = None):
+        self.pattern = _normalize(pattern)
+        self.replace = replace
+        self.depth = depth
+
+    def first_keys(self) -> Optional[Tuple[str, ...]]:
+        """Dispatch keys for the first item; None means the rule has to be tried everywhere."""
+        first = self.pattern[0]
+        if isinstance(first, str):
+            return (first,)
+        if isinstance(first, frozenset):
+            return tuple(first)
+        if first is GROUP:
+            return ("(",)
+        if isinstance(first, _Kind) and first.kinds:
+            return tuple("<" + k + ">" for k in first.kinds)
+        return None
+
+
+def _match_items(tl: TokenList, i: int, items: Sequence, spans: List[Tuple[int, int]]) -> Optional[int]:
+    n = len(tl)
+    for item in items:
+        j = tl.next_sig[i]
+        if isinstance(item, Opt):
+            sub: List[Tuple[int, int]] = []
+            end = _match_items(tl, i, item.items, sub)
+            if end is None:
+                spans.append((i, i))
+            else:
+                spans.append((j, end))
+                i = end
+            continue
+        if isinstance(item, Until):
+            if j >= n:
+                spans.append((i, i))
+                continue
+            depth = tl[j].depth
+            k = j
+            while k < n:
+                tok = tl[k]
+                if tok.kind not in _TRIVIA and (
+                    (tok.depth == depth and tok.upper in item.stops) or (tok.text == ")" and tok.depth < depth)
+                ):
+                    break
+                k += 1
+            spans.append((j, k))
+            i = k
+            continue
+        if j >= n:
+            return None
+        tok = tl[j]
+        if item is GROUP:
+            if tok.text != "(":
+                return None
+            end = tl.close.get(j, n - 1) + 1
+        elif isinstance(item, _Kind):
+            if item.kinds and tok.kind not in item.kinds:
+                return None
+            end = j + 1
+        elif isinstance(item, frozenset):
+            if tok.kind not in ("word", "op") or tok.upper not in item:
+                return None
+            end = j + 1
+        elif tok.kind in ("word", "op") and tok.upper == item:
+            end = j + 1
+        else:
+            return None
+        spans.append((j, end))
+        i = end
+    return i
+
+
+class Rewriter:
+    """
+    Applies rules in one left-to-right pass over a token stream. At each significant
+    token only the rules whose first item can match it are tried (looked up by keyword
+    or token kind); the first rule that matches replaces its span and scanning resumes
+    after it, so every token is visited once and the cost is linear in the DDL size.
+    Replacement output is not rescanned.
+    """
+
+    def __init__(self, rules: Sequence[Rule], collapse: bool = False, brackets_to_quotes: bool = False):
+        self.collapse = collapse
+        self.brackets_to_quotes = brackets_to_quotes
+        self._by_key: Dict[str, List[Rule]] = {}
+        self._anywhere: List[Rule] = []
+        for rule in rules:
+            keys = rule.first_keys()
+            if keys is None:
+                self._anywhere.append(rule)
+            for key in keys or ():
+                self._by_key.setdefault(key, []).append(rule)
+
+    def _candidates(self, tok: Token) -> List[Rule]:
+        found = self._by_key.get(tok.upper, []) + self._by_key.get("<" + tok.kind + ">", [])
+        return found + self._anywhere if self._anywhere else found
+
+    def rewrite(self, source: Union[str, TokenList]) -> str:
+        tl = source if isinstance(source, TokenList) else TokenList(source)
+        text = self.rewrite_range(tl, 0, len(tl))
+        return text.strip() if self.collapse else text
+
+    def rewrite_range(self, tl: TokenList, start: int, end: int) -> str:
+        out = []
+        i = start
+        while i < end:
+            tok = tl[i]
+            if tok.kind == "ws" and self.collapse:
+                # Removed spans leave their surrounding whitespace behind; keep one space.
+                if out and not out[-1].endswith(" "):
+                    out.append(" ")
+                i += 1
+                continue
+            if tok.kind not in _TRIVIA:
+                match = None
+                for rule in self._candidates(tok):
+                    if rule.depth is not None and tok.depth != rule.depth:
+                        continue
+                    spans: List[Tuple[int, int]] = []
+                    stop = _match_items(tl, i, rule.pattern, spans)
+                    if stop is not None and stop <= end:
+                        match = Match(self, tl, spans, stop)
+                        text = rule.replace(match) if callable(rule.replace) else rule.replace
+                        if text:
+                            out.append(text)
+                        i = stop
+                        break
+                if match is not None:
+                    continue
+            out.append(_emit(tok, self.collapse, self.brackets_to_quotes))
+            i += 1
+        return "".join(out)
@@ -1,8 +1,9 @@
 # services/sql_service.py
 import logging
 import pyodbc
-from typing import List, Dict, Any, Generator, Union
+from typing import List, Dict, Any, Generator, Optional, Union
 from utils.credentials_store import load_credentials
+from services.metadata_cache import get_metadata_cache, source_key
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -58,7 +59,86 @@ def fetch_tables(schema: str) -> List[str]:
         cursor.close()
         conn.close()
 
-def fetch_table_metadata(schema: str, table: str) -> List[Dict[str, Any]]:
+def _column_entry(row) -> Dict[str, Any]:
+    return {
+        "column_name": row[0],
+        "data_type": row[1],
+        "character_maximum_length": row[2],
+        "is_nullable": row[3],
+        "numeric_precision": row[4],
+        "numeric_scale": row[5]
+    }
+
+
+def _maxobject_filter(schema: str, column: str) -> str:
+    return f"UPPER({column}) IN (SELECT UPPER(OBJECTNAME) FROM [{schema}].[MAXOBJECT])"
+
+
+def _fetch_ddl_times(schema: str) -> Dict[str, str]:
+    conn = get_sql_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT o.name, CONVERT(varchar(33), o.modify_date, 126)
+            FROM sys.objects o
+            WHERE o.type = 'U' AND SCHEMA_NAME(o.schema_id) = ?
+            AND {_maxobject_filter(schema, 'o.name')}
+        """, (schema,))
+        return {row[0].upper(): row[1] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _fetch_all_metadata_for_schema(schema: str, tables: Optional[List[str]] = None) -> dict:
+    """Columns of every MAXOBJECT table in the schema (or just `tables`), in one round trip."""
+    conn = get_sql_connection()
+    cursor = conn.cursor()
+    metadata = {}
+    try:
+        if tables is None:
+            filters = [(_maxobject_filter(schema, "c.TABLE_NAME"), ())]
+        else:
+            # SQL Server allows at most 2100 parameters per statement.
+            filters = [
+                (f"UPPER(c.TABLE_NAME) IN ({', '.join('?' for _ in chunk)})", tuple(t.upper() for t in chunk))
+                for chunk in (tables[i:i + 2000] for i in range(0, len(tables), 2000))
+            ]
+        for table_filter, params in filters:
+            cursor.execute(f"""
+                SELECT c.TABLE_NAME, c.COLUMN_NAME, c.DATA_TYPE, c.CHARACTER_MAXIMUM_LENGTH, c.IS_NULLABLE,
+                       c.NUMERIC_PRECISION, c.NUMERIC_SCALE
+                FROM INFORMATION_SCHEMA.COLUMNS c
+                JOIN INFORMATION_SCHEMA.TABLES t
+                  ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME AND t.TABLE_TYPE = 'BASE TABLE'
+                WHERE c.TABLE_SCHEMA = ?
+                AND {table_filter}
+                ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION
+            """, (schema, *params))
+            for row in cursor.fetchall():
+                metadata.setdefault(row[0].upper(), []).append(_column_entry(row[1:]))
+    finally:
+        cursor.close()
+        conn.close()
+    return metadata
+
+
+def fetch_schema_metadata(schema: str, refresh: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Schema-level column snapshot (MAXOBJECT tables only), shared by DDL generation,
+    data extraction and validation. Backed by the on-disk metadata cache; `refresh=True`
+    re-validates it against sys.objects.modify_date.
+    """
+    schema_up = schema.upper()
+    return get_metadata_cache().get_schema(
+        source_key("sql", load_credentials("sql")), schema_up,
+        load_ddl_times=lambda: _fetch_ddl_times(schema_up),
+        load_columns=lambda tables: _fetch_all_metadata_for_schema(schema_up, tables),
+        refresh=refresh,
+    )
+
+
+def _fetch_table_metadata_direct(schema: str, table: str) -> List[Dict[str, Any]]:
     conn = get_sql_connection()
     cursor = conn.cursor()
     try:
@@ -68,36 +148,32 @@ def fetch_table_metadata(schema: str, table: str) -> List[Dict[str, Any]]:
             WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ?
             ORDER BY ORDINAL_POSITION
         """, (schema.upper(), table.upper()))
-        return [{
-            "column_name": row[0],
-            "data_type": row[1],
-            "character_maximum_length": row[2],
-            "is_nullable": row[3],
-            "numeric_precision": row[4],
-            "numeric_scale": row[5]
-            } for row in cursor.fetchall()]
+        return [_column_entry(row) for row in cursor.fetchall()]
     finally:
         cursor.close()
         conn.close()
 
-def fetch_table_data_generator(schema: str, table: str, count_only=False, batch_size=1000) -> Union[int, Generator[List[Dict[str, Any]], None, None]]:
+
+def fetch_table_metadata(schema: str, table: str) -> List[Dict[str, Any]]:
+    metadata = fetch_schema_metadata(schema).get(table.upper())
+    if metadata is None:
+        # Not a MAXOBJECT table; look it up on its own.
+        return _fetch_table_metadata_direct(schema, table)
+    return metadata
+
+def fetch_table_data_generator(schema: str, table: str, batch_size=1000) -> Generator[List[Dict[str, Any]], None, None]:
     conn = get_sql_connection()
     cursor = conn.cursor()
     try:
-        if count_only:
-            cursor.execute(f"SELECT COUNT(*) FROM [{schema}].[{table}]")
-            row = cursor.fetchone()
-            return int(row[0]) if row else 0
-        cursor.execute("""
-            SELECT COLUMN_NAME, DATA_TYPE FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ?
-        """, (schema.upper(), table.upper()))
-        cols_info = cursor.fetchall()
-        columns = [col[0] for col in cols_info]
-        type_map = {col[0]: col[1] for col in cols_info}
+        cols_info = fetch_table_metadata(schema, table)
+        columns = [col["column_name"] for col in cols_info]
+        type_map = {col["column_name"]: col["data_type"] for col in cols_info}
+        # Select the columns explicitly so values line up with the snapshot's column order.
+        select_list = ", ".join(f"[{col}]" for col in columns) or "*"
         offset = 0
         while True:
             query = f"""
-                SELECT * FROM [{schema}].[{table}]
+                SELECT {select_list} FROM [{schema}].[{table}]
                 ORDER BY (SELECT NULL)
                 OFFSET {offset} ROWS FETCH NEXT {batch_size} ROWS ONLY
             """
@@ -118,7 +194,79 @@ def fetch_table_data_generator(schema: str, table: str, count_only=False, batch_
         conn.close()
 
 def get_table_row_count(schema: str, table: str) -> int:
-    return fetch_table_data_generator(schema, table, count_only=True)
+    # Not through fetch_table_data_generator: that is a generator, so it can't return a count.
+    conn = get_sql_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM [{schema}].[{table}]")
+        row = cursor.fetchone()
+        return int(row[0]) if row else 0
+    finally:
+        cursor.close()
+        conn.close()
+
+def fetch_table_stats(schema: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Row counts and used space for every table in the schema from sys.dm_db_partition_stats
+    (one query). Falls back to sys.partitions row counts without VIEW DATABASE STATE.
+    """
+    conn = get_sql_connection()
+    cursor = conn.cursor()
+    try:
+        try:
+            cursor.execute("""
+                SELECT t.name, SUM(p.row_count), SUM(p.used_page_count) * 8192
+                FROM sys.dm_db_partition_stats p
+                JOIN sys.tables t ON t.object_id = p.object_id
+                WHERE SCHEMA_NAME(t.schema_id) = ? AND p.index_id IN (0, 1)
+                GROUP BY t.name
+            """, (schema.upper(),))
+            rows = cursor.fetchall()
+        except pyodbc.Error as e:
+            logger.warning(f"dm_db_partition_stats unavailable for {schema}, using sys.partitions: {e}")
+            cursor.execute("""
+                SELECT t.name, SUM(p.rows), NULL
+                FROM sys.partitions p
+                JOIN sys.tables t ON t.object_id = p.object_id
+                WHERE SCHEMA_NAME(t.schema_id) = ? AND p.index_id IN (0, 1)
+                GROUP BY t.name
+            """, (schema.upper(),))
+            rows = cursor.fetchall()
+        stats = {}
+        for name, row_count, used_bytes in rows:
+            row_count = int(row_count or 0)
+            used_bytes = int(used_bytes) if used_bytes is not None else None
+            stats[name.upper()] = {
+                "rows": row_count,
+                "avg_row_bytes": used_bytes // row_count if used_bytes and row_count else 0,
+                "bytes": used_bytes,
+                "last_analyzed": None,
+            }
+        return stats
+    finally:
+        cursor.close()
+        conn.close()
+
+def fetch_nonempty_tables(schema: str, tables: List[str], chunk_size: int = 100) -> set:
+    """Which of `tables` hold at least one row, probed with EXISTS in one UNION ALL query per chunk."""
+    if not tables:
+        return set()
+    conn = get_sql_connection()
+    cursor = conn.cursor()
+    try:
+        found = set()
+        for i in range(0, len(tables), chunk_size):
+            chunk = tables[i:i + chunk_size]
+            sql = " UNION ALL ".join(
+                f"SELECT '{t.upper()}' WHERE EXISTS (SELECT 1 FROM [{schema}].[{t}])"
+                for t in chunk
+            )
+            cursor.execute(sql)
+            found.update(row[0] for row in cursor.fetchall())
+        return found
+    finally:
+        cursor.close()
+        conn.close()
 
 def fetch_sequences(schema: str) -> List[str]:
     conn = get_sql_connection()
@@ -0,0 +1,231 @@
+# services/throughput_history.py
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DB_PATH = os.getenv(
+    "MIGRATION_HISTORY_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migration_history.sqlite3"),
+)
+APP_VERSION = os.getenv("APP_VERSION", "dev")
+
+# How many recent successful runs are averaged when predicting a table's throughput.
+HISTORY_WINDOW = int(os.getenv("MIGRATION_HISTORY_WINDOW", "5"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS table_runs (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    recorded_at    REAL    NOT NULL,
+    run_id         TEXT,
+    app_version    TEXT,
+    source_type    TEXT    NOT NULL,
+    source_schema  TEXT    NOT NULL,
+    target_schema  TEXT,
+    table_name     TEXT    NOT NULL,
+    status         TEXT    NOT NULL,
+    rows_migrated  INTEGER DEFAULT 0,
+    bytes_migrated INTEGER DEFAULT 0,
+    duration       REAL    DEFAULT 0,
+    rows_per_sec   REAL,
+    bytes_per_sec  REAL,
+    fetch_time     REAL,
+    sanitize_time  REAL,
+    insert_time    REAL,
+    commit_time    REAL,
+    batch_size     INTEGER,
+    workers        INTEGER,
+    retries        INTEGER DEFAULT 0,
+    error          TEXT,
+    load_digest    TEXT,
+    digest_rows    INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_table_runs_lookup
+    ON table_runs (source_type, source_schema, table_name, recorded_at);
+"""
+# Columns added after the first release; older history files get them on open.
+_ADDED_COLUMNS = {"load_digest": "TEXT", "digest_rows": "INTEGER"}
+
+
+def _source_key(source_type: str) -> str:
+    source_type = (source_type or "").lower()
+    return "sql" if source_type in ("sql", "sqlserver", "mssql") else source_type
+
+
+class ThroughputHistory:
+    """
+    Local SQLite store of per-table load metrics. Every table migration appends one row;
+    the planner reads recent successful runs back to predict throughput.
+    """
+
+    def __init__(self, path: str = HISTORY_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+            existing = {r["name"] for r in self._conn.execute("PRAGMA table_info(table_runs)")}
+            for name, sql_type in _ADDED_COLUMNS.items():
+                if name not in existing:
+                    self._conn.execute(f"ALTER TABLE table_runs ADD COLUMN {name} {sql_type}")
+            self._conn.commit()
+
+    def record(
+        self,
+        source_type: str,
+        source_schema: str,
+        target_schema: Optional[str],
+        table: str,
+        status: str,
+        rows_migrated: int = 0,
+        bytes_migrated: int = 0,
+        duration: float = 0.0,
+        metrics: Optional[Dict[str, Any]] = None,
+        retries: int = 0,
+        run_id: Optional[str] = None,
+        error: Optional[str] = None,
+    ):
+        metrics = metrics or {}
+        # Throughput is measured over the load itself, not the DDL / row-count / retry overhead.
+        load_time = metrics.get("load_time") or duration
+        rows_per_sec = rows_migrated / load_time if rows_migrated and load_time else None
+        bytes_per_sec = bytes_migrated / load_time if bytes_migrated and load_time else None
+        row = (
+            time.time(), run_id, APP_VERSION, _source_key(source_type), source_schema.upper(),
+            (target_schema or "").upper() or None, table.upper(), status,
+            rows_migrated, bytes_migrated, duration, rows_per_sec, bytes_per_sec,
+            metrics.get("fetch_time"), metrics.get("sanitize_time"),
+            metrics.get("insert_time"), metrics.get("commit_time"),
+            metrics.get("batch_size"), metrics.get("workers"), retries, error,
+            metrics.get("load_digest"), metrics.get("digest_rows"),
+        )
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO table_runs (
+                       recorded_at, run_id, app_version, source_type, source_schema,
+                       target_schema, table_name, status,
+                       rows_migrated, bytes_migrated, duration, rows_per_sec, bytes_per_sec,
+                       fetch_time, sanitize_time, insert_time, commit_time,
+                       batch_size, workers, retries, error, load_digest, digest_rows
+                   ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                row,
+            )
+            self._conn.commit()
+
+    def table_throughput(self, source_type: str, source_schema: str, window: int = HISTORY_WINDOW) -> Dict[str, Dict[str, float]]:
+        """Average rows/s and bytes/s of the last `window` successful runs, per table."""
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT table_name, AVG(rows_per_sec) AS rows_per_sec, AVG(bytes_per_sec) AS bytes_per_sec,
+                          COUNT(*) AS runs
+                   FROM (
+                       SELECT table_name, rows_per_sec, bytes_per_sec,
+                              ROW_NUMBER() OVER (PARTITION BY table_name ORDER BY recorded_at DESC) AS rn
+                       FROM table_runs
+                       WHERE source_type = ? AND source_schema = ? AND status = 'success'
+                             AND rows_per_sec IS NOT NULL
+                   )
+                   WHERE rn <= ?
+                   GROUP BY table_name""",
+                (_source_key(source_type), source_schema.upper(), window),
+            ).fetchall()
+        return {
+            r["table_name"]: {"rows_per_sec": r["rows_per_sec"], "bytes_per_sec": r["bytes_per_sec"], "runs": r["runs"]}
+            for r in rows
+        }
+
+    def schema_throughput(self, source_type: str, source_schema: str) -> Optional[Dict[str, float]]:
+        """Schema-wide average, used for tables that have never been loaded before."""
+        with self._lock:
+            r = self._conn.execute(
+                """SELECT AVG(rows_per_sec) AS rows_per_sec, AVG(bytes_per_sec) AS bytes_per_sec, COUNT(*) AS runs
+                   FROM table_runs
+                   WHERE source_type = ? AND source_schema = ? AND status = 'success'
+                         AND rows_per_sec IS NOT NULL""",
+                (_source_key(source_type), source_schema.upper()),
+            ).fetchone()
+        if not r or not r["runs"]:
+            return None
+        return {"rows_per_sec": r["rows_per_sec"], "bytes_per_sec": r["bytes_per_sec"], "runs": r["runs"]}
+
+    def latest_status(self, source_type: str, source_schema: str, target_schema: Optional[str] = None) -> Dict[str, str]:
+        """
+        Status of the most recent recorded run of every table in the schema; with
+        `target_schema`, only runs that loaded into that DB2 schema count.
+        """
+        target_filter = " AND target_schema = ?" if target_schema else ""
+        params = (_source_key(source_type), source_schema.upper()) + ((target_schema.upper(),) if target_schema else ())
+        with self._lock:
+            rows = self._conn.execute(
+                f"""SELECT table_name, status FROM (
+                       SELECT table_name, status,
+                              ROW_NUMBER() OVER (PARTITION BY table_name ORDER BY recorded_at DESC) AS rn
+                       FROM table_runs
+                       WHERE source_type = ? AND source_schema = ?{target_filter}
+                   )
+                   WHERE rn = 1""",
+                params,
+            ).fetchall()
+        return {r["table_name"]: r["status"] for r in rows}
+
+    def latest_load_digest(self, source_type: str, source_schema: str, table: str) -> Optional[Dict[str, Any]]:
+        """Digest of the rows committed by the table's most recent successful load, if one was taken."""
+        with self._lock:
+            r = self._conn.execute(
+                """SELECT target_schema, rows_migrated, load_digest, digest_rows, recorded_at, run_id
+                   FROM table_runs
+                   WHERE source_type = ? AND source_schema = ? AND table_name = ? AND status = 'success'
+                   ORDER BY recorded_at DESC LIMIT 1""",
+                (_source_key(source_type), source_schema.upper(), table.upper()),
+            ).fetchone()
+        return dict(r) if r and r["load_digest"] else None
+
+    def recent_runs(
+        self,
+        source_type: Optional[str] = None,
+        source_schema: Optional[str] = None,
+        table: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        clauses, params = [], []
+        if source_type:
+            clauses.append("source_type = ?")
+            params.append(_source_key(source_type))
+        if source_schema:
+            clauses.append("source_schema = ?")
+            params.append(source_schema.upper())
+        if table:
+            clauses.append("table_name = ?")
+            params.append(table.upper())
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM table_runs {where} ORDER BY recorded_at DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+
+_history: Optional[ThroughputHistory] = None
+_history_lock = threading.Lock()
+
+
+def get_throughput_history() -> ThroughputHistory:
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = ThroughputHistory()
+        return _history
+
+
+def record_table_run(**kwargs):
+    """Best-effort write; a broken history file must never fail a migration."""
+    try:
+        get_throughput_history().record(**kwargs)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not record throughput history for {kwargs.get('table')}: {e}")
@@ -1,103 +1,153 @@
 # services/trigger_converter.py
 import re
+import os
+import logging
 import ibm_db
 import time
-from typing import Callable, Optional, Dict
+from typing import Callable, Optional, Dict, Iterable, List, Tuple
 from utils.credentials_store import get_target_credentials
 from utils.ddl_writer import save_ddl
 from utils.couchdb_helpers import save_migration_status_to_couchdb
+from services.db2_catalog import get_target_catalog
+from services.sql_rewrite import NAME, Match, Opt, Rewriter, Rule, TokenList, Until, render
+from services.conversion_cache import get_conversion_cache
+from services.db2_service import (
+    get_db2_connection_fast,
+    close_thread_connection,
+    is_connection_error,
+    is_transient_db2_error,
+)
 
-def execute_db2_trigger_ddl(trigger_ddl: str, max_retries: int = 3) -> bool:
-    for attempt in range(1, max_retries + 1):
-        try:
-            creds = get_target_credentials()
-            dsn = (
-                f"DATABASE={creds['database']};"
-                f"HOSTNAME={creds['host']};"
-                f"PORT={creds['port']};"
-                f"PROTOCOL=TCPIP;"
-                f"UID={creds['username']};"
-                f"PWD={creds['password']};"
-                f"SECURITY={creds.get('security', 'SSL')};"
-            )
-            print(f"[DB2 Connection Attempt {attempt}] Connect {creds['host']}:{creds['port']}")
-            conn = ibm_db.connect(dsn, "", "")
-            ibm_db.set_option(conn, {ibm_db.SQL_ATTR_AUTOCOMMIT: ibm_db.SQL_AUTOCOMMIT_OFF}, 1)
+logger = logging.getLogger(__name__)
+
+TRIGGER_BATCH_SIZE = int(os.getenv("DB2_TRIGGER_BATCH_SIZE", "25"))
+# Bump when the trigger conversion output changes, so cached conversions are redone.
+TRIGGER_CONVERTER_VERSION = "2"
 
+
+def create_db2_triggers(trigger_ddls: List[str], max_retries: int = 3) -> List[Tuple[bool, Optional[str]]]:
+    """
+    Create triggers over the calling thread's pooled DB2 connection, one commit per trigger,
+    and return (ok, error) per statement. Only transient failures (deadlocks, lock timeouts,
+    communication errors, ...) are retried, with backoff; anything else fails at once.
+    """
+    results: List[Tuple[bool, Optional[str]]] = [(False, "not executed")] * len(trigger_ddls)
+    pending = list(range(len(trigger_ddls)))
+    catalog = get_target_catalog()
+    default_schema = get_target_credentials().get('schema')
+
+    for attempt in range(1, max_retries + 1):
+        retry = []
+        for i in pending:
+            try:
+                conn = get_db2_connection_fast()
+            except Exception as e:
+                results[i] = (False, str(e))
+                retry.append(i)
+                continue
             try:
-                result = ibm_db.exec_immediate(conn, trigger_ddl)
-            except Exception as err:
-                err_msg = ibm_db.stmt_errmsg()
-                print(f"[DB2 Trigger Execution Error] {err_msg or err}")
-                ibm_db.rollback(conn)
-                ibm_db.close(conn)
-                if 'timeout' in (err_msg or '').lower() and attempt < max_retries:
-                    delay = 2 ** attempt
-                    print(f"[Retrying after {delay}s due to timeout]")
-                    time.sleep(delay)
-                    continue
-                return False
-
-            if result:
+                ibm_db.exec_immediate(conn, trigger_ddls[i])
                 ibm_db.commit(conn)
-                ibm_db.close(conn)
-                print("[DB2 Trigger Created Successfully]")
-                return True
-            else:
-                err_msg = ibm_db.stmt_errmsg()
-                print(f"[DB2 Trigger Failed] {err_msg}")
-                ibm_db.rollback(conn)
-                ibm_db.close(conn)
-                if 'timeout' in (err_msg or '').lower() and attempt < max_retries:
-                    delay = 2 ** attempt
-                    print(f"[Retrying after {delay}s due to timeout]")
-                    time.sleep(delay)
-                    continue
-                return False
+                catalog.apply_ddl(trigger_ddls[i], default_schema=default_schema)
+                results[i] = (True, None)
+            except Exception as e:
+                error = ibm_db.stmt_errmsg() or str(e)
+                results[i] = (False, error)
+                try:
+                    ibm_db.rollback(conn)
+                except Exception:
+                    pass
+                if is_connection_error(error):
+                    close_thread_connection()
+                if is_transient_db2_error(error):
+                    retry.append(i)
+                else:
+                    logger.error(f"[DB2 Trigger Failed] {error}")
+        if not retry or attempt == max_retries:
+            break
+        delay = 2 ** attempt
+        logger.warning(f"⏳ {len(retry)} trigger(s) hit transient DB2 errors, retrying in {delay}s")
+        time.sleep(delay)
+        pending = retry
+    return results
+
+
+def execute_db2_trigger_ddl(trigger_ddl: str, max_retries: int = 3) -> bool:
+    ok, error = create_db2_triggers([trigger_ddl], max_retries)[0]
+    if not ok:
+        print(f"[DB2 Trigger Creation Failed] {error}")
+    return ok
+
+def _trigger_header(tl: TokenList, end_words: Iterable[str]) -> Tuple[str, List[str], str, int]:
+    """
+    (timing, events in source order, table, index where the header ends) of a trigger
+    statement; the header runs up to the first of `end_words` at the top level.
+    """
+    header_end = tl.find(end_words, depth=0)
+    header_end = len(tl) if header_end < 0 else header_end
+    timing, events, table = None, [], None
+    sig = tl.significant(0, header_end)
+    for n, i in enumerate(sig):
+        word = tl[i].upper
+        if timing is None and word in ("BEFORE", "AFTER"):
+            timing = word
+        elif timing is None and word == "INSTEAD" and n + 1 < len(sig) and tl[sig[n + 1]].upper == "OF":
+            timing = "INSTEAD OF"
+        elif word in ("INSERT", "UPDATE", "DELETE") and word not in events:
+            events.append(word)
+        elif word == "ON" and table is None and n + 1 < len(sig) and tl[sig[n + 1]].is_name:
+            # ON [schema.]table: keep the table part
+            k = n + 1
+            while k + 2 < len(sig) and tl[sig[k + 1]].text == "." and tl[sig[k + 2]].is_name:
+                k += 2
+            table = tl[sig[k]].name.upper()
+    return timing or "AFTER", events, table or "<MISSING_TABLE>", header_end
+
+
+def _trigger_body(tl: TokenList, start: int) -> Optional[Tuple[int, int]]:
+    """Token range between the first BEGIN at or after `start` and the last END."""
+    begin = tl.find("BEGIN", start, depth=0)
+    if begin < 0:
+        return None
+    sig = tl.significant(begin + 1)
+    for i in reversed(sig):
+        if tl[i].upper == "END":
+            return begin + 1, i
+    return None
 
-        except Exception as e:
-            print(f"[DB2 Connect/Execute Exception] {e}")
-            if 'timeout' in str(e).lower() and attempt < max_retries:
-                delay = 2 ** attempt
-                print(f"[Retrying after {delay}s due to exception]")
-                time.sleep(delay)
-                continue
-            return False
 
-    print("[DB2 Trigger Creation Failed After Retries]")
-    return False
+def _row_ref(m: Match) -> str:
+    return ("NEW_ROW." if m.name(1) == "NEW" else "OLD_ROW.")
+
+
+def _oracle_body_rules(schema: str) -> Rewriter:
+    return Rewriter([
+        # :NEW.col := expr;  →  SET NEW_ROW.col = expr;
+        Rule([":", {"NEW", "OLD"}, ".", NAME, ":=", Until(";")],
+             lambda m: f"SET {_row_ref(m)}{m.tokens(3)[0].text} = {m.text(5)}"),
+        # var := expr;  →  SET var = expr;
+        Rule([NAME, Opt(".", NAME), ":=", Until(";")],
+             lambda m: f"SET {render(m.tokens(0) + m.tokens(1))} = {m.text(3)}"),
+        Rule([":", {"NEW", "OLD"}, "."], _row_ref),
+        Rule([NAME, ".", "NEXTVAL"], lambda m: f"NEXT VALUE FOR {schema}.{m.name(0)}"),
+        Rule([NAME, ".", "CURRVAL"], lambda m: f"PREVIOUS VALUE FOR {schema}.{m.name(0)}"),
+        Rule(["FROM", "DUAL"], "FROM SYSIBM.SYSDUMMY1"),
+    ], collapse=True)
+
 
 def convert_oracle_to_db2(schema: str, trigger_name: str, oracle_ddl: str) -> str:
-    timing_match = re.search(r'\b(BEFORE|AFTER|INSTEAD OF)\b', oracle_ddl, re.IGNORECASE)
-    timing = timing_match.group(1).upper() if timing_match else "AFTER"
-    events = list({ev.upper() for ev in re.findall(r'\b(INSERT|UPDATE|DELETE)\b', oracle_ddl, re.IGNORECASE)})
+    tl = TokenList(oracle_ddl)
+    timing, events, table_name, header_end = _trigger_header(tl, ("BEGIN", "DECLARE"))
     event_clause = " OR ".join(events) if events else "INSERT"
-    table_match = re.search(r'ON\s+(\w+)', oracle_ddl, re.IGNORECASE)
-    table_name = table_match.group(1).upper() if table_match else "<MISSING_TABLE>"
 
-    body_match = re.search(r'BEGIN(.*?)END;', oracle_ddl, re.IGNORECASE | re.DOTALL)
-    if not body_match:
+    body_range = _trigger_body(tl, header_end)
+    if not body_range:
         raise ValueError(f"Trigger {trigger_name} body not found in Oracle DDL")
-    body = body_match.group(1).strip()
-
-    body = re.sub(r':NEW\.', 'NEW_TEMP.', body, flags=re.IGNORECASE)
-    body = re.sub(r':OLD\.', 'OLD_TEMP.', body, flags=re.IGNORECASE)
-    body = re.sub(r'SELECT\s+(\w+)\.NEXTVAL\s+INTO\s+(\w+)\s+FROM\s+DUAL;',
-                  lambda m: f"SELECT NEXT VALUE FOR {schema}.{m.group(1)} INTO {m.group(2)} FROM SYSIBM.SYSDUMMY1;",
-                  body,
-                  flags=re.IGNORECASE)
-    body = re.sub(r'(\b\w+\b)\s*:=\s*([^;]+);', r'SET \1 = \2;', body, flags=re.IGNORECASE)
-    body = re.sub(r'(NEW_TEMP|OLD_TEMP)\.(\w+)\s*=\s*([^;]+);?', r'SET \1.\2 = \3;', body, flags=re.IGNORECASE)
-    body = re.sub(r'NEW_TEMP\.', 'NEW_ROW.', body)
-    body = re.sub(r'OLD_TEMP\.', 'OLD_ROW.', body)
-    body = re.sub(r'NEW_ROW\.SET\s+(\w+)\s*=\s*([^;]+);?', r'SET NEW_ROW.\1 = \2;', body, flags=re.IGNORECASE)
-    body = re.sub(r'OLD_ROW\.SET\s+(\w+)\s*=\s*([^;]+);?', r'SET OLD_ROW.\1 = \2;', body, flags=re.IGNORECASE)
-
-    uses_nextval = re.search(r'NEXTVAL', body, re.IGNORECASE)
-    if uses_nextval:
-        body = "DECLARE NEXTVAL INTEGER;\n    " + body
-
-    statements = [stmt.strip() for stmt in body.split(';') if stmt.strip()]
+    body = _oracle_body_rules(schema).rewrite_range(tl, *body_range)
+
+    # One statement per line; ';' inside string literals is not a separator
+    body_tl = TokenList(body)
+    statements = [s for s in (body_tl.text(a, b, collapse=True) for a, b in body_tl.split(";")) if s]
     body = ';\n    '.join(statements)
     if not body.endswith(';'):
         body += ';'
@@ -120,22 +170,21 @@ def convert_oracle_to_db2(schema: str, trigger_name: str, oracle_ddl: str) -> st
     )
     return ddl
 
+
+_SQL_BODY_RULES = Rewriter([
+    Rule(["INSERTED", "."], "NEW."),
+    Rule(["DELETED", "."], "OLD."),
+    Rule(["GO"]),
+])
+
+
 def convert_sql_to_db2(schema: str, trigger_name: str, sql_ddl: str) -> str:
-    body = sql_ddl.strip()
-    body = re.sub(r'INSERTED\.', 'NEW.', body, flags=re.IGNORECASE)
-    body = re.sub(r'DELETED\.', 'OLD.', body, flags=re.IGNORECASE)
-    body = re.sub(r'\bGO\b', '', body, flags=re.IGNORECASE)
-
-    timing_match = re.search(r'\b(AFTER|INSTEAD OF|BEFORE)\b', sql_ddl, re.IGNORECASE)
-    event_match = re.search(r'\b(INSERT|UPDATE|DELETE)\b', sql_ddl, re.IGNORECASE)
-    table_match = re.search(r'ON\s+(\w+)', sql_ddl, re.IGNORECASE)
-    timing = timing_match.group(1).upper() if timing_match else "AFTER"
-    event = event_match.group(1).upper() if event_match else "INSERT"
-    table_name = table_match.group(1).upper() if table_match else "<MISSING_TABLE>"
-
-    body_match = re.search(r'BEGIN(.*?)END', sql_ddl, re.IGNORECASE | re.DOTALL)
-    if body_match:
-        body = body_match.group(1).strip()
+    tl = TokenList(sql_ddl.strip())
+    timing, events, table_name, header_end = _trigger_header(tl, ("AS",))
+    event = events[0] if events else "INSERT"
+
+    body_range = _trigger_body(tl, header_end) or (min(header_end + 1, len(tl)), len(tl))
+    body = _SQL_BODY_RULES.rewrite_range(tl, *body_range).strip()
 
     ddl = (
         f"CREATE TRIGGER {schema}.{trigger_name}\n"
@@ -148,6 +197,77 @@ def convert_sql_to_db2(schema: str, trigger_name: str, sql_ddl: str) -> str:
     )
     return ddl
 
+def convert_trigger_cached(convert_func: Callable, schema: str, trigger_name: str, ddl: str) -> str:
+    """`convert_func(schema, trigger_name, ddl)` through the conversion cache."""
+    return get_conversion_cache().convert(
+        "trigger", TRIGGER_CONVERTER_VERSION, ddl,
+        lambda: convert_func(schema, trigger_name, ddl),
+        convert_func.__name__, schema.upper(), trigger_name.upper(),
+    )
+
+
+def trigger_unchanged(schema: str, trigger_name: str, converted: str) -> bool:
+    """The trigger exists in DB2 and was last created from exactly this DDL."""
+    return (
+        get_conversion_cache().unchanged("trigger", schema, trigger_name, converted)
+        and get_target_catalog().has_trigger(schema, trigger_name)
+    )
+
+
+def record_trigger_outcomes(schema: str, outcomes: List[Tuple[str, str, bool, Optional[str]]]):
+    """Remember (trigger, DDL, ok, error) of executed CREATEs for the next run."""
+    try:
+        get_conversion_cache().record_many("trigger", schema, outcomes)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not record trigger outcomes in the conversion cache: {e}")
+
+
+def _record_triggers(transaction_id: Optional[str], schema: str, success: List[str], error: List[str]):
+    if transaction_id and (success or error):
+        save_migration_status_to_couchdb(transaction_id, {"triggers": {"success": success, "error": error}}, schema)
+
+
+def _prepare_trigger(
+    schema: str,
+    trigger_name: str,
+    ddl: Optional[str],
+    convert_func: Callable,
+    check_table_exists_func: Callable,
+    save_ddl_func: Callable,
+):
+    """Convert one trigger and check its table. Returns (converted DDL, None) or (None, result dict)."""
+    if not ddl:
+        return None, {"trigger": trigger_name, "status": "skipped", "reason": "DDL not found"}
+
+    converted = convert_trigger_cached(convert_func, schema, trigger_name, ddl)
+
+    match = re.search(r'ON\s+(?:"?(\w+)"?\.)?"?(\w+)"?', converted, re.IGNORECASE)
+    tgt_schema = match.group(1).upper() if match and match.group(1) else schema.upper()
+    tgt_table = match.group(2).upper() if match else None
+
+    if not tgt_table:
+        return None, {"trigger": trigger_name, "status": "skipped", "reason": "Target table name not found in DDL"}
+
+    if not check_table_exists_func(tgt_schema, tgt_table):
+        return None, {"trigger": trigger_name, "status": "skipped", "reason": f"Table {tgt_schema}.{tgt_table} not found in DB2"}
+
+    save_ddl_func("source", schema, trigger_name, ddl, object_type="trigger")
+    save_ddl_func("target", tgt_schema, trigger_name, converted, object_type="trigger")
+    if trigger_unchanged(schema, trigger_name, converted):
+        return None, {"trigger": trigger_name, "status": "success", "reason": "Unchanged since last run"}
+    return converted, None
+
+
+def _trigger_ddl(
+    schema: str, trigger_name: str, definitions: Optional[Dict[str, str]], fetch_trigger_ddl_func: Optional[Callable]
+) -> Optional[str]:
+    """DDL from the bulk `definitions` map, fetched one by one when the map lacks the trigger."""
+    ddl = definitions.get(trigger_name.upper()) if definitions is not None else None
+    if ddl is None and fetch_trigger_ddl_func is not None:
+        ddl = fetch_trigger_ddl_func(schema, trigger_name)
+    return ddl
+
+
 def migrate_single_trigger(
     source_type: str,
     schema: str,
@@ -159,48 +279,82 @@ def migrate_single_trigger(
     execute_ddl_func: Callable,
     transaction_id: Optional[str] = None,
     max_retries: int = 3,
+    definitions: Optional[Dict[str, str]] = None,
 ) -> Dict:
+    """
+    Convert and create one trigger. With `definitions` (from a bulk fetch_trigger_definitions)
+    the DDL is read from that map; otherwise, or when the map lacks the trigger, it is
+    fetched with `fetch_trigger_ddl_func`.
+    Retrying is left to `execute_ddl_func`, which only retries transient DB2 errors.
+    """
     try:
-        ddl = fetch_trigger_ddl_func(schema, trigger_name)
-        if not ddl:
-            if transaction_id:
-                save_migration_status_to_couchdb(transaction_id, {"triggers": {"success": [], "error": [trigger_name]}}, schema)
-            return {"trigger": trigger_name, "status": "skipped", "reason": "DDL not found"}
-
-        converted = convert_func(schema, trigger_name, ddl)
-
-        match = re.search(r'ON\s+(?:"?(\w+)"?\.)?"?(\w+)"?', converted, re.IGNORECASE)
-        tgt_schema = match.group(1).upper() if match and match.group(1) else schema.upper()
-        tgt_table = match.group(2).upper() if match else None
-
-        if not tgt_table:
-            if transaction_id:
-                save_migration_status_to_couchdb(transaction_id, {"triggers": {"success": [], "error": [trigger_name]}}, schema)
-            return {"trigger": trigger_name, "status": "skipped", "reason": "Target table name not found in DDL"}
-
-        if not check_table_exists_func(tgt_schema, tgt_table):
-            if transaction_id:
-                save_migration_status_to_couchdb(transaction_id, {"triggers": {"success": [], "error": [trigger_name]}}, schema)
-            return {"trigger": trigger_name, "status": "skipped", "reason": f"Table {tgt_schema}.{tgt_table} not found in DB2"}
-
-        save_ddl_func("source", schema, trigger_name, ddl, object_type="trigger")
-        save_ddl_func("target", tgt_schema, trigger_name, converted, object_type="trigger")
-
-        for attempt in range(1, max_retries + 1):
-            if execute_ddl_func(converted):
-                if transaction_id:
-                    save_migration_status_to_couchdb(transaction_id, {"triggers": {"success": [trigger_name], "error": []}}, schema)
-                return {"trigger": trigger_name, "status": "success"}
-            else:
-                delay = 2 ** attempt
-                print(f"[Attempt {attempt}] Failed to execute trigger {trigger_name} in DB2, retrying after {delay}s.")
-                time.sleep(delay)
-
-        if transaction_id:
-            save_migration_status_to_couchdb(transaction_id, {"triggers": {"success": [], "error": [trigger_name]}}, schema)
-        return {"trigger": trigger_name, "status": "failed", "reason": "Failed after retries"}
+        ddl = _trigger_ddl(schema, trigger_name, definitions, fetch_trigger_ddl_func)
+
+        converted, result = _prepare_trigger(
+            schema, trigger_name, ddl, convert_func, check_table_exists_func, save_ddl_func
+        )
+        if result:
+            ok = result["status"] == "success"
+            _record_triggers(transaction_id, schema, [trigger_name] if ok else [], [] if ok else [trigger_name])
+            return result
+
+        if execute_ddl_func(converted, max_retries):
+            record_trigger_outcomes(schema, [(trigger_name, converted, True, None)])
+            _record_triggers(transaction_id, schema, [trigger_name], [])
+            return {"trigger": trigger_name, "status": "success"}
+
+        record_trigger_outcomes(schema, [(trigger_name, converted, False, None)])
+        _record_triggers(transaction_id, schema, [], [trigger_name])
+        return {"trigger": trigger_name, "status": "failed", "reason": "Failed to execute DB2 trigger"}
 
     except Exception as e:
-        if transaction_id:
-            save_migration_status_to_couchdb(transaction_id, {"triggers": {"success": [], "error": [trigger_name]}}, schema)
+        _record_triggers(transaction_id, schema, [], [trigger_name])
         return {"trigger": trigger_name, "status": "error", "reason": str(e)}
+
+
+def migrate_trigger_batch(
+    schema: str,
+    trigger_names: List[str],
+    definitions: Dict[str, str],
+    convert_func: Callable,
+    check_table_exists_func: Callable,
+    save_ddl_func: Callable,
+    transaction_id: Optional[str] = None,
+    max_retries: int = 3,
+    fetch_trigger_ddl_func: Optional[Callable] = None,
+) -> List[Dict]:
+    """
+    Batch mode of `migrate_single_trigger`: convert a group of triggers, create all of them
+    over one pooled connection and record their status in a single CouchDB update.
+    Triggers missing from `definitions` are fetched with `fetch_trigger_ddl_func`.
+    Returns one result dict per trigger.
+    """
+    results: List[Dict] = []
+    to_create: List[Tuple[str, str]] = []
+    for name in trigger_names:
+        try:
+            ddl = _trigger_ddl(schema, name, definitions, fetch_trigger_ddl_func)
+            converted, result = _prepare_trigger(
+                schema, name, ddl, convert_func, check_table_exists_func, save_ddl_func
+            )
+        except Exception as e:
+            converted, result = None, {"trigger": name, "status": "error", "reason": str(e)}
+        if result:
+            results.append(result)
+        else:
+            to_create.append((name, converted))
+
+    outcomes = create_db2_triggers([ddl for _, ddl in to_create], max_retries) if to_create else []
+    record_trigger_outcomes(schema, [(name, ddl, ok, error) for (name, ddl), (ok, error) in zip(to_create, outcomes)])
+    for (name, _), (ok, error) in zip(to_create, outcomes):
+        if ok:
+            results.append({"trigger": name, "status": "success"})
+        else:
+            results.append({"trigger": name, "status": "failed", "reason": error or "Failed to execute DB2 trigger"})
+
+    _record_triggers(
+        transaction_id, schema,
+        [r["trigger"] for r in results if r["status"] == "success"],
+        [r["trigger"] for r in results if r["status"] != "success"],
+    )
+    return results
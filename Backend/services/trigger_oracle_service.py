@@ -1,9 +1,16 @@
 # services/trigger_oracle_service.py
 
 import re
-from typing import Optional, List
+import oracledb
+from typing import Optional, List, Dict
 from connections.oracle_connection import get_oracle_connection
-from services.trigger_converter import convert_oracle_to_db2, execute_db2_trigger_ddl
+from services.trigger_converter import (
+    convert_oracle_to_db2,
+    convert_trigger_cached,
+    execute_db2_trigger_ddl,
+    record_trigger_outcomes,
+    trigger_unchanged,
+)
 from utils.ddl_writer import save_ddl
 from utils.couchdb_helpers import save_migration_status_to_couchdb
 from services.db2_service import check_table_exists
@@ -28,6 +35,24 @@ def fetch_triggers(schema: str) -> List[str]:
         conn.close()
 
 
+def fetch_trigger_tables(schema: str) -> Dict[str, str]:
+    """Map each MAXOBJECT trigger name to the table it is defined on."""
+    creds = get_source_credentials("oracle")
+    conn = get_oracle_connection(creds)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT at.TRIGGER_NAME, at.TABLE_NAME
+            FROM ALL_TRIGGERS at
+            JOIN MAXIMO.MAXOBJECT mo ON mo.OBJECTNAME = at.TABLE_NAME
+            WHERE at.OWNER = :schema
+        """, {"schema": schema.upper()})
+        return {row[0]: row[1] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+        conn.close()
+
+
 def fetch_trigger_definition(schema: str, trigger: str) -> Optional[str]:
     creds = get_source_credentials("oracle")
     conn = get_oracle_connection(creds)
@@ -43,17 +68,69 @@ def fetch_trigger_definition(schema: str, trigger: str) -> Optional[str]:
         conn.close()
 
 
-def migrate_trigger(schema: str, trigger: str, target_schema: str, transaction_id: Optional[str] = None) -> dict:
+def _clob_as_string(cursor, metadata):
+    # Fetch the DDL CLOBs inline with the rows instead of one LOB round trip each.
+    if metadata.type_code is oracledb.DB_TYPE_CLOB:
+        return cursor.var(oracledb.DB_TYPE_LONG, arraysize=cursor.arraysize)
+
+
+def fetch_trigger_definitions(schema: str, triggers: Optional[List[str]] = None) -> Dict[str, str]:
+    """
+    DDL of every MAXOBJECT trigger in the schema (or just `triggers`) in one query,
+    keyed by upper-case trigger name.
+    """
+    creds = get_source_credentials("oracle")
+    conn = get_oracle_connection(creds)
+    cursor = conn.cursor()
+    cursor.outputtypehandler = _clob_as_string
+    cursor.arraysize = 200
+    definitions = {}
+    try:
+        params = {"schema": schema.upper()}
+        names = sorted({t.upper() for t in triggers}) if triggers is not None else None
+        if names == []:
+            return {}
+        # Oracle caps IN lists at 1000 entries.
+        chunks = [names[i:i + 1000] for i in range(0, len(names), 1000)] if names else [None]
+        for chunk in chunks:
+            name_filter = ""
+            chunk_params = dict(params)
+            if chunk:
+                name_filter = "AND at.TRIGGER_NAME IN ({})".format(", ".join(f":t{i}" for i in range(len(chunk))))
+                chunk_params.update({f"t{i}": name for i, name in enumerate(chunk)})
+            cursor.execute(f"""
+                SELECT at.TRIGGER_NAME, DBMS_METADATA.GET_DDL('TRIGGER', at.TRIGGER_NAME, at.OWNER)
+                FROM ALL_TRIGGERS at
+                JOIN MAXIMO.MAXOBJECT mo ON mo.OBJECTNAME = at.TABLE_NAME
+                WHERE at.OWNER = :schema {name_filter}
+            """, chunk_params)
+            for name, ddl in cursor:
+                if ddl:
+                    definitions[name.upper()] = ddl
+        return definitions
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def migrate_trigger(
+    schema: str,
+    trigger: str,
+    target_schema: str,
+    transaction_id: Optional[str] = None,
+    ddl: Optional[str] = None,
+) -> dict:
+    """Migrate one trigger; `ddl` is its prefetched definition (fetched on its own when omitted)."""
     print(f"Starting migration of Oracle trigger {trigger} from {schema} to {target_schema}")
 
-    ddl = fetch_trigger_definition(schema, trigger)
+    ddl = ddl or fetch_trigger_definition(schema, trigger)
     if not ddl:
         if transaction_id:
             save_migration_status_to_couchdb(transaction_id, {"triggers": {"success": [], "error": [trigger]}}, schema)
         return {"trigger": trigger, "status": "failed", "reason": "Trigger DDL not found"}
 
     try:
-        db2_ddl = convert_oracle_to_db2(target_schema, trigger, ddl)
+        db2_ddl = convert_trigger_cached(convert_oracle_to_db2, target_schema, trigger, ddl)
     except Exception as e:
         if transaction_id:
             save_migration_status_to_couchdb(transaction_id, {"triggers": {"success": [], "error": [trigger]}}, schema)
@@ -71,7 +148,14 @@ def migrate_trigger(schema: str, trigger: str, target_schema: str, transaction_i
     save_ddl("source", schema, trigger, ddl, object_type="trigger")
     save_ddl("target", tgt_schema, trigger, db2_ddl, object_type="trigger")
 
-    if not execute_db2_trigger_ddl(db2_ddl):
+    if trigger_unchanged(target_schema, trigger, db2_ddl):
+        if transaction_id:
+            save_migration_status_to_couchdb(transaction_id, {"triggers": {"success": [trigger], "error": []}}, schema)
+        return {"trigger": trigger, "status": "success", "reason": "Unchanged since last run"}
+
+    created = execute_db2_trigger_ddl(db2_ddl)
+    record_trigger_outcomes(target_schema, [(trigger, db2_ddl, created, None)])
+    if not created:
         if transaction_id:
             save_migration_status_to_couchdb(transaction_id, {"triggers": {"success": [], "error": [trigger]}}, schema)
         return {"trigger": trigger, "status": "failed", "reason": "Failed to execute DB2 trigger"}
@@ -1,8 +1,14 @@
 # services/trigger_sql_service.py
 import re
-from typing import Optional, List
+from typing import Optional, List, Dict
 from connections.sql_connection import get_sql_connection
-from services.trigger_converter import convert_sql_to_db2, execute_db2_trigger_ddl
+from services.trigger_converter import (
+    convert_sql_to_db2,
+    convert_trigger_cached,
+    execute_db2_trigger_ddl,
+    record_trigger_outcomes,
+    trigger_unchanged,
+)
 from utils.ddl_writer import save_ddl
 from utils.couchdb_helpers import save_migration_status_to_couchdb
 from services.db2_service import check_table_exists
@@ -28,6 +34,25 @@ def fetch_triggers(schema: str) -> List[str]:
         conn.close()
 
 
+def fetch_trigger_tables(schema: str) -> Dict[str, str]:
+    """Map each MAXOBJECT trigger name to the table it is defined on."""
+    creds = get_source_credentials("sql")
+    conn = get_sql_connection(creds)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT t.name, tb.name
+            FROM sys.triggers t
+            JOIN sys.tables tb ON tb.object_id = t.parent_id
+            JOIN MAXIMO.MAXOBJECT mo ON mo.OBJECTNAME = tb.name
+            WHERE SCHEMA_NAME(tb.schema_id) = ?
+        """, (schema,))
+        return {row[0]: row[1] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+        conn.close()
+
+
 def fetch_trigger_definition(schema: str, trigger: str) -> Optional[str]:
     creds = get_source_credentials("sql")
     conn = get_sql_connection(creds)
@@ -43,17 +68,52 @@ def fetch_trigger_definition(schema: str, trigger: str) -> Optional[str]:
         conn.close()
 
 
-def migrate_trigger(schema: str, trigger: str, target_schema: str, transaction_id: Optional[str] = None) -> dict:
+def fetch_trigger_definitions(schema: str, triggers: Optional[List[str]] = None) -> Dict[str, str]:
+    """
+    Definition of every MAXOBJECT trigger in the schema (or just `triggers`) in one query,
+    keyed by upper-case trigger name.
+    """
+    creds = get_source_credentials("sql")
+    conn = get_sql_connection(creds)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT t.name, m.definition
+            FROM sys.triggers t
+            JOIN sys.sql_modules m ON m.object_id = t.object_id
+            JOIN sys.tables tb ON tb.object_id = t.parent_id
+            JOIN MAXIMO.MAXOBJECT mo ON mo.OBJECTNAME = tb.name
+            WHERE SCHEMA_NAME(tb.schema_id) = ?
+        """, (schema,))
+        wanted = {t.upper() for t in triggers} if triggers is not None else None
+        return {
+            name.upper(): definition
+            for name, definition in cursor.fetchall()
+            if definition and (wanted is None or name.upper() in wanted)
+        }
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def migrate_trigger(
+    schema: str,
+    trigger: str,
+    target_schema: str,
+    transaction_id: Optional[str] = None,
+    ddl: Optional[str] = None,
+) -> dict:
+    """Migrate one trigger; `ddl` is its prefetched definition (fetched on its own when omitted)."""
     print(f"Starting migration of SQL Server trigger {trigger} from {schema} to {target_schema}")
 
-    ddl = fetch_trigger_definition(schema, trigger)
+    ddl = ddl or fetch_trigger_definition(schema, trigger)
     if not ddl:
         if transaction_id:
             save_migration_status_to_couchdb(transaction_id, {"triggers": {"success": [], "error": [trigger]}}, schema)
         return {"trigger": trigger, "status": "failed", "reason": "Trigger DDL not found"}
 
     try:
-        db2_ddl = convert_sql_to_db2(target_schema, trigger, ddl)
+        db2_ddl = convert_trigger_cached(convert_sql_to_db2, target_schema, trigger, ddl)
     except Exception as e:
         if transaction_id:
             save_migration_status_to_couchdb(transaction_id, {"triggers": {"success": [], "error": [trigger]}}, schema)
@@ -71,7 +131,14 @@ def migrate_trigger(schema: str, trigger: str, target_schema: str, transaction_i
     save_ddl("source", schema, trigger, ddl, object_type="trigger")
     save_ddl("target", tgt_schema, trigger, db2_ddl, object_type="trigger")
 
-    if not execute_db2_trigger_ddl(db2_ddl):
+    if trigger_unchanged(target_schema, trigger, db2_ddl):
+        if transaction_id:
+            save_migration_status_to_couchdb(transaction_id, {"triggers": {"success": [trigger], "error": []}}, schema)
+        return {"trigger": trigger, "status": "success", "reason": "Unchanged since last run"}
+
+    created = execute_db2_trigger_ddl(db2_ddl)
+    record_trigger_outcomes(target_schema, [(trigger, db2_ddl, created, None)])
+    if not created:
         if transaction_id:
             save_migration_status_to_couchdb(transaction_id, {"triggers": {"success": [], "error": [trigger]}}, schema)
         return {"trigger": trigger, "status": "failed", "reason": "Failed to execute DB2 trigger"}
@@ -1,11 +1,43 @@
-import hashlib
-import json
 import logging
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
 
 from utils.credentials_store import get_source_credentials, get_target_credentials
 from connections.oracle_connection import get_oracle_connection
 from connections.sql_connection import get_sql_connection
 from connections.db2_connection import get_db2_connection
+from services.column_profile import compare_profiles, profile_columns
+from services.range_checksum import (
+    RANGE_CHECKSUM_MAX_DIFFS,
+    Db2Dialect,
+    RangeSide,
+    compare_ranges,
+    hash_column,
+    source_dialect,
+)
+from services.row_digest import canonical_value, digest_cursor, row_hash
+from services.throughput_history import get_throughput_history
+
+# Rows fetched per round trip while streaming a table into its digest.
+VALIDATION_FETCH_SIZE = int(os.getenv("VALIDATION_FETCH_SIZE", "5000"))
+# Tables validated at once; each holds one source and one DB2 connection.
+VALIDATION_CONCURRENCY = int(os.getenv("VALIDATION_CONCURRENCY", "8"))
+# digest: stream every row of both sides; ranges: checksum key ranges in the databases;
+# sample: compare a random sample of rows by key plus the row counts; profile: compare
+# per-column aggregates computed by the databases; loaded: scan DB2 only and compare with
+# the digest taken while the table was loaded.
+VALIDATION_MODES = ("digest", "ranges", "sample", "profile", "loaded")
+# Sampling: the sample is sized so that, when no sampled row differs, fewer than
+# TOLERANCE of all rows differ with probability CONFIDENCE.
+VALIDATION_SAMPLE_CONFIDENCE = float(os.getenv("VALIDATION_SAMPLE_CONFIDENCE", "0.95"))
+VALIDATION_SAMPLE_TOLERANCE = float(os.getenv("VALIDATION_SAMPLE_TOLERANCE", "0.001"))
+VALIDATION_SAMPLE_MAX_ROWS = int(os.getenv("VALIDATION_SAMPLE_MAX_ROWS", "10000"))
 
 def get_quoted_db2_table_name(table_name: str) -> str:
     parts = table_name.split(".")
@@ -14,25 +46,30 @@ def get_quoted_db2_table_name(table_name: str) -> str:
         return f'"{schema}"."{tbl}"'  # Preserve original case
     return f'"{table_name}"'
 
-def fetch_data(conn, table_name):
-    try:
-        cursor = conn.cursor()
+def resolve_source_table(cursor, table_name: str) -> str:
+    """Qualify a bare SQL Server table name with the schema it lives in."""
+    if '.' in table_name:
+        return table_name
+    cursor.execute("""
+        SELECT TABLE_SCHEMA 
+        FROM INFORMATION_SCHEMA.TABLES 
+        WHERE TABLE_NAME = ?
+    """, (table_name,))
+    result = cursor.fetchone()
+    if not result:
+        raise RuntimeError(f"Table '{table_name}' not found in any schema")
+    return f"{result[0]}.{table_name}"
 
-        if '.' not in table_name:
-            cursor.execute("""
-                SELECT TABLE_SCHEMA 
-                FROM INFORMATION_SCHEMA.TABLES 
-                WHERE TABLE_NAME = ?
-            """, (table_name,))
-            result = cursor.fetchone()
-            if not result:
-                raise RuntimeError(f"Table '{table_name}' not found in any schema")
-            schema = result[0]
-            table_name = f"{schema}.{table_name}"
 
+def open_source_cursor(conn, table_name):
+    """Execute SELECT * on the source table; returns (cursor, column names)."""
+    try:
+        cursor = conn.cursor()
+        cursor.arraysize = VALIDATION_FETCH_SIZE
+        table_name = resolve_source_table(cursor, table_name)
         logging.debug(f"[DEBUG] Executing source query: SELECT * FROM {table_name}")
         cursor.execute(f"SELECT * FROM {table_name}")
-        return cursor.fetchall()
+        return cursor, [d[0] for d in cursor.description]
 
     except Exception as e:
         raise RuntimeError(f"Error fetching data from source table '{table_name}': {str(e)}")
@@ -42,39 +79,53 @@ def get_db2_default_schema(cursor):
     row = cursor.fetchone()
     return row[0].strip()
 
-# ✅ Returns: rows, resolved_table_name, fallback_used
-def fetch_data_db2(conn, table_name):
+# ✅ Returns: cursor, resolved_table_name, fallback_used
+def open_db2_cursor(conn, table_name, columns):
+    """
+    Execute a SELECT of `columns` (in the source's order) on the DB2 table, falling back
+    to the connection's default schema when the table isn't in the source schema.
+    """
     cursor = conn.cursor()
+    cursor.arraysize = VALIDATION_FETCH_SIZE
     default_schema = get_db2_default_schema(cursor)
     fallback_used = False
 
     quoted = get_quoted_db2_table_name(table_name)
+    # The migration creates every column upper-case.
+    select_list = ", ".join(f'"{c.upper()}"' for c in columns) if columns else "*"
 
     try:
         logging.info(f"[DB2] Trying main schema: {quoted}")
-        cursor.execute(f"SELECT * FROM {quoted}")
-        return cursor.fetchall(), quoted, fallback_used
+        cursor.execute(f"SELECT {select_list} FROM {quoted}")
+        return cursor, quoted, fallback_used
 
     except Exception as e1:
         try:
             tbl_only = table_name.split(".")[-1]
             fallback = f'"{default_schema}"."{tbl_only}"'
             logging.warning(f"[⚠️ FALLBACK] Using default schema '{default_schema}' for '{tbl_only}'")
-            cursor.execute(f"SELECT * FROM {fallback}")
+            cursor.execute(f"SELECT {select_list} FROM {fallback}")
             fallback_used = True
-            return cursor.fetchall(), fallback, fallback_used
+            return cursor, fallback, fallback_used
 
         except Exception as e2:
             raise RuntimeError(f"Error fetching data from DB2 table '{table_name}': {str(e2)}")
 
-def hash_data(rows):
-    sanitized_rows = [
-        tuple("" if val is None else val for val in row)
-        for row in rows
-    ]
-    rows_sorted = sorted(sanitized_rows)
-    json_rows = json.dumps(rows_sorted, default=str)
-    return hashlib.md5(json_rows.encode()).hexdigest()
+def resolve_db2_table(conn, table_name):
+    """Quoted DB2 name of the table, falling back to the default schema like `open_db2_cursor`. Returns (name, fallback_used)."""
+    cursor = conn.cursor()
+    try:
+        quoted = get_quoted_db2_table_name(table_name)
+        try:
+            cursor.execute(f"SELECT 1 FROM {quoted} FETCH FIRST 1 ROW ONLY")
+            return quoted, False
+        except Exception:
+            fallback = f'"{get_db2_default_schema(cursor)}"."{table_name.split(".")[-1]}"'
+            logging.warning(f"[⚠️ FALLBACK] Using {fallback} for '{table_name}'")
+            cursor.execute(f"SELECT 1 FROM {fallback} FETCH FIRST 1 ROW ONLY")
+            return fallback, True
+    finally:
+        cursor.close()
 
 def get_source_conn(source_type):
     creds = get_source_credentials(source_type)
@@ -86,64 +137,525 @@ def get_source_conn(source_type):
     else:
         raise ValueError("Invalid source type. Must be 'oracle' or 'sql'.")
 
-def validate_table(table_name: str, source_type: str):
+def validate_table(table_name: str, source_type: str, mode: str = "digest"):
+    """Validate one table on connections of its own (see `compare_table` and `compare_table_ranges`)."""
     source_conn = get_source_conn(source_type)
     target_creds = get_target_credentials()
     target_conn = get_db2_connection(target_creds)
 
     try:
-        source_data = fetch_data(source_conn, table_name)
-        target_data, resolved_table_name, fallback_used = fetch_data_db2(target_conn, table_name)
+        return run_comparison(mode, table_name, source_type, source_conn, target_conn)
+    finally:
+        if source_conn:
+            source_conn.close()
+        if target_conn:
+            target_conn.close()
+
+
+def compare_table(table_name: str, source_conn, target_conn):
+    """
+    Compare a table's contents on both sides without holding it in memory: each side is
+    streamed in VALIDATION_FETCH_SIZE chunks (both at once) into an order-independent
+    digest of canonicalized rows, see services.row_digest.
+    """
+    source_cursor, columns = open_source_cursor(source_conn, table_name)
+    target_cursor, resolved_table_name, fallback_used = open_db2_cursor(target_conn, table_name, columns)
+
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            source_future = executor.submit(digest_cursor, source_cursor, VALIDATION_FETCH_SIZE)
+            target_future = executor.submit(digest_cursor, target_cursor, VALIDATION_FETCH_SIZE)
+            source_digest = source_future.result()
+            target_digest = target_future.result()
+    finally:
+        for cursor in (source_cursor, target_cursor):
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+    row_count_source = source_digest.rows
+    row_count_target = target_digest.rows
+
+    # ✅ Match only if both row count and hash match
+    match = source_digest == target_digest
+
+    # ⚠️ If fallback schema used but data matches, still mark mismatch if row count is different
+    if fallback_used and match is False:
+        logging.warning(f"[INFO] Table fallback schema used and data mismatch found — keeping mismatch for {table_name}")
+
+    return {
+        "table": table_name,
+        "match": match,
+        "source_hash": source_digest.hexdigest(),
+        "target_hash": target_digest.hexdigest(),
+        "row_count_source": row_count_source,
+        "row_count_target": row_count_target,
+        "db2_table_used": resolved_table_name,
+        "fallback_used": fallback_used
+    }
+
 
-        source_hash = hash_data(source_data)
-        target_hash = hash_data(target_data)
+# ─────────────────────── RANGE CHECKSUMS ───────────────────────
+def _source_schema(cursor, source_type, table_name):
+    """(schema, table) of a source table name, qualifying a bare name first."""
+    if "." not in table_name:
+        if source_type.lower() == "sql":
+            table_name = resolve_source_table(cursor, table_name)
+        else:
+            cursor.execute("SELECT SYS_CONTEXT('USERENV', 'CURRENT_SCHEMA') FROM DUAL")
+            table_name = f"{cursor.fetchone()[0]}.{table_name}"
+    schema, table = table_name.split(".", 1)
+    return schema, table
 
-        row_count_source = len(source_data)
-        row_count_target = len(target_data)
 
-        # ✅ Match only if both row count and hash match
-        match = (row_count_source == row_count_target) and (source_hash == target_hash)
+def _source_key_column(cursor, source_type, schema, table):
+    """
+    The table's single-column key: Maximo's unique ID column (MAXTABLE.UNIQUECOLUMNNAME),
+    else a one-column primary key. None when there is neither.
+    """
+    if source_type.lower() == "sql":
+        queries = [
+            (f"SELECT UNIQUECOLUMNNAME FROM [{schema}].[MAXTABLE] WHERE UPPER(TABLENAME) = ?", (table.upper(),)),
+            ("""
+                SELECT k.COLUMN_NAME
+                FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS c
+                JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE k
+                  ON k.CONSTRAINT_SCHEMA = c.CONSTRAINT_SCHEMA AND k.CONSTRAINT_NAME = c.CONSTRAINT_NAME
+                WHERE c.CONSTRAINT_TYPE = 'PRIMARY KEY' AND c.TABLE_SCHEMA = ? AND c.TABLE_NAME = ?
+            """, (schema, table)),
+        ]
+    else:
+        queries = [
+            (f'SELECT UNIQUECOLUMNNAME FROM "{schema.upper()}".MAXTABLE WHERE TABLENAME = :1', (table.upper(),)),
+            ("""
+                SELECT cc.COLUMN_NAME
+                FROM ALL_CONSTRAINTS c
+                JOIN ALL_CONS_COLUMNS cc ON cc.OWNER = c.OWNER AND cc.CONSTRAINT_NAME = c.CONSTRAINT_NAME
+                WHERE c.CONSTRAINT_TYPE = 'P' AND c.OWNER = :1 AND c.TABLE_NAME = :2
+            """, (schema.upper(), table.upper())),
+        ]
+    for sql, params in queries:
+        try:
+            cursor.execute(sql, params)
+            names = [row[0] for row in cursor.fetchall() if row[0]]
+        except Exception as e:
+            logging.debug(f"[DEBUG] Key lookup for {schema}.{table} failed: {e}")
+            continue
+        if len(names) == 1:
+            return names[0]
+    return None
+
 
-        # ⚠️ If fallback schema used but data matches, still mark mismatch if row count is different
-        if fallback_used and match is False:
-            logging.warning(f"[INFO] Table fallback schema used and data mismatch found — keeping mismatch for {table_name}")
+def _source_metadata(source_type, schema, table):
+    if source_type.lower() == "sql":
+        from services.sql_service import fetch_schema_metadata
+    else:
+        from services.oracle_service import fetch_schema_metadata
+    return fetch_schema_metadata(schema).get(table.upper())
 
-        return {
-            "table": table_name,
-            "match": match,
-            "source_hash": source_hash,
-            "target_hash": target_hash,
-            "row_count_source": row_count_source,
-            "row_count_target": row_count_target,
-            "db2_table_used": resolved_table_name,
-            "fallback_used": fallback_used
-        }
 
+def compare_table_ranges(table_name: str, source_type: str, source_conn, target_conn, key_column: str = None):
+    """
+    Compare a table with checksums computed by the databases per key range (see
+    services.range_checksum), so only checksums cross the network unless something
+    differs. Needs a single-column integer key; without one the table is compared with
+    `compare_table`, and the result says so.
+    """
+    cursor = source_conn.cursor()
+    try:
+        schema, table = _source_schema(cursor, source_type, table_name)
+        columns = _source_metadata(source_type, schema, table)
+        key_column = key_column or (columns and _source_key_column(cursor, source_type, schema, table))
     finally:
-        if source_conn:
-            source_conn.close()
-        if target_conn:
-            target_conn.close()
+        cursor.close()
 
+    by_name = {c["column_name"].upper(): c for c in columns or []}
+    key = hash_column(by_name[key_column.upper()]) if key_column and key_column.upper() in by_name else None
+    if key is None or key.kind != "number" or key.scale:
+        reason = "no single-column integer key" if columns else "table not in the source metadata"
+        logging.info(f"[INFO] {table_name}: {reason}, comparing full digests")
+        result = compare_table(table_name, source_conn, target_conn)
+        result.update({"mode": "digest", "note": f"{reason}; compared full digests"})
+        return result
 
-def validate_multiple_tables(table_names, source_type):
-    return [validate_table(name, source_type) for name in table_names]
+    names = [c["column_name"] for c in columns]
+    hashed = [h for h in (hash_column(c) for c in columns) if h]
+    unhashed = [n for n in names if n not in {h.name for h in hashed}]
+    source_table = f"{schema}.{table}"
+    target_table, fallback_used = resolve_db2_table(target_conn, f"{schema}.{table}".upper())
 
-def validate_schema(source_type, schema):
-    logging.info(f"🧪 Validating entire schema: {schema} from source: {source_type}")
-    conn = get_source_conn(source_type)
+    dialect = source_dialect(source_type)
+    source = RangeSide(source_conn, dialect, source_table, key.name, names, hashed)
+    # The migration creates every column upper-case.
+    upper = [h._replace(name=h.name.upper()) for h in hashed]
+    target = RangeSide(target_conn, Db2Dialect(), target_table, key.name.upper(), [n.upper() for n in names], upper)
+
+    result = compare_ranges(source, target)
+    return {
+        "table": table_name,
+        "mode": "ranges",
+        "key_column": key.name,
+        **result,
+        "unhashed_columns": unhashed,
+        "db2_table_used": target_table,
+        "fallback_used": fallback_used,
+    }
+
+
+# ─────────────────────── SAMPLING ───────────────────────
+def sample_size(confidence: float, tolerance: float = VALIDATION_SAMPLE_TOLERANCE) -> int:
+    """
+    Rows to sample so that a table with more than `tolerance` of its rows differing shows
+    at least one differing row in the sample with probability `confidence`.
+    """
+    if not 0 < confidence < 1 or not 0 < tolerance < 1:
+        raise ValueError("confidence and tolerance must be between 0 and 1")
+    return max(1, math.ceil(math.log(1 - confidence) / math.log(1 - tolerance)))
+
+
+def _sample_source_rows(conn, source_type, table, columns, size, row_count):
+    """About `size` random rows of the source table (all of them for small tables)."""
+    sql_server = source_type.lower() == "sql"
+    select_list = ", ".join(f"[{c}]" if sql_server else f'"{c}"' for c in columns)
     cursor = conn.cursor()
+    try:
+        if row_count <= size:
+            cursor.execute(f"SELECT {select_list} FROM {table}")
+            return cursor.fetchall()
+        # Oversample a little: SAMPLE / TABLESAMPLE return only roughly the requested share.
+        percent = max(0.000001, round(min(99.0, 150.0 * size / row_count), 6))
+        sample_clause = f"TABLESAMPLE ({percent} PERCENT)" if sql_server else f"SAMPLE ({percent})"
+        cursor.execute(f"SELECT {select_list} FROM {table} {sample_clause}")
+        rows = cursor.fetchall()
+        if sql_server and len(rows) < size // 2:
+            # TABLESAMPLE picks whole pages, which can miss badly on small or skewed tables.
+            cursor.execute(f"SELECT TOP ({size}) {select_list} FROM {table} ORDER BY NEWID()")
+            rows = cursor.fetchall()
+        return random.sample(rows, size) if len(rows) > size else rows
+    finally:
+        cursor.close()
 
-    if source_type.lower() == "oracle":
-        cursor.execute(f"SELECT table_name FROM all_tables WHERE owner = UPPER('{schema}')")
-    elif source_type.lower() == "sql":
-        cursor.execute(f"""
-            SELECT TABLE_NAME 
-            FROM INFORMATION_SCHEMA.TABLES 
-            WHERE TABLE_SCHEMA = '{schema}' AND TABLE_TYPE = 'BASE TABLE'
-        """)
+
+def _db2_rows_by_key(conn, table, columns, key_column, keys, chunk_size: int = 500):
+    select_list = ", ".join(f'"{c.upper()}"' for c in columns)
+    cursor = conn.cursor()
+    rows = []
+    try:
+        for i in range(0, len(keys), chunk_size):
+            chunk = keys[i:i + chunk_size]
+            cursor.execute(
+                f'SELECT {select_list} FROM {table} WHERE "{key_column.upper()}" IN ({", ".join("?" for _ in chunk)})',
+                tuple(chunk),
+            )
+            rows.extend(cursor.fetchall())
+    finally:
+        cursor.close()
+    return rows
+
+
+def compare_table_sample(
+    table_name: str,
+    source_type: str,
+    source_conn,
+    target_conn,
+    confidence: float = VALIDATION_SAMPLE_CONFIDENCE,
+    target_schema: str = None,
+    source_row_count: int = None,
+    target_row_count: int = None,
+):
+    """
+    Quick statistical check: row counts on both sides plus a random sample of source rows
+    (SAMPLE on Oracle, TABLESAMPLE on SQL Server) looked up in DB2 by key and compared
+    row by row. With no differences, `max_mismatch_rate` is the share of differing rows
+    the table stays below with probability `confidence`. Counts already known to the
+    caller can be passed in to save the COUNT(*) queries.
+    """
+    size = min(sample_size(confidence), VALIDATION_SAMPLE_MAX_ROWS)
+    cursor = source_conn.cursor()
+    try:
+        schema, table = _source_schema(cursor, source_type, table_name)
+        columns = _source_metadata(source_type, schema, table)
+        key_column = columns and _source_key_column(cursor, source_type, schema, table)
+        if source_row_count is None:
+            cursor.execute(f"SELECT COUNT(*) FROM {schema}.{table}")
+            source_row_count = int(cursor.fetchone()[0])
+    finally:
+        cursor.close()
+
+    target_table, fallback_used = resolve_db2_table(target_conn, f"{target_schema or schema}.{table}".upper())
+    if target_row_count is None:
+        cursor = target_conn.cursor()
+        try:
+            cursor.execute(f"SELECT COUNT(*) FROM {target_table}")
+            target_row_count = int(cursor.fetchone()[0])
+        finally:
+            cursor.close()
+
+    result = {
+        "table": table_name,
+        "mode": "sample",
+        "row_count_source": source_row_count,
+        "row_count_target": target_row_count,
+        "confidence": confidence,
+        "db2_table_used": target_table,
+        "fallback_used": fallback_used,
+    }
+    names = [c["column_name"] for c in columns or []]
+    if not key_column or key_column.upper() not in {n.upper() for n in names}:
+        result.update({
+            "match": source_row_count == target_row_count,
+            "sampled_rows": 0,
+            "note": "no single-column key; compared row counts only",
+        })
+        return result
+
+    key_index = [n.upper() for n in names].index(key_column.upper())
+    source_rows = _sample_source_rows(source_conn, source_type, f"{schema}.{table}", names, size, source_row_count)
+    sampled = {canonical_value(r[key_index]): (r[key_index], row_hash(r)) for r in source_rows}
+    target_rows = _db2_rows_by_key(target_conn, target_table, names, key_column, [k for k, _ in sampled.values()])
+    target = {canonical_value(r[key_index]): row_hash(r) for r in target_rows}
+
+    missing = [key for canon, (key, _) in sampled.items() if canon not in target]
+    different = [key for canon, (key, digest) in sampled.items() if canon in target and target[canon] != digest]
+    mismatches = len(missing) + len(different)
+    result.update({
+        "key_column": names[key_index],
+        "sampled_rows": len(sampled),
+        "mismatches": mismatches,
+        "missing_in_target": missing[:RANGE_CHECKSUM_MAX_DIFFS],
+        "different": different[:RANGE_CHECKSUM_MAX_DIFFS],
+        "match": mismatches == 0 and source_row_count == target_row_count,
+    })
+    if sampled and mismatches:
+        result["mismatch_rate"] = round(mismatches / len(sampled), 6)
+    elif sampled:
+        result["max_mismatch_rate"] = round(1 - (1 - confidence) ** (1 / len(sampled)), 6)
+    return result
+
+
+# ─────────────────────── COLUMN PROFILES ───────────────────────
+def compare_table_profile(table_name: str, source_type: str, source_conn, target_conn):
+    """
+    Compare per-column aggregates (non-null count, min/max/sum or trimmed length, distinct
+    count) computed by each database in one query per table (see services.column_profile).
+    Cheaper than hashing rows, and a difference points at the column it is in.
+    """
+    cursor = source_conn.cursor()
+    try:
+        schema, table = _source_schema(cursor, source_type, table_name)
+    finally:
+        cursor.close()
+    metadata = _source_metadata(source_type, schema, table)
+    if not metadata:
+        raise RuntimeError(f"No source metadata for '{table_name}'")
+    target_table, fallback_used = resolve_db2_table(target_conn, f"{schema}.{table}".upper())
+
+    result = compare_profiles(
+        source_conn, source_dialect(source_type), f"{schema}.{table}",
+        target_conn, Db2Dialect(), target_table,
+        profile_columns(metadata),
+    )
+    return {
+        "table": table_name,
+        "mode": "profile",
+        **result,
+        "db2_table_used": target_table,
+        "fallback_used": fallback_used,
+    }
+
+
+# ─────────────────────── LOAD DIGESTS ───────────────────────
+def compare_table_loaded(table_name: str, source_type: str, source_conn, target_conn):
+    """
+    Compare the DB2 table with the digest of the rows its last successful load committed
+    (recorded by the insert workers, see services.db2_service), so only DB2 is read.
+    Rows the load itself rejected are not covered; they show up in the load result.
+    Tables loaded without a digest are compared with `compare_table`.
+    """
+    cursor = source_conn.cursor()
+    try:
+        schema, table = _source_schema(cursor, source_type, table_name)
+    finally:
+        cursor.close()
+    loaded = get_throughput_history().latest_load_digest(source_type, schema, table)
+    if not loaded:
+        logging.info(f"[INFO] {table_name}: no load digest recorded, comparing full digests")
+        result = compare_table(table_name, source_conn, target_conn)
+        result.update({"mode": "digest", "note": "no load digest recorded; compared full digests"})
+        return result
+
+    target_table, fallback_used = resolve_db2_table(
+        target_conn, f"{loaded['target_schema'] or schema}.{table}".upper()
+    )
+    cursor = target_conn.cursor()
+    cursor.arraysize = VALIDATION_FETCH_SIZE
+    try:
+        # Same column order as the load: DB2's own.
+        cursor.execute(f"SELECT * FROM {target_table}")
+        digest = digest_cursor(cursor, VALIDATION_FETCH_SIZE)
+    finally:
+        cursor.close()
+
+    return {
+        "table": table_name,
+        "mode": "loaded",
+        "match": digest.rows == loaded["digest_rows"] and digest.hexdigest() == loaded["load_digest"],
+        "load_hash": loaded["load_digest"],
+        "target_hash": digest.hexdigest(),
+        "rows_loaded": loaded["digest_rows"],
+        "row_count_target": digest.rows,
+        "loaded_at": loaded["recorded_at"],
+        "load_run_id": loaded["run_id"],
+        "db2_table_used": target_table,
+        "fallback_used": fallback_used,
+    }
+
+
+def run_comparison(mode: str, table_name: str, source_type: str, source_conn, target_conn):
+    if mode == "loaded":
+        return compare_table_loaded(table_name, source_type, source_conn, target_conn)
+    if mode == "profile":
+        return compare_table_profile(table_name, source_type, source_conn, target_conn)
+    if mode == "sample":
+        return compare_table_sample(table_name, source_type, source_conn, target_conn)
+    if mode == "ranges":
+        return compare_table_ranges(table_name, source_type, source_conn, target_conn)
+    if mode == "digest":
+        return compare_table(table_name, source_conn, target_conn)
+    raise ValueError(f"Unknown validation mode '{mode}'. Must be one of {', '.join(VALIDATION_MODES)}.")
+
+
+# ─────────────────────── PARALLEL VALIDATION ───────────────────────
+class ConnectionPool:
+    """
+    Bounded pool of DB-API connections made by `factory`. A connection is handed to one
+    caller at a time and reused afterwards; one that failed while in use is closed instead
+    of being returned, so a broken session never reaches the next table.
+    """
+
+    def __init__(self, factory: Callable[[], Any], max_size: int):
+        self.factory = factory
+        self._idle: List[Any] = []
+        self._slots = threading.BoundedSemaphore(max(1, max_size))
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        conn = None
+        try:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self.factory()
+            yield conn
+        except BaseException:
+            _close_quietly(conn)
+            conn = None
+            raise
+        finally:
+            if conn is not None:
+                with self._lock:
+                    self._idle.append(conn)
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            _close_quietly(conn)
+
+
+def _close_quietly(conn):
+    if conn is None:
+        return
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class TableValidationRun:
+    """
+    Validate tables in parallel (at most `max_workers` at a time, each on a pooled source
+    and DB2 connection); iterating yields every result as soon as it is ready. A table that
+    fails to validate yields a result with `match` False and the `error`. `cancel` may be
+    called from any thread: tables not started yet are dropped and iteration ends once the
+    running ones finish.
+    """
+
+    def __init__(self, table_names: List[str], source_type: str, max_workers: int = VALIDATION_CONCURRENCY,
+                 mode: str = "digest"):
+        self.table_names = list(table_names)
+        self.source_type = source_type
+        self.max_workers = max_workers
+        self.mode = mode
+        self._stop = threading.Event()
+        self._executor = None
+
+    def cancel(self):
+        self._stop.set()
+        executor = self._executor
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if not self.table_names or self._stop.is_set():
+            return
+        workers = max(1, min(self.max_workers, len(self.table_names)))
+        target_creds = get_target_credentials()
+        source_pool = ConnectionPool(lambda: get_source_conn(self.source_type), workers)
+        target_pool = ConnectionPool(lambda: get_db2_connection(target_creds), workers)
+
+        def run(table_name):
+            started = time.time()
+            try:
+                with source_pool.connection() as source_conn, target_pool.connection() as target_conn:
+                    result = run_comparison(self.mode, table_name, self.source_type, source_conn, target_conn)
+            except Exception as e:
+                logging.error(f"❌ Validation of {table_name} failed: {e}")
+                result = {"table": table_name, "match": False, "error": str(e)}
+            result["duration"] = round(time.time() - started, 3)
+            return result
+
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            pending = {self._executor.submit(run, name) for name in self.table_names}
+            while pending and not self._stop.is_set():
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if not future.cancelled():
+                        yield future.result()
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            source_pool.close()
+            target_pool.close()
+
+
+def iter_validate_tables(table_names: List[str], source_type: str, max_workers: int = VALIDATION_CONCURRENCY,
+                         mode: str = "digest") -> Iterator[Dict[str, Any]]:
+    """Results of a TableValidationRun over `table_names`, as they complete."""
+    return iter(TableValidationRun(table_names, source_type, max_workers, mode))
+
+
+def validate_multiple_tables(table_names, source_type, max_workers: int = VALIDATION_CONCURRENCY, mode: str = "digest"):
+    order = {name: i for i, name in enumerate(table_names)}
+    results = list(iter_validate_tables(table_names, source_type, max_workers, mode))
+    return sorted(results, key=lambda r: order.get(r["table"], len(order)))
+
+
+def schema_tables(source_type, schema):
+    """The schema's MAXOBJECT tables: the same snapshot the migration created and loaded."""
+    if source_type.lower() == "sql":
+        from services.sql_service import fetch_schema_metadata
+    elif source_type.lower() == "oracle":
+        from services.oracle_service import fetch_schema_metadata
     else:
         raise ValueError("Unsupported source type")
+    return [f"{schema}.{table}" for table in sorted(fetch_schema_metadata(schema))]
+
 
-    tables = [f"{schema}.{row[0]}" for row in cursor.fetchall()]
-    return validate_multiple_tables(tables, source_type)
+def validate_schema(source_type, schema, max_workers: int = VALIDATION_CONCURRENCY, mode: str = "digest"):
+    logging.info(f"🧪 Validating entire schema: {schema} from source: {source_type}")
+    return validate_multiple_tables(schema_tables(source_type, schema), source_type, max_workers, mode)
@@ -1,12 +1,39 @@
-import re
 import ibm_db
-from utils.credentials_store import load_credentials
-from services.db2_service import check_table_exists
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from services.db2_service import check_table_exists, get_db2_connection_fast
+from services.db2_catalog import get_target_catalog
+from services.sql_rewrite import TokenList, render
+from services.conversion_cache import get_conversion_cache
 
+# Bump when the view conversion output changes, so cached conversions are redone.
+VIEW_CONVERTER_VERSION = "2"
 
-import re
 
-import re
+_VIEW_PREFIX_WORDS = {"OR", "REPLACE", "FORCE", "NOFORCE", "EDITIONABLE", "NONEDITIONABLE", "ALTER"}
+
+
+def _column_name(tl: TokenList, start: int, end: int) -> Tuple[str, int]:
+    """
+    Output name of one select-list item: its alias, else the column it selects. Also returns
+    where the item's own alias starts (`end` when it has none), so the alias can be replaced.
+    """
+    sig = tl.significant(start, end)
+    if not sig:
+        return "", end
+    last = tl[sig[-1]]
+    if len(sig) > 1 and last.is_name:
+        before = tl[sig[-2]]
+        # expr AS alias
+        if before.upper == "AS":
+            return last.name.upper(), sig[-2]
+        # expr alias
+        if before.is_name or before.kind in ("string", "number") or before.text == ")":
+            return last.name.upper(), sig[-1]
+    # Remove table qualifiers
+    if last.is_name and all(tl[i].is_name or tl[i].text == "." for i in sig):
+        return last.name.upper(), end
+    return render([tl[i] for i in sig]).replace('"', "").upper(), end
+
 
 def convert_view_ddl_to_db2(source_ddl: str) -> str:
     """
@@ -15,135 +42,97 @@ def convert_view_ddl_to_db2(source_ddl: str) -> str:
     - Unique aliases for duplicate columns.
     - Preserves entire SELECT statement intact except column aliases.
     """
-
-    ddl = source_ddl.strip()
-    ddl = re.sub(r"CREATE\s+(OR\s+REPLACE\s+)?VIEW", "CREATE OR REPLACE VIEW", ddl, flags=re.IGNORECASE)
-    ddl = re.sub(r"\[([^\]]+)\]", r'"\1"', ddl)  # Convert [id] to "id"
-    ddl = re.sub(r"\s+", " ", ddl).strip()
-
-    pattern = re.compile(
-        r'CREATE OR REPLACE VIEW\s+'
-        r'(?:(?:"?(\w+)"?)\.)?'   # schema (group 1, optional)
-        r'("?(\w+)"?)'            # view name (group 2 quoted, group 3 unquoted)
-        r'\s+AS\s+'
-        r'(SELECT\s+.+)',          # The full SELECT statement (group 4)
-        re.IGNORECASE | re.DOTALL
-    )
-
-    m = pattern.match(ddl)
-    if not m:
+    tl = TokenList(source_ddl.strip())
+    sig = tl.significant()
+    pos = 0
+    if not sig or tl[sig[0]].upper != "CREATE":
+        raise Exception("Invalid VIEW DDL: Can't parse schema/view and SELECT statement.")
+    pos = 1
+    while pos < len(sig) and tl[sig[pos]].upper in _VIEW_PREFIX_WORDS:
+        pos += 1
+    if pos >= len(sig) or tl[sig[pos]].upper != "VIEW":
         raise Exception("Invalid VIEW DDL: Can't parse schema/view and SELECT statement.")
+    pos += 1
+
+    # [schema.]view
+    schema = None
+    if pos + 2 < len(sig) and tl[sig[pos + 1]].text == ".":
+        schema = tl[sig[pos]].name
+        pos += 2
+    if pos >= len(sig) or not tl[sig[pos]].is_name:
+        raise Exception("Invalid VIEW DDL: Can't parse schema/view and SELECT statement.")
+    view_name = tl[sig[pos]].name
+    pos += 1
+
+    # Explicit column list given by the source (Oracle GET_DDL emits one)
+    declared_cols = None
+    if pos < len(sig) and tl[sig[pos]].text == "(":
+        close = tl.close.get(sig[pos], len(tl) - 1)
+        declared_cols = [_column_name(tl, s, e)[0] for s, e in tl.split(",", sig[pos] + 1, close)]
+        while pos < len(sig) and sig[pos] <= close:
+            pos += 1
+
+    if pos + 1 >= len(sig) or tl[sig[pos]].upper != "AS":
+        raise Exception("Invalid VIEW DDL: Can't parse schema/view and SELECT statement.")
+    select_at = sig[pos + 1]
 
-    schema = m.group(1)
-    view_name = m.group(3)
-    select_stmt = m.group(4).rstrip(";")
+    # Statement end: trailing ';' (and SQL Server's WITH CHECK OPTION stays part of the body)
+    end = len(tl)
+    while end > select_at and (tl[end - 1].kind in ("ws", "comment") or tl[end - 1].text == ";"):
+        end -= 1
 
     schema_part = f'"{schema.upper()}"' if schema else None
     view_part = f'"{view_name.upper()}"'
     full_view_name = f"{schema_part}.{view_part}" if schema_part else view_part
 
-    # --- Extract SELECT column list safely ---
-    # Find the first top-level FROM keyword outside of parentheses
-
-    def split_select_from(select_sql: str):
-        """
-        Split select_sql into (columns_part, rest_part),
-        where columns_part is the text after SELECT and before first top-level FROM.
-        rest_part is FROM ... and everything after.
-        """
-
-        select_sql = select_sql.strip()
-        # Strip leading SELECT keyword
-        if select_sql[:6].upper() == "SELECT":
-            select_sql = select_sql[6:].lstrip()
-
-        level = 0
-        for i in range(len(select_sql)):
-            c = select_sql[i]
-            if c == '(':
-                level += 1
-            elif c == ')':
-                if level > 0:
-                    level -= 1
-            elif c.upper() == 'F' and select_sql[i:i+4].upper() == "FROM" and level == 0:
-                # Found top-level FROM
-                return select_sql[:i].rstrip(), select_sql[i:].lstrip()
-
-        raise Exception("Unable to find top-level FROM in SELECT statement.")
-
-    try:
-        columns_part, rest_sql = split_select_from(select_stmt)
-    except Exception as ex:
-        raise Exception(f"Failed to split SELECT and FROM: {ex}")
-
-    # Split columns by commas not inside parentheses
-    col_list = []
-    level = 0
-    start = 0
-    for i, c in enumerate(columns_part):
-        if c == '(':
-            level += 1
-        elif c == ')':
-            level -= 1
-        elif c == ',' and level == 0:
-            col_list.append(columns_part[start:i].strip())
-            start = i + 1
-    col_list.append(columns_part[start:].strip())  # last column
-
-    # Extract base column names to detect duplicates
-    def extract_base_name(col: str) -> str:
-        col = col.strip()
-
-        # Detect alias after AS keyword, e.g. colname AS alias
-        m_alias = re.search(r"\s+AS\s+\"?([\w\d_]+)\"?$", col, re.IGNORECASE)
-        if m_alias:
-            return m_alias.group(1).upper()
-
-        # Detect alias without AS: e.g. colname alias
-        parts = col.split()
-        if len(parts) > 1:
-            return parts[-1].strip('"').upper()
-
-        # Remove table qualifiers
-        if '.' in col:
-            col = col.split('.')[-1]
-
-        # Strip quotes
-        return col.strip('"').upper()
+    def text(start, stop):
+        return render(tl[start:stop], collapse=True, brackets_to_quotes=True)
+
+    if tl[select_at].upper != "SELECT":
+        if declared_cols is None:
+            raise Exception("Invalid VIEW DDL: Can't parse schema/view and SELECT statement.")
+        quoted = ", ".join(f'"{c}"' for c in declared_cols)
+        return f"CREATE OR REPLACE VIEW {full_view_name} ({quoted}) AS {text(select_at, end)};"
+
+    # --- Extract SELECT column list: up to the first FROM at the SELECT's own depth ---
+    from_at = tl.find("FROM", select_at + 1, end, depth=tl[select_at].depth)
+    if from_at < 0:
+        raise Exception("Failed to split SELECT and FROM: Unable to find top-level FROM in SELECT statement.")
+
+    # Split columns by commas not inside parentheses; skip DISTINCT/ALL/TOP n
+    cols_start = select_at + 1
+    head = tl.significant(cols_start, from_at)
+    k = 0
+    while k < len(head) and tl[head[k]].upper in ("DISTINCT", "ALL", "UNIQUE"):
+        k += 1
+    modifiers = text(cols_start, head[k]) if k else ""
+    if k:
+        cols_start = head[k]
+    col_ranges = tl.split(",", cols_start, from_at)
+    named = [_column_name(tl, s, e) for s, e in col_ranges]
+    base_names = declared_cols if declared_cols and len(declared_cols) == len(col_ranges) else [n for n, _ in named]
 
     counts = {}
-    for col in col_list:
-        base_name = extract_base_name(col)
+    for base_name in base_names:
         counts[base_name] = counts.get(base_name, 0) + 1
 
     duplicate_counters = {}
-    col_aliases = []
+    new_cols_text = []
     final_col_names = []
-
-    for col in col_list:
-        base_name = extract_base_name(col)
+    for (start, stop), (_, alias_at), base_name in zip(col_ranges, named, base_names):
         if counts[base_name] > 1:
             duplicate_counters[base_name] = duplicate_counters.get(base_name, 0) + 1
             alias_name = f"{base_name}_{duplicate_counters[base_name]}"
-            col_aliases.append((col, alias_name))
+            # Replaces the item's own alias, if it had one
+            new_cols_text.append(f"{text(start, alias_at)} AS \"{alias_name}\"")
             final_col_names.append(alias_name)
         else:
-            col_aliases.append((col, None))
+            new_cols_text.append(text(start, stop))
             final_col_names.append(base_name)
 
-    # Build the aliased column list (add AS "alias" on duplicates)
-    new_cols_text = []
-    for original_col, alias in col_aliases:
-        col_clean = original_col.rstrip(";")
-        if alias:
-            new_cols_text.append(f"{col_clean} AS \"{alias}\"")
-        else:
-            new_cols_text.append(col_clean)
-
-    new_cols_text_joined = ", ".join(new_cols_text)
-
     # Rebuild the full SELECT statement with aliased columns
-    new_select_stmt = f"SELECT {new_cols_text_joined} {rest_sql}"
+    select_kw = f"SELECT {modifiers} " if modifiers else "SELECT "
+    new_select_stmt = f"{select_kw}{', '.join(new_cols_text)} {text(from_at, end)}"
 
     # Compose the final DB2-compliant DDL with explicit column list
     quoted_col_list = [f'"{col}"' for col in final_col_names]
@@ -155,38 +144,63 @@ def convert_view_ddl_to_db2(source_ddl: str) -> str:
     return ddl_out
 
 
+def convert_view_cached(source_ddl: str) -> str:
+    """`convert_view_ddl_to_db2` through the conversion cache."""
+    return get_conversion_cache().convert(
+        "view", VIEW_CONVERTER_VERSION, source_ddl, lambda: convert_view_ddl_to_db2(source_ddl)
+    )
+
 
-def execute_view_ddl(ddl: str, schema: str) -> bool:
+def execute_view_ddl(ddl: str, schema: str, view_name: Optional[str] = None) -> bool:
     """
     Execute the given DB2 DDL string for creating/replacing a view.
     Validates that all referenced tables exist before execution.
+    With `view_name`, a view that exists and was last created from the same DDL is left
+    alone, and the outcome is recorded in the conversion cache.
     """
+    cache = get_conversion_cache()
+    if view_name and cache.unchanged("view", schema, view_name, ddl) and get_target_catalog().has_view(schema, view_name):
+        print(f"⏭️ View {schema}.{view_name} unchanged since last run")
+        return True
+
+    ok = _execute_view_ddl(ddl, schema)
+    if view_name:
+        try:
+            cache.record("view", schema, view_name, ddl, ok)
+        except Exception as e:
+            print(f"⚠️ Could not record view outcome in the conversion cache: {e}")
+    return ok
 
+
+def _execute_view_ddl(ddl: str, schema: str) -> bool:
     try:
         missing_tables = []
         required_tables = extract_table_names_from_ddl(ddl)
         for sch, tbl in required_tables:
             actual_schema = sch if sch else schema
-            if not check_table_exists(actual_schema, tbl, skip_cache=True):
+            if not check_table_exists(actual_schema, tbl):
                 missing_tables.append(f"{actual_schema}.{tbl}")
 
         if missing_tables:
             print(f"❌ View creation failed - missing referenced tables: {', '.join(missing_tables)}")
             return False
 
-        creds = load_credentials("db2", is_target=True)
-        dsn = (
-            f"DATABASE={creds['database']};HOSTNAME={creds['host']};PORT={creds['port']};"
-            f"UID={creds['username']};PWD={creds['password']};SECURITY={creds.get('security', 'SSL')};"
-            f"CHARSET=UTF-8;AUTOCOMMIT=0;CONNECTTIMEOUT=30;QUERYTIMEOUT=300;CURRENTSCHEMA={schema};"
-        )
-
-        conn = ibm_db.connect(dsn, "", "")
+        conn = get_db2_connection_fast()
         print(f"[DEBUG] Executing DDL:\n{ddl}")
-        ibm_db.exec_immediate(conn, ddl)
-        ibm_db.commit(conn)
-        ibm_db.close(conn)
-
+        # Unqualified names in the view body resolve against the view's schema; the pooled
+        # connection's own current schema is put back afterwards.
+        previous = ibm_db.fetch_tuple(ibm_db.exec_immediate(conn, "VALUES CURRENT SCHEMA"))[0]
+        try:
+            ibm_db.exec_immediate(conn, f'SET CURRENT SCHEMA "{schema.upper()}"')
+            ibm_db.exec_immediate(conn, ddl)
+            ibm_db.commit(conn)
+        except Exception:
+            ibm_db.rollback(conn)
+            raise
+        finally:
+            ibm_db.exec_immediate(conn, f'SET CURRENT SCHEMA "{previous.strip()}"')
+
+        get_target_catalog().apply_ddl(ddl, default_schema=schema)
         return True
     except Exception as e:
         print(f"❌ View execution error: {e}")
@@ -202,17 +216,60 @@ def extract_table_names_from_ddl(ddl: str) -> list:
         List of tuples: (schema_or_None, table_name)
     """
 
-    ddl_lower = ddl.lower()
-    pattern = re.compile(r"from\s+([a-z0-9_\.]+)|join\s+([a-z0-9_\.]+)", re.IGNORECASE)
-    matches = pattern.findall(ddl_lower)
-    flattened = [item for pair in matches for item in pair if item]
-
+    tl = TokenList(ddl)
+    sig = tl.significant()
     result = []
-    for tbl_name in flattened:
-        if '.' in tbl_name:
-            sch, tbl = tbl_name.split('.', 1)
-            result.append((sch.upper(), tbl.upper()))
+    for n, i in enumerate(sig[:-1]):
+        if tl[i].upper not in ("FROM", "JOIN") or not tl[sig[n + 1]].is_name:
+            continue
+        # [schema].[name] and "schema"."name" → schema.name
+        first = tl[sig[n + 1]]
+        if n + 3 < len(sig) and tl[sig[n + 2]].text == "." and tl[sig[n + 3]].is_name:
+            result.append((first.name.upper(), tl[sig[n + 3]].name.upper()))
         else:
-            result.append((None, tbl_name.upper()))
+            result.append((None, first.name.upper()))
 
     return result
+
+
+def view_dependencies(
+    views: List[Dict[str, Any]],
+    catalog_deps: Optional[Dict[str, Iterable[str]]] = None,
+) -> Dict[str, Set[str]]:
+    """
+    For every view, the other views in `views` it selects from: names parsed from its DDL
+    plus what the source's dependency catalog reports (`catalog_deps`).
+    """
+    names = {v["name"].upper() for v in views if v.get("name")}
+    deps = {}
+    for view in views:
+        if not view.get("name"):
+            continue
+        name = view["name"].upper()
+        refs = {tbl for _, tbl in extract_table_names_from_ddl(view.get("source_ddl") or "")}
+        refs |= {r.upper() for r in (catalog_deps or {}).get(name, ())}
+        deps[name] = (refs & names) - {name}
+    return deps
+
+
+def view_creation_waves(
+    views: List[Dict[str, Any]],
+    catalog_deps: Optional[Dict[str, Iterable[str]]] = None,
+) -> Tuple[List[List[Dict[str, Any]]], List[Dict[str, Any]]]:
+    """
+    Order views into waves: every view depends only on views of earlier waves, so each
+    wave can be created in parallel. Returns (waves, views left over in a dependency cycle).
+    """
+    by_name = {v["name"].upper(): v for v in views if v.get("name")}
+    remaining = view_dependencies(list(by_name.values()), catalog_deps)
+    waves = []
+    while remaining:
+        ready = sorted(name for name, deps in remaining.items() if not deps)
+        if not ready:
+            break
+        waves.append([by_name[name] for name in ready])
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return waves, [by_name[name] for name in sorted(remaining)]
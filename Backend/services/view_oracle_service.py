@@ -45,3 +45,24 @@ def get_view_ddl(schema: str, view_names=None):
     finally:
         cursor.close()
         conn.close()
+
+
+def fetch_view_dependencies(schema: str):
+    """Map each view to the views of the same schema it depends on (ALL_DEPENDENCIES)."""
+    creds = get_source_credentials("oracle")
+    conn = get_oracle_connection(creds)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT NAME, REFERENCED_NAME
+            FROM ALL_DEPENDENCIES
+            WHERE OWNER = :schema AND TYPE = 'VIEW'
+            AND REFERENCED_OWNER = :schema AND REFERENCED_TYPE = 'VIEW'
+        """, {"schema": schema.upper()})
+        deps = {}
+        for name, referenced in cursor.fetchall():
+            deps.setdefault(name.upper(), set()).add(referenced.upper())
+        return deps
+    finally:
+        cursor.close()
+        conn.close()
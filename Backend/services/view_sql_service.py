@@ -52,3 +52,30 @@ def get_view_ddl(schema: str, view_names=None):
     finally:
         cursor.close()
         conn.close()
+
+
+def fetch_view_dependencies(schema: str):
+    """Map each view to the views of the same schema it depends on (sys.sql_expression_dependencies)."""
+    creds = load_credentials("sql")
+    conn_str = (
+        f"DRIVER={{ODBC Driver 17 for SQL Server}};"
+        f"SERVER={creds['host']},{creds['port']};DATABASE={creds['database']};"
+        f"UID={creds['username']};PWD={creds['password']}"
+    )
+    conn = pyodbc.connect(conn_str)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT v.name, rv.name
+            FROM sys.sql_expression_dependencies d
+            JOIN sys.views v ON v.object_id = d.referencing_id
+            JOIN sys.views rv ON rv.object_id = d.referenced_id
+            WHERE SCHEMA_NAME(v.schema_id) = ? AND rv.schema_id = v.schema_id
+        """, (schema,))
+        deps = {}
+        for name, referenced in cursor.fetchall():
+            deps.setdefault(name.upper(), set()).add(referenced.upper())
+        return deps
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,204 @@
+# utils/ddl_index.py
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DDL_ROOT = os.path.join(BASE_DIR, "generated_ddls")
+DDL_INDEX_PATH = os.getenv("DDL_INDEX_DB", os.path.join(BASE_DIR, "ddl_index.sqlite3"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ddl_objects (
+    target      TEXT NOT NULL,
+    schema_name TEXT NOT NULL,
+    folder      TEXT NOT NULL,
+    object_name TEXT NOT NULL,
+    ddl         TEXT NOT NULL,
+    seq         INTEGER NOT NULL,
+    PRIMARY KEY (target, schema_name, folder, object_name)
+);
+CREATE INDEX IF NOT EXISTS idx_ddl_objects_name ON ddl_objects (target, schema_name, folder, object_name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS ddl_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+# Each ddl_search row has the rowid of its ddl_objects row, so it is replaced and joined by
+# rowid. ddl_fts is the earlier layout that matched on UNINDEXED columns (a full scan).
+_FTS_SCHEMA = """
+DROP TABLE IF EXISTS ddl_fts;
+CREATE VIRTUAL TABLE IF NOT EXISTS ddl_search USING fts5(object_name, ddl);
+"""
+
+
+class DdlIndex:
+    """
+    SQLite index of the generated DDL files, fed by the DDL writer.
+
+    Every write bumps a global sequence number; the highest `seq` within a listing's
+    scope is used as its version, so unchanged listings can be answered with 304.
+    Full-text search uses FTS5 when the SQLite build has it, LIKE otherwise.
+    """
+
+    def __init__(self, path: str = DDL_INDEX_PATH, root: str = DDL_ROOT):
+        self.root = root
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+            had_search = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'ddl_search'"
+            ).fetchone() is not None
+            try:
+                self._conn.executescript(_FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:
+                logger.warning("⚠️ SQLite without FTS5; DDL search falls back to LIKE")
+                self.fts = False
+            self._conn.commit()
+            empty = self._conn.execute("SELECT COUNT(*) FROM ddl_objects").fetchone()[0] == 0
+        if empty or (self.fts and not had_search):
+            self.rebuild()
+
+    def _next_seq(self) -> int:
+        self._conn.execute(
+            "INSERT INTO ddl_meta (key, value) VALUES ('seq', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+        )
+        return self._conn.execute("SELECT value FROM ddl_meta WHERE key = 'seq'").fetchone()[0]
+
+    def upsert_many(self, rows: Iterable[Tuple[str, str, str, str, str]]):
+        """rows: (target, schema, folder, object_name, ddl)."""
+        rows = list(rows)
+        if not rows:
+            return
+        with self._lock:
+            seq = self._next_seq()
+            # An upsert, not INSERT OR REPLACE, so an object keeps its rowid (and search row).
+            self._conn.executemany(
+                "INSERT INTO ddl_objects (target, schema_name, folder, object_name, ddl, seq) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(target, schema_name, folder, object_name) DO UPDATE SET ddl = excluded.ddl, seq = excluded.seq",
+                [(*r, seq) for r in rows],
+            )
+            if self.fts:
+                rowids = [
+                    self._conn.execute(
+                        "SELECT rowid FROM ddl_objects WHERE target = ? AND schema_name = ? AND folder = ? AND object_name = ?",
+                        r[:4],
+                    ).fetchone()[0]
+                    for r in rows
+                ]
+                self._conn.executemany("DELETE FROM ddl_search WHERE rowid = ?", [(rowid,) for rowid in rowids])
+                self._conn.executemany(
+                    "INSERT INTO ddl_search (rowid, object_name, ddl) VALUES (?, ?, ?)",
+                    [(rowid, r[3], r[4]) for rowid, r in zip(rowids, rows)],
+                )
+            self._conn.commit()
+
+    def rebuild(self):
+        """Re-index everything under generated_ddls/ (first start, or files changed by hand)."""
+        rows = []
+        if os.path.isdir(self.root):
+            for target in sorted(os.listdir(self.root)):
+                target_dir = os.path.join(self.root, target)
+                if not os.path.isdir(target_dir):
+                    continue
+                for schema in sorted(os.listdir(target_dir)):
+                    schema_dir = os.path.join(target_dir, schema)
+                    if not os.path.isdir(schema_dir):
+                        continue
+                    for folder in sorted(os.listdir(schema_dir)):
+                        folder_dir = os.path.join(schema_dir, folder)
+                        if not os.path.isdir(folder_dir):
+                            continue
+                        for name in os.listdir(folder_dir):
+                            if name.lower().endswith(".sql"):
+                                with open(os.path.join(folder_dir, name), "r", encoding="utf-8", errors="replace") as f:
+                                    rows.append((target, schema, folder, os.path.splitext(name)[0], f.read()))
+        with self._lock:
+            self._conn.execute("DELETE FROM ddl_objects")
+            if self.fts:
+                self._conn.execute("DELETE FROM ddl_search")
+            self._conn.commit()
+        self.upsert_many(rows)
+        logger.info(f"🗂️ DDL index rebuilt: {len(rows)} objects")
+
+    # ── queries ──
+    def targets_version(self, target: str) -> Tuple[int, int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), 0), COUNT(*) FROM ddl_objects WHERE target = ?", (target,)
+            ).fetchone()
+        return row[0], row[1]
+
+    def list_schemas(self, target: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT schema_name FROM ddl_objects WHERE target = ? ORDER BY schema_name", (target,)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def list_objects(
+        self,
+        target: str,
+        schema: str,
+        folder: str,
+        prefix: Optional[str] = None,
+        q: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Object names in one folder, optionally filtered by name prefix and/or full-text query."""
+        where = ["o.target = ?", "o.schema_name = ?", "o.folder = ?"]
+        params: List[Any] = [target, schema, folder]
+        join = ""
+        if prefix:
+            where.append("o.object_name LIKE ? ESCAPE '\\' COLLATE NOCASE")
+            params.append(prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        if q:
+            if self.fts:
+                join = "JOIN ddl_search f ON f.rowid = o.rowid"
+                where.append("ddl_search MATCH ?")
+                # Quote each term so SQL punctuation in the query is taken literally.
+                params.append(" ".join('"{}"'.format(term.replace('"', '""')) for term in q.split()))
+            else:
+                where.append("(o.object_name LIKE ? OR o.ddl LIKE ?)")
+                params.extend([f"%{q}%", f"%{q}%"])
+        clause = " AND ".join(where)
+        with self._lock:
+            total, version = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(MAX(o.seq), 0) FROM ddl_objects o {join} WHERE {clause}", params
+            ).fetchone()
+            rows = self._conn.execute(
+                f"SELECT o.object_name FROM ddl_objects o {join} WHERE {clause} "
+                f"ORDER BY o.object_name LIMIT ? OFFSET ?",
+                (*params, -1 if limit is None else limit, offset),
+            ).fetchall()
+        return {"objects": [r[0] for r in rows], "total": total, "version": version}
+
+    def get_ddl(self, target: str, schema: str, folder: str, object_name: str) -> Optional[Tuple[str, int]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ddl, seq FROM ddl_objects WHERE target = ? AND schema_name = ? AND folder = ? AND object_name = ?",
+                (target, schema, folder, object_name),
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+
+def make_etag(*parts: Any) -> str:
+    return '"' + hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:20] + '"'
+
+
+_index: Optional[DdlIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_ddl_index() -> DdlIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = DdlIndex()
+        return _index
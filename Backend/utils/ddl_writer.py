@@ -1,41 +1,223 @@
 # utils/ddl_writer.py
 
 
+import atexit
+import logging
 import os
+import queue
+import tempfile
+import threading
+
+from utils.ddl_index import get_ddl_index
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+logger = logging.getLogger(__name__)
+
+FOLDER_NAME_MAP = {
+    "table": "tables",
+    "sequence": "sequences",
+    "trigger": "triggers",
+    "index": "index",
+    "view": "views",
+}
+# Order of sections in the combined {schema}.sql: objects can be replayed top to bottom.
+COMBINED_ORDER = ["sequence", "table", "index", "trigger", "view"]
+WRITE_BATCH_SIZE = 500
+# Quiet time after the last save before combined files are rebuilt without a flush.
+COMBINE_DELAY_SECONDS = float(os.getenv("DDL_COMBINE_DELAY_SECONDS", "2"))
+
+
+def _atomic_write(path: str, content: str):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _render(object_type: str, schema: str, object_name: str, ddl_statement: str) -> str:
+    return f"-- {object_type.upper()}: {schema}.{object_name}\n{ddl_statement.strip()}\n"
+
+
+class DdlArtifactSink:
+    """
+    Single background writer for generated DDL files.
+
+    `save` only enqueues; the writer thread drains the queue in batches and writes each
+    per-object file atomically (last write wins within a batch). The combined
+    {schema}.sql of every touched schema is rebuilt in a fixed order (type, then name)
+    on `flush` or once no DDL has been queued for COMBINE_DELAY_SECONDS, never per batch.
+    Nothing is ever appended. After `begin_run` the combined file holds only that run's
+    objects, kept in memory until the next flush; a schema saved to without one
+    (single-object routes) is rebuilt from the per-object files on disk.
+    """
+
+    def __init__(self, base_dir: str = BASE_DIR):
+        self.base_dir = base_dir
+        self._queue: "queue.Queue" = queue.Queue()
+        self._objects = {}  # (target, schema) of a begun run -> {(object_type, object_name): ddl}
+        self._dirty = set()  # (target, schema) whose combined file is out of date
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="DdlWriter", daemon=True)
+        self._thread.start()
+
+    def _schema_dir(self, target: str, schema: str) -> str:
+        return os.path.join(self.base_dir, f"generated_ddls/{target}/{schema}")
+
+    def begin_run(self, target: str, schema: str):
+        """
+        Start a new combined file for this schema: only objects saved from now on are
+        included. The file is rewritten when the run's DDL is flushed, not here.
+        """
+        self._queue.put(("begin", target, schema))
+
+    def save(self, target: str, schema: str, object_name: str, ddl_statement: str, object_type: str):
+        self._queue.put(("save", target, schema, object_type.lower(), object_name, ddl_statement))
+
+    def flush(self):
+        """Block until everything queued so far, and the combined files, are on disk."""
+        self._queue.put(("flush",))
+        self._queue.join()
+
+    def _load_from_disk(self, target: str, schema: str) -> dict:
+        """{(object_type, object_name): ddl} from the per-object files of a schema."""
+        objects = {}
+        schema_dir = self._schema_dir(target, schema)
+        for folder in sorted(set(FOLDER_NAME_MAP.values()) | {"others"}):
+            directory = os.path.join(schema_dir, folder)
+            if not os.path.isdir(directory):
+                continue
+            for file_name in sorted(os.listdir(directory)):
+                if not file_name.endswith(".sql"):
+                    continue
+                try:
+                    with open(os.path.join(directory, file_name), encoding="utf-8") as f:
+                        header, _, ddl = f.read().partition("\n")
+                except OSError as e:
+                    logger.warning(f"⚠️ Could not read {folder}/{file_name}: {e}")
+                    continue
+                # Files are written by _render: "-- TYPE: schema.name" then the statement.
+                if not header.startswith("-- ") or ":" not in header:
+                    continue
+                object_type = header[3:].split(":", 1)[0].strip().lower()
+                objects[(object_type, file_name[:-len(".sql")])] = ddl.strip()
+        return objects
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=COMBINE_DELAY_SECONDS if self._dirty else None)
+            except queue.Empty:
+                try:
+                    self._write_combined(keep_runs=True)
+                except Exception as e:
+                    logger.error(f"❌ DDL writer failed to rebuild combined files: {e}")
+                continue
+            items = [item]
+            while len(items) < WRITE_BATCH_SIZE:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(items)
+            except Exception as e:
+                logger.error(f"❌ DDL writer failed on a batch of {len(items)}: {e}")
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    def _write_batch(self, items):
+        files = {}
+        flush = False
+        with self._lock:
+            for item in items:
+                if item[0] == "flush":
+                    flush = True
+                    continue
+                if item[0] == "begin":
+                    _, target, schema = item
+                    self._objects[(target, schema)] = {}
+                    continue
+                _, target, schema, object_type, object_name, ddl = item
+                folder = FOLDER_NAME_MAP.get(object_type, "others")
+                path = os.path.join(self._schema_dir(target, schema), folder, f"{object_name}.sql")
+                files[path] = (target, schema, folder, object_name, _render(object_type, schema, object_name, ddl))
+                if (target, schema) in self._objects:
+                    self._objects[(target, schema)][(object_type, object_name)] = ddl
+                self._dirty.add((target, schema))
+
+        for path in sorted(files):
+            _atomic_write(path, files[path][4])
+        if files:
+            try:
+                get_ddl_index().upsert_many(files.values())
+            except Exception as e:
+                logger.warning(f"⚠️ DDL index update failed: {e}")
+        if flush:
+            self._write_combined(keep_runs=False)
+
+    def _write_combined(self, keep_runs: bool):
+        """
+        Rebuild the combined file of every dirty schema. Without `keep_runs` (a flush, i.e.
+        the end of a run) the runs' objects are dropped; later saves start from disk.
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            combined = {key: dict(self._objects[key]) if key in self._objects else None for key in dirty}
+            if not keep_runs:
+                self._objects.clear()
+
+        rank = {t: i for i, t in enumerate(COMBINED_ORDER)}
+        for (target, schema), objects in combined.items():
+            if objects is None:
+                objects = self._load_from_disk(target, schema)
+            ordered = sorted(objects.items(), key=lambda kv: (rank.get(kv[0][0], len(rank)), kv[0][0], kv[0][1]))
+            content = "".join(
+                "\n\n" + _render(object_type, schema, object_name, ddl)
+                for (object_type, object_name), ddl in ordered
+            )
+            _atomic_write(os.path.join(self._schema_dir(target, schema), f"{schema}.sql"), content)
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_ddl_sink() -> DdlArtifactSink:
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = DdlArtifactSink()
+            atexit.register(_sink.flush)
+        return _sink
+
 
 def save_ddl(target: str, schema: str, object_name: str, ddl_statement: str, object_type: str):
     """
-    Save DDL to:
+    Queue DDL to be saved to:
     - generated_ddls/{target}/{schema}/<object_type>/<object_name>.sql
-    - Append to generated_ddls/{target}/{schema}/{schema}.sql
+    - generated_ddls/{target}/{schema}/{schema}.sql (rebuilt on flush or when saves go
+      quiet, from this run's objects or from the files on disk when no run was begun)
     """
-    object_type = object_type.lower()
-    folder_name_map = {
-        "table": "tables",
-        "sequence": "sequences",  
-        "trigger": "triggers",
-        "index": "index",
-        "view": "views",
-    }
-    folder_type = folder_name_map.get(object_type, "others")
-
-    ddl_folder = os.path.join(BASE_DIR, f"generated_ddls/{target}/{schema}/{folder_type}")
-    os.makedirs(ddl_folder, exist_ok=True)
-
-    combined_ddl_path = os.path.join(BASE_DIR, f"generated_ddls/{target}/{schema}/{schema}.sql")
-    os.makedirs(os.path.dirname(combined_ddl_path), exist_ok=True)
-
-    with open(combined_ddl_path, "a", encoding="utf-8") as combined_file:
-        combined_file.write(f"\n\n-- {object_type.upper()}: {schema}.{object_name}\n")
-        combined_file.write(ddl_statement.strip() + "\n")
-
-    individual_ddl_path = os.path.join(ddl_folder, f"{object_name}.sql")
-    with open(individual_ddl_path, "w", encoding="utf-8") as individual_file:
-        individual_file.write(f"-- {object_type.upper()}: {schema}.{object_name}\n")
-        individual_file.write(ddl_statement.strip() + "\n")
+    get_ddl_sink().save(target, schema, object_name, ddl_statement, object_type)
+
+
+def begin_ddl_run(target: str, schema: str):
+    get_ddl_sink().begin_run(target, schema)
+
+
+def flush_ddl_writes():
+    get_ddl_sink().flush()
 
 
 def create_ddl_summary(